@@ -0,0 +1,66 @@
+import sqlite3
+
+# How often the dashboard looks for new commits, in milliseconds
+CHECK_INTERVAL = 1000
+
+def describe_low_stock(row):
+    item_id, name, quantity, reorder_level, since = row
+    if quantity <= 0:
+        return f"{name}: out of stock"
+    return f"{name}: {quantity} left (reorder at {reorder_level})"
+
+class LowStockWatcher:
+    # Keeps a Tk widget up to date with the items at or below their reorder level.
+    # Every interval it compares DatabaseManager.data_version(), which reads no table at
+    # all; only after a commit, from this terminal or any other, is the low_stock table
+    # read again, and that holds just the items that need reordering (the triggers from
+    # GMS_Migrations.create_low_stock keep it current). on_change(rows, new_ids) runs on
+    # the Tk thread whenever the list changed, with the ids of items that have just gone
+    # low since the last look so the caller can draw attention to them.
+    def __init__(self, widget, db_manager, on_change, interval=CHECK_INTERVAL):
+        self.widget = widget
+        self.db_manager = db_manager
+        self.on_change = on_change
+        self.interval = interval
+
+        self.version = None  # data_version() as of the last read of low_stock
+        self.rows = None
+        self.pending_after = None
+        self.closed = False
+        self.checks = 0
+        self.reads = 0
+
+        self.widget.bind("<Destroy>", lambda event: self.close(), add="+")
+        self.check()
+
+    def check(self):
+        self.pending_after = None
+        if self.closed:
+            return
+        self.checks += 1
+        try:
+            version = self.db_manager.data_version()
+        except sqlite3.Error as e:
+            print("Error checking for stock changes:", e)
+            version = self.version
+        if version != self.version:
+            self.version = version
+            self.refresh()
+        self.pending_after = self.widget.after(self.interval, self.check)
+
+    def refresh(self):
+        self.reads += 1
+        rows = self.db_manager.get_low_stock()
+        if rows == self.rows:
+            return
+        # Everything is new on the first read; only later arrivals are alerts
+        seen = {row[0] for row in self.rows} if self.rows is not None else None
+        new_ids = [row[0] for row in rows if row[0] not in seen] if seen is not None else []
+        self.rows = rows
+        self.on_change(rows, new_ids)
+
+    def close(self):
+        self.closed = True
+        if self.pending_after is not None:
+            self.widget.after_cancel(self.pending_after)
+            self.pending_after = None
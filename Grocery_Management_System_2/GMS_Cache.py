@@ -0,0 +1,256 @@
+import string
+import sys
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from GMS_Migrations import INVENTORY_SEARCH_INDEX
+from GMS_Search import SEARCH_LIMIT, MIN_TRIGRAM_LENGTH, CANDIDATE_FACTOR, match_phrase
+
+# More changed items than this since the last look and a full reload is cheaper than patching
+RELOAD_THRESHOLD = 2000
+FETCH_CHUNK = 500
+# SQLite's NOCASE only folds ASCII letters, so keys do the same to sort exactly like the database
+ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+def nocase_key(name):
+    return name.lower() if name.isascii() else name.translate(ASCII_LOWER)
+
+class InventoryCache:
+    # Process-wide copy of the inventory (id, name, price, quantity, barcode) in name order,
+    # kept in parallel arrays, plus a barcode -> id dict for scanners. Reads check PRAGMA data_version (bumped by commits from other
+    # processes) and the manager's own commit count; when either moved, the item ids in
+    # inventory_changes since the last look are re-read and patched in. Sales only change
+    # quantities, so they patch in place.
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+        self.cursor = db_manager.conn.cursor()
+        self.version = None  # (data_version, own commit count) the cache reflects
+        self.last_change = None  # Newest inventory_changes.seq applied
+        self.ids = array("q")
+        self.names = []
+        self.keys = []
+        self.prices = array("d")
+        self.quantities = array("q")
+        self.barcodes = []
+        self.positions = {}  # id -> index into the arrays
+        self.barcode_ids = {}  # barcode -> id
+        # Keys joined by newlines in id order for substring search, rebuilt when names change.
+        # Id order is the order the search index and a table scan yield candidates in.
+        self.blob = None
+        self.starts = array("q")
+        self.blob_ids = array("q")
+
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.patched_items = 0
+        self.last_reload_ms = None
+
+    # Keeping up to date
+    def sync(self):
+        self.cursor.execute("PRAGMA data_version")
+        version = (self.cursor.fetchone()[0], self.db_manager.commits)
+        if version == self.version:
+            self.hits += 1
+            return
+        self.misses += 1
+        if self.last_change is None:
+            self.reload()
+        else:
+            self.cursor.execute("SELECT MIN(seq), MAX(seq) FROM inventory_changes")
+            oldest, newest = self.cursor.fetchone()
+            if newest is not None and newest > self.last_change:
+                if oldest > self.last_change + 1:
+                    self.reload()  # The log was pruned past what we have seen
+                else:
+                    self.cursor.execute("SELECT DISTINCT item_id FROM inventory_changes WHERE seq > ?", (self.last_change,))
+                    changed = [row[0] for row in self.cursor.fetchall()]
+                    if len(changed) > RELOAD_THRESHOLD:
+                        self.reload()
+                    else:
+                        self.patch(changed)
+                        self.last_change = newest
+        self.version = version
+
+    def reload(self):
+        start = time.perf_counter()
+        # Read the change log position first: anything written after it is patched again later
+        self.cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM inventory_changes")
+        self.last_change = self.cursor.fetchone()[0]
+        # A table scan sorted here is quicker than walking the name index; names are unique
+        # under NOCASE, and code point order is the byte order SQLite compares in
+        self.cursor.execute("SELECT id, name, price, quantity, barcode FROM inventory")
+        rows = self.cursor.fetchall()
+        rows.sort(key=lambda row: nocase_key(row[1]))
+        self.ids = array("q", (row[0] for row in rows))
+        self.names = [row[1] for row in rows]
+        self.keys = [nocase_key(name) for name in self.names]
+        self.prices = array("d", (row[2] or 0.0 for row in rows))
+        self.quantities = array("q", (row[3] or 0 for row in rows))
+        self.barcodes = [row[4] for row in rows]
+        self.positions = {item_id: index for index, item_id in enumerate(self.ids)}
+        self.barcode_ids = {row[4]: row[0] for row in rows if row[4] is not None}
+        self.blob = None
+        self.reloads += 1
+        self.last_reload_ms = (time.perf_counter() - start) * 1000
+
+    def patch(self, changed):
+        rows = {}
+        for start in range(0, len(changed), FETCH_CHUNK):
+            chunk = changed[start:start + FETCH_CHUNK]
+            self.cursor.execute(f"SELECT id, name, price, quantity, barcode FROM inventory WHERE id IN ({','.join('?' * len(chunk))})", chunk)
+            rows.update((row[0], row) for row in self.cursor.fetchall())
+
+        moved = []
+        for item_id in changed:
+            index = self.positions.get(item_id)
+            row = rows.get(item_id)
+            if index is not None and row is not None and row[1] == self.names[index]:
+                self.prices[index] = row[2] or 0.0
+                self.quantities[index] = row[3] or 0
+                if row[4] != self.barcodes[index]:
+                    self.set_barcode(item_id, self.barcodes[index], row[4])
+                    self.barcodes[index] = row[4]
+            else:
+                moved.append((item_id, index, row))
+        self.patched_items += len(changed)
+        if not moved:
+            return
+
+        # Added, deleted or renamed items: take out the old entries, then insert in key order
+        for item_id, index, row in sorted((entry for entry in moved if entry[1] is not None), key=lambda entry: entry[1], reverse=True):
+            self.set_barcode(item_id, self.barcodes[index], None)
+            del self.ids[index], self.names[index], self.keys[index], self.prices[index], self.quantities[index], self.barcodes[index]
+        for item_id, index, row in moved:
+            if row is not None:
+                self.set_barcode(item_id, None, row[4])
+                key = nocase_key(row[1])
+                position = bisect_left(self.keys, key)
+                self.ids.insert(position, item_id)
+                self.names.insert(position, row[1])
+                self.keys.insert(position, key)
+                self.prices.insert(position, row[2] or 0.0)
+                self.quantities.insert(position, row[3] or 0)
+                self.barcodes.insert(position, row[4])
+        self.positions = {item_id: index for index, item_id in enumerate(self.ids)}
+        self.blob = None
+
+    def set_barcode(self, item_id, old, new):
+        # Only drop the old code if it still points here; another item may have taken it over
+        if old is not None and self.barcode_ids.get(old) == item_id:
+            del self.barcode_ids[old]
+        if new is not None:
+            self.barcode_ids[new] = item_id
+
+    # Reads, in the same shapes as the DatabaseManager methods they stand in for
+    def count(self):
+        self.sync()
+        return len(self.names)
+
+    def rows(self, start, end):
+        return [(self.names[index], self.prices[index], self.quantities[index]) for index in range(start, min(end, len(self.names)))]
+
+    def page_after(self, page_size, after=None, descending=False):
+        # GMS_Search.inventory_page for the name order without a search: the page is a
+        # bisect into the keys from the (name, id) cursor of the previous one
+        self.sync()
+        if descending:
+            end = bisect_left(self.keys, nocase_key(after[0])) if after is not None else len(self.keys)
+            indexes = range(end - 1, max(0, end - page_size) - 1, -1)
+        else:
+            start = bisect_right(self.keys, nocase_key(after[0])) if after is not None else 0
+            indexes = range(start, min(len(self.keys), start + page_size))
+        rows = [(self.names[index], self.prices[index], self.quantities[index]) for index in indexes]
+        next_after = (self.names[indexes[-1]], self.ids[indexes[-1]]) if len(rows) == page_size else None
+        return rows, next_after
+
+    def all(self):
+        self.sync()
+        return self.rows(0, len(self.names))
+
+    def get(self, name):
+        # The full inventory row (id, name, quantity, price), or None
+        self.sync()
+        key = nocase_key(name)
+        index = bisect_left(self.keys, key)
+        if index < len(self.keys) and self.keys[index] == key:
+            return (self.ids[index], self.names[index], self.quantities[index], self.prices[index])
+        return None
+
+    def get_by_barcode(self, barcode):
+        self.sync()
+        item_id = self.barcode_ids.get(barcode)
+        if item_id is None:
+            return None
+        index = self.positions[item_id]
+        return (item_id, self.names[index], self.quantities[index], self.prices[index])
+
+    def search(self, term, limit=SEARCH_LIMIT):
+        # Names starting with the term first, in name order, then names containing it,
+        # best match first: the same results as GMS_Search.search_inventory
+        self.sync()
+        key = nocase_key(term)
+        first = bisect_left(self.keys, key)
+        last = first
+        while last < len(self.keys) and last - first < limit and self.keys[last].startswith(key):
+            last += 1
+        results = self.rows(first, last)
+        if len(results) >= limit or not term or "\n" in key:
+            return results
+        # Short terms stay prefix-only, as with the trigram index
+        if self.db_manager.search_index and len(term) < MIN_TRIGRAM_LENGTH:
+            return results
+
+        # Substring candidates: from the trigram index when there is one, otherwise with
+        # one C-level find() over all the keys at once
+        if self.db_manager.search_index:
+            self.cursor.execute(f"SELECT rowid FROM {INVENTORY_SEARCH_INDEX} WHERE {INVENTORY_SEARCH_INDEX} MATCH ? LIMIT ?",
+                                (match_phrase(term), limit * CANDIDATE_FACTOR))
+            candidates = [index for index in (self.positions.get(row[0]) for row in self.cursor.fetchall())
+                          if index is not None and not first <= index < last]
+        else:
+            candidates = self.find_candidates(key, first, last, limit * CANDIDATE_FACTOR)
+
+        # Earlier and tighter matches rank higher
+        lowered = term.lower()
+        candidates.sort(key=lambda index: (self.names[index].lower().find(lowered), len(self.names[index]), self.names[index]))
+        results.extend((self.names[index], self.prices[index], self.quantities[index]) for index in candidates[:limit - len(results)])
+        return results
+
+    def find_candidates(self, key, first, last, wanted):
+        if self.blob is None:
+            self.blob_ids = array("q", sorted(self.ids))
+            keys = [self.keys[self.positions[item_id]] for item_id in self.blob_ids]
+            self.blob = "\n".join(key_text.replace("\n", " ") for key_text in keys)
+            self.starts = array("q")
+            offset = 0
+            for key_text in keys:
+                self.starts.append(offset)
+                offset += len(key_text) + 1
+        candidates = []
+        position = self.blob.find(key)
+        while position != -1 and len(candidates) < wanted:
+            entry = bisect_right(self.starts, position) - 1
+            index = self.positions[self.blob_ids[entry]]
+            if not first <= index < last:
+                candidates.append(index)
+            if entry + 1 >= len(self.starts):
+                break
+            position = self.blob.find(key, self.starts[entry + 1])
+        return candidates
+
+    def stats(self):
+        memory = (sys.getsizeof(self.names) + sys.getsizeof(self.keys) + sum(map(sys.getsizeof, self.names))
+                  + sum(sys.getsizeof(key) for key, name in zip(self.keys, self.names) if key is not name)
+                  + sys.getsizeof(self.ids) + sys.getsizeof(self.prices) + sys.getsizeof(self.quantities)
+                  + sys.getsizeof(self.barcodes) + sys.getsizeof(self.barcode_ids) + sum(map(sys.getsizeof, self.barcode_ids))
+                  + sys.getsizeof(self.positions) + sys.getsizeof(self.starts) + sys.getsizeof(self.blob_ids) + (sys.getsizeof(self.blob) if self.blob else 0))
+        return {
+            "items": len(self.names),
+            "hits": self.hits,
+            "misses": self.misses,
+            "reloads": self.reloads,
+            "patched_items": self.patched_items,
+            "last_reload_ms": self.last_reload_ms,
+            "memory_bytes": memory,
+        }
@@ -0,0 +1,63 @@
+def to_cents(price):
+    return round(price * 100)
+
+def format_cents(cents):
+    return f"{cents / 100:.2f}"
+
+class CartLine:
+    # One item in the cart, with its price as it was when it was first added
+    __slots__ = ("item_id", "name", "quantity", "unit_cents")
+
+    def __init__(self, item_id, name, quantity, unit_cents):
+        self.item_id = item_id
+        self.name = name
+        self.quantity = quantity
+        self.unit_cents = unit_cents
+
+    @property
+    def total_cents(self):
+        return self.quantity * self.unit_cents
+
+class Cart:
+    # The sale being rung up. Amounts are whole cents so totals never drift, the total is
+    # kept up to date as lines are added, and nothing touches the database until
+    # DatabaseManager.sell_cart(cart.sale_lines()) takes the stock for every line at once.
+    def __init__(self):
+        self.lines = []
+        self.positions = {}  # item id -> index into lines
+        self.total_cents = 0
+        self.units = 0
+
+    def add(self, item, quantity):
+        # Add an (id, name, quantity in stock, price) item. Adding an item already in the
+        # cart raises its line's quantity at the price first seen. Returns (line, index)
+        # of the line that changed, or (None, error message).
+        if quantity <= 0:
+            return None, "Quantity must be greater than zero"
+        item_id, name, stock, price = item
+        index = self.positions.get(item_id)
+        in_cart = self.lines[index].quantity if index is not None else 0
+        if in_cart + quantity > stock:
+            return None, f"Sorry! Only {stock - in_cart} items left!"
+        if index is None:
+            index = len(self.lines)
+            self.positions[item_id] = index
+            self.lines.append(CartLine(item_id, name, 0, to_cents(price)))
+        line = self.lines[index]
+        line.quantity += quantity
+        self.total_cents += quantity * line.unit_cents
+        self.units += quantity
+        return line, index
+
+    def sale_lines(self):
+        # (name, quantity, unit price) for sell_cart, charging the snapshot prices
+        return [(line.name, line.quantity, line.unit_cents / 100) for line in self.lines]
+
+    def clear(self):
+        self.lines = []
+        self.positions = {}
+        self.total_cents = 0
+        self.units = 0
+
+    def __len__(self):
+        return len(self.lines)
@@ -0,0 +1,111 @@
+import hashlib
+import hmac
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Passwords are stored as "pbkdf2_sha256$<iterations>$<salt hex>$<hash hex>", so every user
+# row carries the cost it was hashed with and the cost can be raised later. Anything
+# without the prefix is a legacy plaintext password and is upgraded on the next login.
+ALGORITHM = "pbkdf2_sha256"
+SALT_BYTES = 16
+# How long one verification should take on this machine
+TARGET_MS = 100
+MIN_ITERATIONS = 50000
+CALIBRATION_ITERATIONS = 20000
+# Calibration drifts with load from one process to the next, so a stored hash is only
+# redone once its cost falls clearly below the current calibration
+REHASH_BELOW = 0.8
+
+calibration_lock = threading.Lock()
+calibrated_iterations = None
+
+def pbkdf2(password, salt, iterations):
+    return hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+
+def calibrate_iterations(target_ms=TARGET_MS):
+    # Time a short run and scale it up to the target; done once per process
+    global calibrated_iterations
+    with calibration_lock:
+        if calibrated_iterations is None:
+            salt = os.urandom(SALT_BYTES)
+            best = None
+            for _ in range(3):  # Best of three, so a busy moment doesn't lower the cost
+                start = time.perf_counter()
+                pbkdf2("calibration", salt, CALIBRATION_ITERATIONS)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            iterations = int(CALIBRATION_ITERATIONS * target_ms / 1000 / best)
+            calibrated_iterations = max(MIN_ITERATIONS, iterations // 1000 * 1000)
+        return calibrated_iterations
+
+def hash_password(password, iterations=None):
+    iterations = iterations or calibrate_iterations()
+    salt = os.urandom(SALT_BYTES)
+    return f"{ALGORITHM}${iterations}${salt.hex()}${pbkdf2(password, salt, iterations).hex()}"
+
+def is_hashed(stored):
+    return stored is not None and stored.startswith(ALGORITHM + "$")
+
+def verify_password(password, stored):
+    # Returns (matches, new hash to store or None). A new hash is produced when the stored
+    # one is plaintext or was made with clearly fewer iterations than this machine now calibrates to.
+    if stored is None:
+        # Unknown user: spend the same time as a real check so usernames can't be probed
+        hash_password(password)
+        return False, None
+    if not is_hashed(stored):
+        matches = hmac.compare_digest(password.encode("utf-8"), stored.encode("utf-8"))
+        return matches, hash_password(password) if matches else None
+    try:
+        algorithm, iterations, salt, expected = stored.split("$")
+        iterations = int(iterations)
+        salt, expected = bytes.fromhex(salt), bytes.fromhex(expected)
+    except ValueError:
+        print("Error verifying password: malformed password hash")
+        return False, None
+    matches = hmac.compare_digest(pbkdf2(password, salt, iterations), expected)
+    if matches and iterations < calibrate_iterations() * REHASH_BELOW:
+        return True, hash_password(password)
+    return matches, None
+
+class BackgroundCredentials:
+    # Hashes and checks passwords for the login window on a worker thread, so Tk keeps
+    # drawing while a check runs. Database reads and writes stay on the Tk thread; only
+    # the key derivation (which releases the GIL) runs on the worker.
+    def __init__(self, widget, db_manager, poll_interval=15):
+        self.widget = widget
+        self.db_manager = db_manager
+        self.poll_interval = poll_interval
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="credentials")
+        self.executor.submit(calibrate_iterations)  # Calibrate before the first login needs it
+        # A root window also sees <Destroy> for each of its children, so check which one went
+        self.widget.bind("<Destroy>", lambda event: self.close() if event.widget is self.widget else None, add="+")
+
+    def login(self, username, password, on_done):
+        # on_done(user row or None) is called on the Tk thread
+        user = self.db_manager.get_user(username)
+        future = self.executor.submit(verify_password, password, user[2] if user else None)
+
+        def finished(result):
+            matches, new_hash = result
+            if matches and new_hash:
+                self.db_manager.set_password_hash(user[0], new_hash)
+            on_done(user if matches else None)
+
+        self.wait(future, finished)
+
+    def register(self, username, password, on_done):
+        # on_done(success, message) is called on the Tk thread
+        future = self.executor.submit(hash_password, password)
+        self.wait(future, lambda password_hash: on_done(*self.db_manager.register_user(username, password_hash=password_hash)))
+
+    def wait(self, future, callback):
+        if future.done():
+            callback(future.result())
+        else:
+            self.widget.after(self.poll_interval, self.wait, future, callback)
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -1,45 +1,7 @@
 import tkinter as tk
 from tkinter import messagebox
-import sqlite3
-
-class DatabaseManager:
-    def __init__(self, db_file):
-        self.conn = sqlite3.connect(db_file)
-        self.cursor = self.conn.cursor()
-        self.create_tables()
-
-    def create_tables(self):
-        try:
-            # Create tables for store inventory, sales, and users
-            self.cursor.execute("""CREATE TABLE IF NOT EXISTS inventory (
-                                    id INTEGER PRIMARY KEY,
-                                    name TEXT,
-                                    quantity INTEGER,
-                                    price REAL
-                                )""")
-
-            self.cursor.execute("""CREATE TABLE IF NOT EXISTS sales (
-                                    id INTEGER PRIMARY KEY,
-                                    items_bought TEXT,
-                                    total_price REAL
-                                )""")
-
-            self.cursor.execute("""CREATE TABLE IF NOT EXISTS users (
-                                    id INTEGER PRIMARY KEY,
-                                    username TEXT UNIQUE,
-                                    password TEXT,
-                                    role TEXT
-                                )""")  
-            # Check if the users table is empty
-            self.cursor.execute("SELECT COUNT(*) FROM users")
-            count = self.cursor.fetchone()[0]
-            if count == 0:
-                # If the table is empty, insert the initial admin user
-                self.cursor.execute("INSERT INTO users (username, password, role) VALUES (?, ?, ?)",
-                                    ("admin", "admin", "Admin"))
-                self.conn.commit()  # Commit the changes
-        except sqlite3.Error as e:
-            print("Error creating tables:", e)
+from GMS_Database import get_database_manager
+from GMS_Widgets import VirtualTable
 
 class GroceryManagementSystem:
     def __init__(self, master):
@@ -47,7 +9,7 @@ class GroceryManagementSystem:
         self.master = master
         self.master.title("Grocery Management System")
         self.master.geometry("800x600")  # Set window size to 800x600
-        self.db_manager = DatabaseManager("grocery_database.db")
+        self.db_manager = get_database_manager("grocery_database.db")
 
         # Color Palette
         self.bg_color = "#cabeaf"
@@ -122,9 +84,9 @@ class GroceryManagementSystem:
         clear_inventory_button = tk.Button(inventory_window, text="Clear Inventory", bg=self.button_color, fg=self.text_color_white, font=("Arial", 10, "bold"), command=self.clear_inventory)
         clear_inventory_button.place(x=50, y=300, width=130, height=40)
 
-        # Listbox on the right side
-        self.info_listbox = tk.Listbox(inventory_window, bg=self.bg_color, fg=self.text_color, font=("Arial", 10))
-        self.info_listbox.place(x=400, y=100, width=300, height=400)
+        # Inventory table on the right side
+        self.info_table = VirtualTable(inventory_window, ("Item Name", "Item Price", "Quantity Left"), bg=self.bg_color)
+        self.info_table.place(x=280, y=100, width=500, height=400)
 
     def add_items(self):
         # Functionality for Add Items button
@@ -179,9 +141,9 @@ class GroceryManagementSystem:
             item_quantity = int(existing_item_quantity_entry.get())
             item = self.db_manager.get_item_by_name(item_name)
             if item:
-                current_quantity = item[2]
-                new_quantity = current_quantity + item_quantity
-                self.db_manager.edit_item(item[0], item[1], new_quantity, item[3])
+                # add_item adds to the stored quantity in one statement, so restocks from
+                # two terminals at once both count, and journals it as a restock
+                self.db_manager.add_item(item[1], item_quantity, item[3])
                 add_window.destroy()
                 self.view_inventory()
             else:
@@ -236,17 +198,8 @@ class GroceryManagementSystem:
 
 
     def view_inventory(self):
-        # Functionality for View Inventory button
-        self.info_listbox.delete(0, tk.END)  # Clear the listbox
-        inventory_items = self.db_manager.view_inventory()
-        if inventory_items:
-            for item in inventory_items:
-                item_name = item[0]
-                item_price = item[1]  # corrected index for price
-                item_quantity = item[2]  # corrected index for quantity
-                self.info_listbox.insert(tk.END, f"Item Name: {item_name}\n Item Price: {item_price}\n Quantity Left: {item_quantity}")
-        else:
-            self.info_listbox.insert(tk.END, "No items on the inventory!")
+        # Functionality for View Inventory button: rows are read a page at a time as the table scrolls
+        self.info_table.show_pages(self.db_manager.inventory_page, "No items on the inventory!", self.db_manager.count_inventory)
 
     def delete_item(self):
         # Functionality for Delete Item button
@@ -271,8 +224,7 @@ class GroceryManagementSystem:
     def clear_inventory(self):
         # Functionality for Clear Inventory button
         self.db_manager.clear_inventory()
-        self.info_listbox.delete(0, tk.END)  # Clear the listbox
-        self.info_listbox.insert(tk.END, "Inventory Cleared!")
+        self.info_table.clear("Inventory Cleared!")
 
 def main():
     # Main function to initialize the application
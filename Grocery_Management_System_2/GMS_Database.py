@@ -0,0 +1,657 @@
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from GMS_Cache import InventoryCache, nocase_key
+from GMS_Cart import to_cents
+from GMS_Credentials import hash_password, verify_password
+from GMS_Migrations import run_migrations, checkpoint_stock, has_search_index, rebuild_sales_rollups
+from GMS_QueryStats import query_stats_from_environment
+from GMS_Search import PAGE_SIZE, SEARCH_LIMIT, inventory_page, search_inventory
+
+DEFAULT_DB_FILE = "grocery_database.db"
+# Prepared statements kept per connection; every query here is a fixed SQL string,
+# so after the first call each one is re-used instead of being parsed again
+STATEMENT_CACHE_SIZE = 256
+
+# Decrement stock only if enough is left, returning the item id, price and new quantity
+SELL_ITEM_SQL = """UPDATE inventory SET quantity = quantity - ?
+                   WHERE name=? COLLATE NOCASE AND quantity >= ?
+                   RETURNING id, price, quantity"""
+
+RECORD_MOVEMENT_SQL = """INSERT INTO stock_movements (item_id, delta, quantity_after, reason, sale_id, created_at)
+                         VALUES (?, ?, ?, ?, ?, ?)"""
+# Movements between stock checkpoints, i.e. the most a point-in-time stock lookup reads
+STOCK_CHECKPOINT_INTERVAL = 100000
+# Every terminal checks whether a checkpoint is due when it opens and then every this many
+# of its own commits, so one gets taken with or without the service or a scheduled job
+STOCK_CHECKPOINT_CHECK_COMMITS = 100
+
+# Sale IDs a terminal reserves at a time. Each block costs one short write, and IDs left
+# unused when a terminal closes are skipped, never handed out twice.
+SALE_ID_BLOCK_SIZE = 50
+# Take the next block, moving past any sale saved without the allocator (e.g. by older copies of the app)
+RESERVE_SALE_IDS_SQL = """UPDATE sale_id_allocator SET next_id = MAX(next_id, (SELECT COALESCE(MAX(id), 0) + 1 FROM sales)) + ?
+                          RETURNING next_id - ?"""
+
+# Per-item rollup rows covering a date range: daily rows for the partial months at either
+# end and monthly rows for the whole months in between (parameters from split_by_month)
+ITEM_ROLLUP_SQL = """SELECT item_id, SUM(units) AS units, SUM(revenue) AS revenue FROM (
+                         SELECT item_id, units, revenue FROM sales_daily_item WHERE day BETWEEN ? AND ?
+                         UNION ALL
+                         SELECT item_id, units, revenue FROM sales_monthly_item WHERE month BETWEEN ? AND ?
+                         UNION ALL
+                         SELECT item_id, units, revenue FROM sales_daily_item WHERE day BETWEEN ? AND ?
+                     )"""
+
+# Tables that can be exported, in a stable id order so an export can be diffed or resumed
+EXPORT_QUERIES = {
+    "inventory": "SELECT id, name, quantity, price, barcode, reorder_level FROM inventory ORDER BY id",
+    "sales": "SELECT id, created_at, cashier, total_price, items_bought FROM sales ORDER BY id",
+    "sale_lines": "SELECT id, sale_id, item_id, item_name, qty, unit_price FROM sale_lines ORDER BY id",
+}
+EXPORT_BATCH_SIZE = 5000
+
+def split_by_month(start_day, end_day):
+    # Parameters for ITEM_ROLLUP_SQL: (leading days, whole months, trailing days).
+    # Ranges that don't apply are given as ('9', '0'), which matches nothing.
+    start, end = date.fromisoformat(start_day), date.fromisoformat(end_day)
+    first_month = start if start.day == 1 else (start.replace(day=1) + timedelta(days=32)).replace(day=1)
+    after_end = end + timedelta(days=1)
+    months_end = after_end.replace(day=1)  # Exclusive end of the whole months
+    if first_month >= months_end:
+        return (start_day, end_day, "9", "0", "9", "0")
+    return (start_day, str(first_month - timedelta(days=1)),
+            first_month.strftime("%Y-%m"), (months_end - timedelta(days=1)).strftime("%Y-%m"),
+            str(months_end), end_day)
+
+# Connection settings that trade durability for speed, applied together by name.
+# "legacy" is how the app used to run (rollback journal, an fsync per commit and per
+# journal write); "safe" keeps every commit through a power cut; "balanced" may lose the
+# last commits on a power cut but never corrupts the file; "fast" is for bulk loads and
+# test databases only, as an OS crash can corrupt it.
+DURABILITY_PROFILES = {
+    "legacy": {"journal_mode": "DELETE", "synchronous": "FULL", "cache_size": -2000, "mmap_size": 0, "temp_store": "DEFAULT"},
+    "safe": {"journal_mode": "WAL", "synchronous": "FULL", "cache_size": -16384, "mmap_size": 0, "temp_store": "MEMORY"},
+    "balanced": {"journal_mode": "WAL", "synchronous": "NORMAL", "cache_size": -16384, "mmap_size": 67108864, "temp_store": "MEMORY"},
+    "fast": {"journal_mode": "WAL", "synchronous": "OFF", "cache_size": -65536, "mmap_size": 268435456, "temp_store": "MEMORY"},
+}
+# GMS_DURABILITY picks another profile for a run, e.g. "fast" on a test machine
+DEFAULT_DURABILITY = os.environ.get("GMS_DURABILITY", "safe")
+
+class OutOfStock(Exception):
+    pass
+
+def connect(db_file, timeout=10, durability=DEFAULT_DURABILITY):
+    # Several terminals share this file: wait for a busy writer instead of failing
+    # straight away. Every profile but "legacy" uses WAL so readers never block the writer.
+    settings = DURABILITY_PROFILES[durability]
+    conn = sqlite3.connect(db_file, timeout=timeout, cached_statements=STATEMENT_CACHE_SIZE)
+    for pragma in ("journal_mode", "synchronous", "cache_size", "mmap_size", "temp_store"):
+        conn.execute(f"PRAGMA {pragma}={settings[pragma]}")
+    return conn
+
+class DatabaseManager:
+    # The only place the app talks to SQLite. Use get_database_manager() so every
+    # window in a process shares one instance and one connection.
+    def __init__(self, db_file, timeout=10, query_stats=None, durability=DEFAULT_DURABILITY, cache=True, stock_journal=True):
+        self.db_file = db_file
+        self.durability = durability
+        self.query_stats = query_stats  # A GMS_QueryStats.QueryStats to time every statement, or None
+        self.cursor_factory = query_stats.cursor_factory if query_stats else sqlite3.Cursor
+        self.conn = connect(db_file, timeout, durability)
+        self.cursor = self.conn.cursor(self.cursor_factory)
+        self.savepoints = 0  # Depth of nested transaction() blocks
+        self.commits = 0  # Bumped on every commit, so the inventory cache sees our own writes
+        self.sale_ids = iter(())  # Rest of this terminal's reserved block of sale IDs
+        self.uncommitted_sale_ids = False  # The block was reserved in a transaction still open
+        self.stock_journal = stock_journal  # Only benchmarks measuring the journal's cost turn it off
+        run_migrations(self.conn)
+        self.search_index = has_search_index(self.cursor)
+        if stock_journal:
+            self.checkpoint_stock_if_due()
+        # Inventory reads are served from memory; see GMS_Cache. cache=False always asks SQLite.
+        self.inventory_cache = InventoryCache(self) if cache else None
+
+    @contextmanager
+    def transaction(self):
+        # Every write goes through here. The outermost block takes the write lock up front
+        # and commits once at the end; a block inside another one (or inside unit_of_work)
+        # becomes a savepoint, so its failure undoes only its own writes.
+        if not self.conn.in_transaction:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self.conn.rollback()
+                self.discard_uncommitted_sale_ids()
+                raise
+            self.conn.commit()
+            self.commits += 1
+            self.uncommitted_sale_ids = False
+            if self.stock_journal and self.commits % STOCK_CHECKPOINT_CHECK_COMMITS == 0:
+                self.checkpoint_stock_if_due()
+            return
+        self.savepoints += 1
+        name = f"savepoint_{self.savepoints}"
+        self.conn.execute(f"SAVEPOINT {name}")
+        try:
+            yield
+        except BaseException:
+            self.conn.execute(f"ROLLBACK TO {name}")
+            self.discard_uncommitted_sale_ids()
+            raise
+        finally:
+            self.conn.execute(f"RELEASE {name}")
+            self.savepoints -= 1
+
+    def unit_of_work(self):
+        # Group several calls into one commit, e.g. restocking a delivery or a whole shift
+        # of offline sales:  with db_manager.unit_of_work(): db_manager.add_item(...) ...
+        # If anything inside raises, none of it is saved.
+        return self.transaction()
+
+    def use_cache(self):
+        # Inside a transaction our own uncommitted writes aren't in the cache yet
+        return self.inventory_cache is not None and not self.conn.in_transaction
+
+    def data_version(self):
+        # Changes whenever anything is committed, by this manager (commits) or by another
+        # connection (PRAGMA data_version), without reading any table
+        self.cursor.execute("PRAGMA data_version")
+        return self.cursor.fetchone()[0], self.commits
+
+    # Stock movement journal
+    def record_movements(self, movements):
+        # Append (item id, change, quantity after, reason, sale id, created at) rows to the
+        # journal, inside the transaction that changed the quantities
+        if self.stock_journal:
+            self.cursor.executemany(RECORD_MOVEMENT_SQL, movements)
+
+    def record_removals(self, reason, where, params):
+        # Journal the stock of the items about to be deleted as going to zero
+        if self.stock_journal:
+            self.cursor.execute(f"""INSERT INTO stock_movements (item_id, delta, quantity_after, reason, created_at)
+                                    SELECT id, -quantity, 0, ?, ? FROM inventory WHERE quantity != 0 AND {where}""",
+                                (reason, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), *params))
+
+    def checkpoint_stock(self):
+        # Snapshot every item's quantity against the journal; returns the checkpoint id or None
+        try:
+            with self.transaction():
+                return checkpoint_stock(self.cursor)
+        except sqlite3.Error as e:
+            print("Error checkpointing stock:", e)
+            return None
+
+    def checkpoint_stock_if_due(self, interval=STOCK_CHECKPOINT_INTERVAL):
+        # Take a checkpoint once interval movements have piled up since the last one
+        try:
+            self.cursor.execute("""SELECT (SELECT COALESCE(MAX(id), 0) FROM stock_movements)
+                                          - (SELECT COALESCE(MAX(last_movement_id), 0) FROM stock_checkpoints)""")
+            if self.cursor.fetchone()[0] < interval:
+                return None
+        except sqlite3.Error as e:
+            print("Error checking stock checkpoints:", e)
+            return None
+        return self.checkpoint_stock()
+
+    def stock_at(self, timestamp, item_id=None):
+        # Stock as of a "YYYY-MM-DD HH:MM:SS" time: the newest checkpoint taken by then, with
+        # the movements journaled after it replayed up to that time. Only the journal between
+        # the checkpoint and the last movement made by then is read, however much came after.
+        # Returns {item id: quantity} of the items in stock, or the quantity of one item; None
+        # before the first checkpoint.
+        try:
+            self.cursor.execute("""SELECT id, last_movement_id FROM stock_checkpoints WHERE created_at <= ?
+                                   ORDER BY id DESC LIMIT 1""", (timestamp,))
+            checkpoint = self.cursor.fetchone()
+            if checkpoint is None:
+                return None
+            checkpoint_id, last_movement_id = checkpoint
+            self.cursor.execute("""SELECT COALESCE((SELECT id FROM stock_movements WHERE created_at <= ?
+                                                    ORDER BY created_at DESC, id DESC LIMIT 1), 0)""", (timestamp,))
+            end_movement_id = self.cursor.fetchone()[0]
+            if item_id is not None:
+                self.cursor.execute("""SELECT quantity_after FROM stock_movements
+                                       WHERE item_id = ? AND id > ? AND id <= ? AND created_at <= ?
+                                       ORDER BY id DESC LIMIT 1""",
+                                    (item_id, last_movement_id, end_movement_id, timestamp))
+                result = self.cursor.fetchone()
+                if result is None:
+                    self.cursor.execute("SELECT quantity FROM stock_checkpoint_items WHERE checkpoint_id=? AND item_id=?",
+                                        (checkpoint_id, item_id))
+                    result = self.cursor.fetchone()
+                return result[0] if result else 0
+            self.cursor.execute("SELECT item_id, quantity FROM stock_checkpoint_items WHERE checkpoint_id=?", (checkpoint_id,))
+            stock = dict(self.cursor.fetchall())
+            self.cursor.execute("""SELECT item_id, quantity_after FROM stock_movements
+                                   WHERE id > ? AND id <= ? AND created_at <= ? ORDER BY id""",
+                                (last_movement_id, end_movement_id, timestamp))
+            stock.update(self.cursor.fetchall())
+            return {item_id: quantity for item_id, quantity in stock.items() if quantity != 0}
+        except sqlite3.Error as e:
+            print("Error reading stock history:", e)
+            return None
+
+    # Store Inventory methods
+    def add_item(self, name, quantity, price, barcode=None):
+        try:
+            with self.transaction():
+                # Restocking an existing name adds to its quantity instead of creating a duplicate row
+                self.cursor.execute("""INSERT INTO inventory (name, quantity, price, barcode) VALUES (?, ?, ?, ?)
+                                       ON CONFLICT (name COLLATE NOCASE) DO UPDATE SET
+                                           quantity = quantity + excluded.quantity, barcode = COALESCE(excluded.barcode, barcode)
+                                       RETURNING id, quantity""",
+                                    (name, quantity, price, barcode))
+                item_id, quantity_after = self.cursor.fetchone()
+                if quantity:
+                    self.record_movements([(item_id, quantity, quantity_after, "restock", None,
+                                            datetime.now().strftime("%Y-%m-%d %H:%M:%S"))])
+        except sqlite3.Error as e:
+            print("Error adding item to inventory:", e)
+
+    def upsert_items(self, items):
+        # Bulk restock from (name, quantity, price[, barcode[, reorder level]]) rows: new
+        # names are inserted, existing ones get the quantity added, the new price and any new
+        # barcode or reorder level. Call it inside unit_of_work().
+        items = [(*item, None, None)[:5] for item in items]
+        self.cursor.executemany("""INSERT INTO inventory (name, quantity, price, barcode, reorder_level) VALUES (?, ?, ?, ?, ?)
+                                   ON CONFLICT (name COLLATE NOCASE) DO UPDATE SET
+                                       quantity = quantity + excluded.quantity, price = excluded.price,
+                                       barcode = COALESCE(excluded.barcode, barcode),
+                                       reorder_level = COALESCE(excluded.reorder_level, reorder_level)""",
+                                items)
+        if self.stock_journal:
+            # The journal is written after the whole batch, so a name listed more than once
+            # takes off what its later rows added to get the quantity right after each row
+            created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            added_later = {}
+            movements = []
+            for name, quantity, *rest in reversed(items):
+                key = nocase_key(name)
+                if quantity:
+                    movements.append((quantity, added_later.get(key, 0), created_at, name))
+                added_later[key] = added_later.get(key, 0) + quantity
+            movements.reverse()
+            self.cursor.executemany("""INSERT INTO stock_movements (item_id, delta, quantity_after, reason, created_at)
+                                       SELECT id, ?, quantity - ?, 'restock', ? FROM inventory WHERE name=? COLLATE NOCASE""",
+                                    movements)
+
+    def edit_item(self, item_id, new_name, new_quantity, new_price, new_barcode=None, new_reorder_level=None):
+        # new_barcode or new_reorder_level None keeps the item's current one. Without a reorder
+        # level an item only shows up in the low stock alerts once it runs out.
+        try:
+            with self.transaction():
+                self.cursor.execute("SELECT quantity FROM inventory WHERE id=?", (item_id,))
+                old = self.cursor.fetchone()
+                self.cursor.execute("""UPDATE inventory SET name=?, quantity=?, price=?, barcode=COALESCE(?, barcode),
+                                           reorder_level=COALESCE(?, reorder_level) WHERE id=?""",
+                                    (new_name, new_quantity, new_price, new_barcode, new_reorder_level, item_id))
+                # Stock counted by hand that doesn't match the books shows up here as shrinkage
+                if old and old[0] != new_quantity:
+                    self.record_movements([(item_id, new_quantity - old[0], new_quantity, "edit", None,
+                                            datetime.now().strftime("%Y-%m-%d %H:%M:%S"))])
+        except sqlite3.Error as e:
+            print("Error editing item:", e)
+
+    def delete_item(self, item_name):
+        try:
+            with self.transaction():
+                self.record_removals("delete", "name=? COLLATE NOCASE", (item_name,))
+                self.cursor.execute("DELETE FROM inventory WHERE name=? COLLATE NOCASE", (item_name,))
+        except sqlite3.Error as e:
+            print("Error deleting item:", e)
+
+    def clear_inventory(self):
+        try:
+            with self.transaction():
+                self.record_removals("clear", "1", ())
+                self.cursor.execute("DELETE FROM inventory")
+        except sqlite3.Error as e:
+            print("Error clearing inventory:", e)
+
+    def get_item_by_name(self, item_name):
+        try:
+            if self.use_cache():
+                return self.inventory_cache.get(item_name)
+            self.cursor.execute("SELECT id, name, quantity, price FROM inventory WHERE name=? COLLATE NOCASE", (item_name,))
+            return self.cursor.fetchone()
+        except sqlite3.Error as e:
+            print("Error getting item by name:", e)
+            return None
+
+    def get_item_by_barcode(self, barcode):
+        # Scanner lookup: the same (id, name, quantity, price) row as get_item_by_name, or None
+        try:
+            if self.use_cache():
+                return self.inventory_cache.get_by_barcode(barcode)
+            self.cursor.execute("SELECT id, name, quantity, price FROM inventory WHERE barcode=?", (barcode,))
+            return self.cursor.fetchone()
+        except sqlite3.Error as e:
+            print("Error getting item by barcode:", e)
+            return None
+
+    def search_item(self, item_name, limit=SEARCH_LIMIT):
+        try:
+            if self.use_cache():
+                return self.inventory_cache.search(item_name, limit)
+            return search_inventory(self.cursor, item_name, limit, self.search_index)
+        except sqlite3.Error as e:
+            print("Error searching item:", e)
+            return []
+
+    # The cashier screens use this name for the same search
+    search_item_by_name = search_item
+
+    def view_inventory(self):
+        try:
+            if self.use_cache():
+                return self.inventory_cache.all()
+            self.cursor.execute("SELECT name, price, quantity FROM inventory")
+            return self.cursor.fetchall()
+        except sqlite3.Error as e:
+            print("Error viewing inventory:", e)
+            return []
+
+    def count_inventory(self):
+        try:
+            if self.use_cache():
+                return self.inventory_cache.count()
+            self.cursor.execute("SELECT COUNT(*) FROM inventory")
+            return self.cursor.fetchone()[0]
+        except sqlite3.Error as e:
+            print("Error counting inventory:", e)
+            return 0
+
+    def get_low_stock(self):
+        # (item id, name, quantity, reorder level, since) for every item at or below its
+        # reorder level, emptiest first. Reads only the trigger-maintained low_stock table.
+        try:
+            self.cursor.execute("""SELECT item_id, name, quantity, reorder_level, since FROM low_stock
+                                   ORDER BY quantity, name COLLATE NOCASE""")
+            return self.cursor.fetchall()
+        except sqlite3.Error as e:
+            print("Error reading low stock:", e)
+            return []
+
+    def inventory_page(self, sort="name", descending=False, page_size=PAGE_SIZE, after=None, search=None):
+        # A page of (name, price, quantity) rows sorted by name, price or quantity, optionally
+        # only names containing search, and the cursor to pass as after for the next page
+        # (None after the last one); see GMS_Search.inventory_page
+        try:
+            if sort == "name" and not search and self.use_cache():
+                return self.inventory_cache.page_after(page_size, after, descending)
+            return inventory_page(self.cursor, sort, descending, page_size, after, search, self.search_index)
+        except sqlite3.Error as e:
+            print("Error reading inventory page:", e)
+            return [], None
+
+    def export_rows(self, table, batch_size=EXPORT_BATCH_SIZE):
+        # Column names and an iterator over batches of rows, read with fetchmany on a cursor
+        # of its own so memory stays at one batch however big the table is
+        cursor = self.conn.cursor(self.cursor_factory)
+        cursor.execute(EXPORT_QUERIES[table])
+        columns = [column[0] for column in cursor.description]
+
+        def batches():
+            try:
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield rows
+            finally:
+                cursor.close()
+
+        return columns, batches()
+
+    # Selling methods
+    def sell_item(self, item_name, quantity_sold):
+        if quantity_sold <= 0:
+            return False, "Quantity must be greater than zero", None
+        try:
+            with self.transaction():
+                # Check and decrement in one statement so two terminals can't both sell the same stock
+                self.cursor.execute(SELL_ITEM_SQL, (quantity_sold, item_name, quantity_sold))
+                result = self.cursor.fetchone()
+                if result:
+                    self.record_movements([(result[0], -quantity_sold, result[2], "sale", None,
+                                            datetime.now().strftime("%Y-%m-%d %H:%M:%S"))])
+            if result:
+                return True, result[1], result[2]  # Return True, item price, and new quantity
+            return False, self.stock_error_message(item_name), None
+        except sqlite3.Error as e:
+            print("Error selling item:", e)
+            return False, "An error occurred", None
+
+    def reserve_sale_ids(self, count=SALE_ID_BLOCK_SIZE):
+        # A block of sale IDs no other terminal or process will use, as a range
+        with self.transaction():
+            self.cursor.execute(RESERVE_SALE_IDS_SQL, (count, count))
+            first = self.cursor.fetchone()[0]
+        self.uncommitted_sale_ids = self.conn.in_transaction
+        return range(first, first + count)
+
+    def discard_uncommitted_sale_ids(self):
+        # A reservation that was rolled back can be handed out again, so stop using it
+        if self.uncommitted_sale_ids:
+            self.sale_ids = iter(())
+            self.uncommitted_sale_ids = False
+
+    def next_sale_id(self):
+        # The ID the next sale will be saved under, from this terminal's reserved block.
+        # Show it on screen and pass it to sell_cart so the receipt matches the saved sale.
+        sale_id = next(self.sale_ids, None)
+        if sale_id is None:
+            try:
+                self.sale_ids = iter(self.reserve_sale_ids())
+            except sqlite3.Error as e:
+                print("Error reserving sale IDs:", e)
+                return None
+            sale_id = next(self.sale_ids)
+        return sale_id
+
+    def sell_cart(self, cart_items, cashier=None, sale_id=None):
+        # Sell every (item name, quantity) line and record the sale header, its lines and the
+        # rollup totals in a single transaction: either the whole cart goes through or nothing changes.
+        # Lines may carry a third unit price element (a GMS_Cart price snapshot) to charge instead
+        # of the current price. The sale is saved under sale_id (from next_sale_id) or the next ID
+        # of this terminal's block.
+        sale_id = sale_id or self.next_sale_id()
+        if sale_id is None:
+            return False, "An error occurred"
+        try:
+            with self.transaction():
+                lines = []
+                sold = []  # (item id, quantity, quantity left) for the stock journal
+                for item_name, quantity_sold, *snapshot in cart_items:
+                    self.cursor.execute(SELL_ITEM_SQL, (quantity_sold, item_name, quantity_sold))
+                    result = self.cursor.fetchone()
+                    if result is None:
+                        raise OutOfStock(f"{item_name}: {self.stock_error_message(item_name)}")
+                    item_id, unit_price, remaining_quantity = result
+                    lines.append((item_id, item_name, quantity_sold, snapshot[0] if snapshot else unit_price))
+                    sold.append((item_id, quantity_sold, remaining_quantity))
+
+                # Added up in cents so the total matches the receipt to the cent
+                total_price = sum(quantity * to_cents(unit_price) for item_id, item_name, quantity, unit_price in lines) / 100
+                created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                self.cursor.execute("INSERT INTO sales (id, total_price, created_at, cashier) VALUES (?, ?, ?, ?)",
+                                    (sale_id, total_price, created_at, cashier))
+                self.cursor.executemany("INSERT INTO sale_lines (sale_id, item_id, item_name, qty, unit_price) VALUES (?, ?, ?, ?, ?)",
+                                        [(sale_id,) + line for line in lines])
+                self.record_movements([(item_id, -quantity, remaining_quantity, "sale", sale_id, created_at)
+                                       for item_id, quantity, remaining_quantity in sold])
+                self.update_sales_rollups(created_at[:10], cashier, lines, total_price)
+            return True, sale_id
+        except OutOfStock as e:
+            return False, str(e)
+        except sqlite3.Error as e:
+            print("Error selling cart:", e)
+            return False, "An error occurred"
+
+    def stock_error_message(self, item_name):
+        item = self.get_item_by_name(item_name)
+        if item:
+            return f"Sorry! Only {item[2]} items left!"
+        return "Sorry, out of stock"
+
+    def save_sale(self, items_bought, total_price, cashier=None):
+        sale_id = self.next_sale_id()
+        if sale_id is None:
+            return
+        try:
+            with self.transaction():
+                created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                self.cursor.execute("INSERT INTO sales (id, items_bought, total_price, created_at, cashier) VALUES (?, ?, ?, ?, ?)",
+                                    (sale_id, items_bought, total_price, created_at, cashier))
+                self.update_sales_rollups(created_at[:10], cashier, [], total_price)
+        except sqlite3.Error as e:
+            print("Error saving sale:", e)
+
+    def update_sales_rollups(self, day, cashier, lines, total_price):
+        # Add one sale to the daily rollups; runs inside the caller's sale transaction
+        units = sum(line[2] for line in lines)
+        self.cursor.execute("""INSERT INTO sales_daily (day, sales_count, units, revenue) VALUES (?, 1, ?, ?)
+                               ON CONFLICT (day) DO UPDATE SET sales_count = sales_count + 1,
+                                   units = units + excluded.units, revenue = revenue + excluded.revenue""",
+                            (day, units, total_price))
+        self.cursor.execute("""INSERT INTO sales_daily_cashier (day, cashier, sales_count, units, revenue) VALUES (?, ?, 1, ?, ?)
+                               ON CONFLICT (day, cashier) DO UPDATE SET sales_count = sales_count + 1,
+                                   units = units + excluded.units, revenue = revenue + excluded.revenue""",
+                            (day, cashier or "", units, total_price))
+        self.cursor.executemany("""INSERT INTO sales_daily_item (day, item_id, units, revenue) VALUES (?, ?, ?, ?)
+                                   ON CONFLICT (day, item_id) DO UPDATE SET
+                                       units = units + excluded.units, revenue = revenue + excluded.revenue""",
+                                [(day, item_id or 0, quantity, quantity * unit_price) for item_id, item_name, quantity, unit_price in lines])
+        self.cursor.executemany("""INSERT INTO sales_monthly_item (month, item_id, units, revenue) VALUES (?, ?, ?, ?)
+                                   ON CONFLICT (month, item_id) DO UPDATE SET
+                                       units = units + excluded.units, revenue = revenue + excluded.revenue""",
+                                [(day[:7], item_id or 0, quantity, quantity * unit_price) for item_id, item_name, quantity, unit_price in lines])
+
+    def rebuild_sales_rollups(self):
+        # Recompute the rollups from the full sales history
+        try:
+            with self.transaction():
+                rebuild_sales_rollups(self.cursor)
+            return True
+        except sqlite3.Error as e:
+            print("Error rebuilding sales rollups:", e)
+            return False
+
+    # Reporting methods
+    def sales_report(self, start_day, end_day, group_by="day"):
+        # Totals between two days inclusive ('YYYY-MM-DD' strings or dates), grouped by
+        # "day", "item" or "cashier". Reads only the rollup tables, so the cost depends on
+        # the length of the range, not on how many sales there are.
+        start_day, end_day = str(start_day), str(end_day)
+        try:
+            if group_by == "day":
+                self.cursor.execute("""SELECT day, sales_count, units, revenue FROM sales_daily
+                                       WHERE day BETWEEN ? AND ? ORDER BY day""", (start_day, end_day))
+            elif group_by == "item":
+                self.cursor.execute(f"""SELECT r.item_id, i.name, r.units, r.revenue
+                                        FROM ({ITEM_ROLLUP_SQL} GROUP BY item_id) r
+                                        LEFT JOIN inventory i ON i.id = r.item_id
+                                        ORDER BY r.revenue DESC""", split_by_month(start_day, end_day))
+            elif group_by == "cashier":
+                self.cursor.execute("""SELECT cashier, SUM(sales_count), SUM(units), SUM(revenue) FROM sales_daily_cashier
+                                       WHERE day BETWEEN ? AND ?
+                                       GROUP BY cashier ORDER BY SUM(revenue) DESC""", (start_day, end_day))
+            else:
+                raise ValueError(f"Unknown report grouping: {group_by}")
+            return self.cursor.fetchall()
+        except sqlite3.Error as e:
+            print("Error reading sales report:", e)
+            return []
+
+    def item_sales(self, item_id, start_day, end_day):
+        # Units and revenue of one item between two days inclusive
+        head_start, head_end, first_month, last_month, tail_start, tail_end = split_by_month(str(start_day), str(end_day))
+        try:
+            self.cursor.execute("""SELECT COALESCE(SUM(units), 0), COALESCE(SUM(revenue), 0) FROM (
+                                       SELECT units, revenue FROM sales_daily_item WHERE item_id=? AND day BETWEEN ? AND ?
+                                       UNION ALL
+                                       SELECT units, revenue FROM sales_monthly_item WHERE item_id=? AND month BETWEEN ? AND ?
+                                       UNION ALL
+                                       SELECT units, revenue FROM sales_daily_item WHERE item_id=? AND day BETWEEN ? AND ?
+                                   )""", (item_id, head_start, head_end, item_id, first_month, last_month, item_id, tail_start, tail_end))
+            return self.cursor.fetchone()
+        except sqlite3.Error as e:
+            print("Error reading item sales:", e)
+            return (0, 0)
+
+    def get_sale_lines(self, sale_id):
+        try:
+            self.cursor.execute("SELECT item_id, item_name, qty, unit_price FROM sale_lines WHERE sale_id=? ORDER BY id", (sale_id,))
+            return self.cursor.fetchall()
+        except sqlite3.Error as e:
+            print("Error getting sale lines:", e)
+            return []
+
+    def get_latest_sale_id(self):
+        try:
+            self.cursor.execute("SELECT MAX(id) FROM sales")
+            result = self.cursor.fetchone()
+            if result and result[0]:
+                return result[0]
+            else:
+                return 0
+        except sqlite3.Error as e:
+            print("Error fetching latest sale ID:", e)
+            return 0
+
+    # User Management methods
+    def register_user(self, username, password=None, password_hash=None):
+        # New accounts are regular users; returns (success, message) for the caller to show.
+        # Callers on the Tk thread hash on a worker first and pass password_hash instead.
+        try:
+            with self.transaction():
+                self.cursor.execute("INSERT INTO users (username, password, role) VALUES (?, ?, ?)",
+                                    (username, password_hash or hash_password(password), "User"))
+            return True, "User registered successfully."
+        except sqlite3.Error as e:
+            return False, f"Error registering user: {e}"
+
+    def get_user(self, username):
+        try:
+            self.cursor.execute("SELECT * FROM users WHERE username=?", (username,))
+            return self.cursor.fetchone()
+        except sqlite3.Error as e:
+            print("Error getting user:", e)
+            return None
+
+    def set_password_hash(self, user_id, password_hash):
+        try:
+            with self.transaction():
+                self.cursor.execute("UPDATE users SET password=? WHERE id=?", (password_hash, user_id))
+        except sqlite3.Error as e:
+            print("Error updating password:", e)
+
+    def login_user(self, username, password):
+        # Blocking check for scripts and benchmarks; the login window uses BackgroundCredentials.
+        # Plaintext or under-cost passwords are re-hashed on a successful login.
+        user = self.get_user(username)
+        matches, new_hash = verify_password(password, user[2] if user else None)
+        if not matches:
+            return None
+        if new_hash:
+            self.set_password_hash(user[0], new_hash)
+        return user
+
+    def close(self):
+        if self.query_stats:
+            self.cursor.close()  # Count the last statement
+            if self.query_stats.export_path:
+                self.query_stats.export()
+        self.conn.close()
+
+# One DatabaseManager per database file per process
+database_managers = {}
+
+def get_database_manager(db_file=DEFAULT_DB_FILE):
+    key = os.path.abspath(db_file)
+    if key not in database_managers:
+        database_managers[key] = DatabaseManager(db_file, query_stats=query_stats_from_environment())
+    return database_managers[key]
@@ -0,0 +1,47 @@
+import argparse
+import csv
+import json
+import time
+from GMS_Database import EXPORT_QUERIES, get_database_manager
+
+FORMATS = ("csv", "jsonl")
+# Rows are written through a large buffer, so the file is written in big chunks
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+def export_table(db_manager, table, path, file_format="csv"):
+    # Stream one table to a CSV or JSON Lines file. Returns (rows written, seconds).
+    if table not in EXPORT_QUERIES:
+        raise ValueError(f"Unknown table: {table}")
+    if file_format not in FORMATS:
+        raise ValueError(f"Unknown export format: {file_format}")
+    start = time.perf_counter()
+    count = 0
+    columns, batches = db_manager.export_rows(table)
+    with open(path, "w", newline="", encoding="utf-8", buffering=WRITE_BUFFER_SIZE) as export_file:
+        if file_format == "csv":
+            writer = csv.writer(export_file)
+            writer.writerow(columns)
+            for rows in batches:
+                writer.writerows(rows)
+                count += len(rows)
+        else:
+            dumps = json.JSONEncoder(ensure_ascii=False).encode
+            for rows in batches:
+                export_file.writelines(dumps(dict(zip(columns, row))) + "\n" for row in rows)
+                count += len(rows)
+    return count, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Export inventory, sales or sale lines to CSV or JSON Lines")
+    parser.add_argument("table", choices=sorted(EXPORT_QUERIES))
+    parser.add_argument("output")
+    parser.add_argument("--format", choices=FORMATS, help="defaults to the output file extension")
+    parser.add_argument("--db", default="grocery_database.db")
+    args = parser.parse_args()
+
+    file_format = args.format or ("jsonl" if args.output.endswith((".jsonl", ".json")) else "csv")
+    count, elapsed = export_table(get_database_manager(args.db), args.table, args.output, file_format)
+    print(f"Exported {count} {args.table} rows to {args.output} in {elapsed:.2f}s ({count / elapsed if elapsed else 0:.0f} rows/s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+import argparse
+import itertools
+import os
+import random
+import sqlite3
+import time
+from datetime import date, timedelta
+from GMS_Credentials import hash_password
+from GMS_Migrations import run_migrations, checkpoint_stock, has_search_index, rebuild_low_stock, rebuild_sales_rollups
+
+BRANDS = ["Nestle", "Coke", "Pantene", "Tide", "Dove", "Colgate", "Heinz", "Kellogg", "Lipton", "Nivea",
+          "Hi-Ho", "Choc-O", "Del Monte", "Alaska", "Purefoods", "Century", "Lucky Me", "Bear Brand"]
+PRODUCTS = ["Milk", "Shampoo", "Soap", "Cereal", "Juice", "Butter", "Cheese", "Bread", "Coffee", "Tea",
+            "Chips", "Hotdog", "Tuna", "Noodles", "Rice", "Sugar", "Vinegar", "Soy Sauce", "Corned Beef", "Biscuits"]
+SIZES = ["100g", "250g", "500g", "1kg", "330ml", "1L", "1.5L", "Pack of 6", "Family Size"]
+
+# Relative sales by weekday (Monday first) and by month (January first)
+WEEKDAY_WEIGHTS = [0.85, 0.8, 0.85, 0.9, 1.1, 1.4, 1.3]
+MONTH_WEIGHTS = [0.9, 0.85, 0.9, 0.95, 1.0, 1.0, 1.0, 1.0, 0.95, 1.0, 1.1, 1.5]
+# Relative sales per hour while the store is open (08:00 to 21:00), with lunch and after-work peaks
+HOUR_WEIGHTS = {8: 0.5, 9: 0.7, 10: 0.9, 11: 1.2, 12: 1.6, 13: 1.3, 14: 0.9, 15: 0.8, 16: 1.0, 17: 1.5, 18: 1.8, 19: 1.4, 20: 0.8}
+# Items per cart from 1 to 20: most baskets are small, a few are weekly shops
+CART_SIZE_WEIGHTS = [1 / size ** 1.3 for size in range(1, 21)]
+QUANTITY_WEIGHTS = [0.6, 0.2, 0.1, 0.05, 0.03, 0.02]
+ZIPF_EXPONENT = 1.07
+BATCH_SIZE = 50000
+
+def cumulative(weights):
+    return list(itertools.accumulate(weights))
+
+def ean13(number):
+    # EAN-13 in the 200-299 range set aside for in-store codes, with its check digit
+    digits = f"200{number:09d}"
+    check = -sum(int(digit) * (3 if position % 2 else 1) for position, digit in enumerate(digits)) % 10
+    return digits + str(check)
+
+def generate_items(cursor, count, rng):
+    # Unique names from brand, product, size and a running number, with log-normal prices
+    def rows():
+        for index in range(count):
+            name = f"{BRANDS[index % len(BRANDS)]} {PRODUCTS[index // len(BRANDS) % len(PRODUCTS)]} {rng.choice(SIZES)} #{index + 1}"
+            yield name, rng.randint(0, 500), round(min(5000.0, rng.lognormvariate(3.5, 0.9)), 2), ean13(index + 1)
+    cursor.executemany("INSERT INTO inventory (name, quantity, price, barcode) VALUES (?, ?, ?, ?)", rows())
+
+def generate_users(cursor, count):
+    # Hashing is deliberately slow, so every generated cashier gets the same hash of "password"
+    password_hash = hash_password("password")
+    cursor.executemany("INSERT OR IGNORE INTO users (username, password, role) VALUES (?, ?, 'User')",
+                       ((f"cashier{index + 1:05d}", password_hash) for index in range(count)))
+
+def sales_per_day(sales, days, start, rng):
+    # Spread the sales over the days by weekday and month weight, with some day-to-day noise,
+    # so the counts sum exactly to sales
+    weights = [WEEKDAY_WEIGHTS[day.weekday()] * MONTH_WEIGHTS[day.month - 1] * rng.uniform(0.9, 1.1)
+               for day in (start + timedelta(days=offset) for offset in range(days))]
+    total = sum(weights)
+    counts = [int(sales * weight / total) for weight in weights]
+    for offset in range(sales - sum(counts)):
+        counts[offset % days] += 1
+    return counts
+
+def generate_sales(cursor, sales, days, start, item_ids, cashiers, rng, progress):
+    # Sales are written in date order, so ids follow created_at as they would in a store.
+    # Item popularity follows a Zipf distribution over a shuffled item order.
+    popularity = list(item_ids)
+    rng.shuffle(popularity)
+    item_weights = cumulative(1 / rank ** ZIPF_EXPONENT for rank in range(1, len(popularity) + 1))
+    cart_weights = cumulative(CART_SIZE_WEIGHTS)
+    quantity_weights = cumulative(QUANTITY_WEIGHTS)
+    hours = list(HOUR_WEIGHTS)
+    hour_weights = cumulative(HOUR_WEIGHTS.values())
+    sale_sizes = range(1, len(CART_SIZE_WEIGHTS) + 1)
+    quantities = range(1, len(QUANTITY_WEIGHTS) + 1)
+
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM sales")
+    sale_id = cursor.fetchone()[0]
+    cursor.execute("SELECT id, name, price FROM inventory")
+    items = {item_id: (name, price) for item_id, name, price in cursor}
+    headers, lines = [], []
+    written = 0
+    started = time.perf_counter()
+
+    def flush():
+        cursor.executemany("INSERT INTO sales (id, created_at, cashier, total_price) VALUES (?, ?, ?, ?)", headers)
+        cursor.executemany("INSERT INTO sale_lines (sale_id, item_id, item_name, qty, unit_price) VALUES (?, ?, ?, ?, ?)", lines)
+        headers.clear()
+        lines.clear()
+
+    for offset, count in enumerate(sales_per_day(sales, days, start, rng)):
+        day = str(start + timedelta(days=offset))
+        times = sorted(zip(rng.choices(hours, cum_weights=hour_weights, k=count),
+                           (rng.randrange(3600) for _ in range(count))))
+        cart_sizes = rng.choices(sale_sizes, cum_weights=cart_weights, k=count)
+        # Draw the whole day's random numbers at once; per-call overhead dominates otherwise
+        line_count = sum(cart_sizes)
+        picks = zip(rng.choices(popularity, cum_weights=item_weights, k=line_count),
+                    rng.choices(quantities, cum_weights=quantity_weights, k=line_count))
+        for (hour, second), cart_size, cashier in zip(times, cart_sizes, rng.choices(cashiers, k=count)):
+            sale_id += 1
+            total_price = 0.0
+            for item_id, quantity in itertools.islice(picks, cart_size):
+                name, price = items[item_id]
+                lines.append((sale_id, item_id, name, quantity, price))
+                total_price += quantity * price
+            headers.append((sale_id, f"{day} {hour:02d}:{second // 60:02d}:{second % 60:02d}", cashier, round(total_price, 2)))
+        written += count
+        if len(headers) >= BATCH_SIZE:
+            flush()
+            progress(f"  {written} sales ({written / (time.perf_counter() - started):.0f}/s)")
+    flush()
+
+def generate_database(db_file, items=10000, users=20, sales=100000, days=365, seed=1, start_day=None, progress=print):
+    # Fill db_file (created and migrated if needed) with synthetic items, cashiers and sales.
+    # Rollups are rebuilt once at the end instead of per sale.
+    rng = random.Random(seed)
+    start = date.fromisoformat(start_day) if start_day else date.today() - timedelta(days=days)
+    conn = sqlite3.connect(db_file)
+    run_migrations(conn)
+    # Nothing to lose if the machine crashes half way, so skip the syncs
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("PRAGMA cache_size=-262144")
+    cursor = conn.cursor()
+    timings = {}
+
+    def step(name, function, *args):
+        progress(f"Generating {name}...")
+        started = time.perf_counter()
+        with conn:
+            function(*args)
+        timings[name] = time.perf_counter() - started
+        progress(f"  done in {timings[name]:.1f}s")
+
+    # The search index is filled in one pass afterwards instead of by a trigger per row
+    cursor.execute("SELECT name, sql FROM sqlite_master WHERE type='trigger' AND tbl_name='inventory'")
+    triggers = cursor.fetchall()
+    for name, sql in triggers:
+        cursor.execute(f"DROP TRIGGER {name}")
+    step("items", generate_items, cursor, items, rng)
+    if has_search_index(cursor):
+        step("search index", cursor.execute, "INSERT INTO inventory_fts(inventory_fts) VALUES('rebuild')")
+    step("low stock", rebuild_low_stock, cursor)
+    # Generated stock has no movements behind it; a checkpoint is where its history starts
+    step("stock checkpoint", checkpoint_stock, cursor)
+    for name, sql in triggers:
+        cursor.execute(sql)
+    step("users", generate_users, cursor, users)
+    cursor.execute("SELECT id FROM inventory")
+    item_ids = [row[0] for row in cursor]
+    cursor.execute("SELECT username FROM users WHERE role='User'")
+    cashiers = [row[0] for row in cursor] or [None]
+    if sales and item_ids:
+        # Loading into unindexed tables and indexing afterwards is several times faster
+        # than updating the indexes row by row
+        cursor.execute("""SELECT name, sql FROM sqlite_master
+                          WHERE type='index' AND tbl_name IN ('sales', 'sale_lines') AND sql IS NOT NULL""")
+        indexes = cursor.fetchall()
+        for name, sql in indexes:
+            cursor.execute(f"DROP INDEX {name}")
+        step("sales", generate_sales, cursor, sales, days, start, item_ids, cashiers, rng, progress)
+        step("indexes", lambda: [cursor.execute(sql) for name, sql in indexes])
+    step("rollups", rebuild_sales_rollups, cursor)
+    conn.execute("PRAGMA optimize")
+    conn.close()
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic grocery database for testing at scale")
+    parser.add_argument("--db", default="synthetic_grocery.db")
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--users", type=int, default=20, help="cashier accounts, all with the password 'password'")
+    parser.add_argument("--sales", type=int, default=100000)
+    parser.add_argument("--days", type=int, default=365, help="days of history the sales are spread over")
+    parser.add_argument("--start", help="first day of sales (YYYY-MM-DD); defaults to --days before today")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    if os.path.exists(args.db):
+        parser.error(f"{args.db} already exists; pick a new file so real data is never mixed with generated data")
+    started = time.perf_counter()
+    generate_database(args.db, args.items, args.users, args.sales, args.days, args.seed, args.start)
+    print(f"Wrote {args.db} in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+import argparse
+import csv
+import os
+import sqlite3
+import time
+from GMS_Database import get_database_manager
+
+# Header names accepted for each column (compared case-insensitively)
+COLUMN_NAMES = {
+    "name": ["name", "item name", "item", "product"],
+    "quantity": ["quantity", "item quantity", "qty", "stock"],
+    "price": ["price", "price/item", "unit price", "price per item"],
+}
+# Columns a price list may leave out
+OPTIONAL_COLUMN_NAMES = {
+    "barcode": ["barcode", "sku", "upc", "ean"],
+    "reorder_level": ["reorder level", "reorder_level", "reorder point", "min stock"],
+}
+BATCH_SIZE = 5000
+
+class ImportResult:
+    def __init__(self):
+        self.imported = 0
+        self.rejected = 0
+        self.elapsed = 0.0
+        self.reject_path = None
+        self.error = None
+
+    @property
+    def rows_per_second(self):
+        return (self.imported + self.rejected) / self.elapsed if self.elapsed else 0.0
+
+    def summary(self):
+        if self.error:
+            return self.error
+        text = f"Imported {self.imported} rows, rejected {self.rejected} in {self.elapsed:.2f}s ({self.rows_per_second:.0f} rows/s)."
+        if self.rejected:
+            text += f"\nRejected rows were written to {self.reject_path}"
+        return text
+
+def find_columns(header):
+    # Map name/quantity/price (and barcode and reorder level, if present) to their positions in the header row
+    lowered = [column.strip().lower() for column in header]
+    positions = {}
+    for column, aliases in list(COLUMN_NAMES.items()) + list(OPTIONAL_COLUMN_NAMES.items()):
+        for alias in aliases:
+            if alias in lowered:
+                positions[column] = lowered.index(alias)
+                break
+        else:
+            if column in COLUMN_NAMES:
+                return None, f"Missing '{column}' column in the CSV header."
+    return positions, None
+
+def parse_row(row, positions):
+    # Returns ((name, quantity, price, barcode, reorder level), None) or (None, reason)
+    try:
+        name = row[positions["name"]].strip()
+        quantity = row[positions["quantity"]].strip()
+        price = row[positions["price"]].strip()
+        barcode = row[positions["barcode"]].strip() if "barcode" in positions else ""
+        reorder_level = row[positions["reorder_level"]].strip() if "reorder_level" in positions else ""
+    except IndexError:
+        return None, "missing fields"
+    if not name:
+        return None, "empty name"
+    try:
+        quantity = int(quantity)
+    except ValueError:
+        return None, f"quantity is not an integer: {quantity!r}"
+    try:
+        price = float(price)
+    except ValueError:
+        return None, f"price is not a number: {price!r}"
+    try:
+        reorder_level = int(reorder_level) if reorder_level else None
+    except ValueError:
+        return None, f"reorder level is not an integer: {reorder_level!r}"
+    if quantity < 0 or price < 0 or (reorder_level or 0) < 0:
+        return None, "negative quantity, price or reorder level"
+    return (name, quantity, price, barcode or None, reorder_level), None
+
+def upsert_batch(db_manager, batch, reject):
+    # Upsert (line number, row, item) entries; returns how many went in. A barcode that
+    # already belongs to another item fails the whole statement, so that batch is retried
+    # row by row and only the rows at fault are rejected.
+    try:
+        with db_manager.transaction():
+            db_manager.upsert_items([item for line_number, row, item in batch])
+        return len(batch)
+    except sqlite3.IntegrityError:
+        imported = 0
+        for line_number, row, item in batch:
+            try:
+                with db_manager.transaction():
+                    db_manager.upsert_items([item])
+                imported += 1
+            except sqlite3.IntegrityError:
+                reject(line_number, row, f"barcode already used by another item: {item[3]}")
+        return imported
+
+def import_inventory_csv(db_manager, csv_path, reject_path=None, batch_size=BATCH_SIZE):
+    # Stream a supplier price list into the inventory. Rows are upserted with executemany
+    # in batches, all inside one transaction; bad rows go to the reject file instead of
+    # stopping the import. Optional barcode/SKU and reorder level columns set those too.
+    result = ImportResult()
+    result.reject_path = reject_path or os.path.splitext(csv_path)[0] + "_rejected.csv"
+    start = time.perf_counter()
+    reject_file = None
+    reject_writer = None
+    try:
+        with open(csv_path, newline="", encoding="utf-8-sig") as csv_file:
+            reader = csv.reader(csv_file)
+            header = next(reader, None)
+            if header is None:
+                result.error = "The CSV file is empty."
+                return result
+            positions, result.error = find_columns(header)
+            if positions is None:
+                return result
+
+            def reject(line_number, row, reason):
+                nonlocal reject_file, reject_writer
+                if reject_writer is None:
+                    reject_file = open(result.reject_path, "w", newline="", encoding="utf-8")
+                    reject_writer = csv.writer(reject_file)
+                    reject_writer.writerow(["line", "error"] + header)
+                reject_writer.writerow([line_number, reason] + row)
+                result.rejected += 1
+
+            with db_manager.unit_of_work():
+                batch = []
+                barcodes = set()
+                for line_number, row in enumerate(reader, start=2):
+                    if not any(field.strip() for field in row):
+                        continue  # Skip blank lines
+                    item, reason = parse_row(row, positions)
+                    if item is not None and item[3] is not None:
+                        if item[3] in barcodes:
+                            item, reason = None, f"barcode repeated in the file: {item[3]}"
+                        else:
+                            barcodes.add(item[3])
+                    if item is None:
+                        reject(line_number, row, reason)
+                        continue
+                    batch.append((line_number, row, item))
+                    if len(batch) >= batch_size:
+                        result.imported += upsert_batch(db_manager, batch, reject)
+                        batch = []
+                if batch:
+                    result.imported += upsert_batch(db_manager, batch, reject)
+    except (OSError, UnicodeDecodeError, csv.Error) as e:
+        result.error = f"Error reading {csv_path}: {e}"
+    finally:
+        if reject_file:
+            reject_file.close()
+        result.elapsed = time.perf_counter() - start
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Import inventory from a CSV with name, quantity and price (and optionally barcode and reorder level) columns")
+    parser.add_argument("csv_file")
+    parser.add_argument("--db", default="grocery_database.db")
+    parser.add_argument("--rejects", help="where to write rows that could not be imported")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    result = import_inventory_csv(get_database_manager(args.db), args.csv_file, args.rejects, args.batch_size)
+    print(result.summary())
+
+if __name__ == "__main__":
+    main()
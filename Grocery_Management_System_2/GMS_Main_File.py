@@ -1,106 +1,18 @@
 import tkinter as tk
-from tkinter import messagebox
-import sqlite3
-
-class DatabaseManager:
-    def __init__(self, db_file):
-        self.conn = sqlite3.connect(db_file)
-        self.cursor = self.conn.cursor()
-        self.create_tables()
-
-    def create_tables(self):
-        # Create tables for store inventory and store database
-        self.cursor.execute("""CREATE TABLE IF NOT EXISTS inventory (
-                                id INTEGER PRIMARY KEY,
-                                name TEXT,
-                                quantity INTEGER,
-                                price REAL
-                            )""")
-
-        self.cursor.execute("""CREATE TABLE IF NOT EXISTS sales (
-                                id INTEGER PRIMARY KEY,
-                                item_id INTEGER,
-                                quantity_sold INTEGER,
-                                FOREIGN KEY (item_id) REFERENCES inventory(id)
-                            )""")
-
-        self.cursor.execute("""CREATE TABLE IF NOT EXISTS users (
-                                id INTEGER PRIMARY KEY,
-                                username TEXT UNIQUE,
-                                password TEXT
-                            )""")
-        self.conn.commit()
-        
-    def search_item(self, item_name):
-        try:
-            self.cursor.execute("SELECT name, price, quantity FROM inventory WHERE name LIKE ?", ('%' + item_name + '%',))
-            return self.cursor.fetchall()
-        except sqlite3.Error as e:
-            print("Error searching item:", e)
-            return []
-
-    # Store Inventory methods
-    def add_item(self, name, quantity, price):
-        try:
-            self.cursor.execute("SELECT id, quantity FROM inventory WHERE name=?", (name,))
-            result = self.cursor.fetchone()
-            if result:
-                current_id, current_quantity = result
-                new_quantity = current_quantity + quantity
-                self.cursor.execute("UPDATE inventory SET quantity=? WHERE id=?", (new_quantity, current_id))
-            else:
-                self.cursor.execute("INSERT INTO inventory (name, quantity, price) VALUES (?, ?, ?)",
-                                    (name, quantity, price))
-            self.conn.commit()
-        except sqlite3.Error as e:
-            print("Error adding item to inventory:", e)
-
-    def view_inventory(self):
-        try:
-            self.cursor.execute("SELECT name, price, quantity FROM inventory")
-            return self.cursor.fetchall()
-        except sqlite3.Error as e:
-            print("Error viewing inventory:", e)
-            return []
-
-    def clear_inventory(self):
-        try:
-            self.cursor.execute("DELETE FROM inventory")
-            self.conn.commit()
-        except sqlite3.Error as e:
-            print("Error clearing inventory:", e)
-
-    def delete_item(self, item_name):
-        try:
-            self.cursor.execute("DELETE FROM inventory WHERE name=?", (item_name,))
-            self.conn.commit()
-        except sqlite3.Error as e:
-            print("Error deleting item:", e)
-
-    def get_item_by_name(self, item_name):
-        try:
-            self.cursor.execute("SELECT * FROM inventory WHERE name=?", (item_name,))
-            return self.cursor.fetchone()
-        except sqlite3.Error as e:
-            print("Error retrieving item:", e)
-
-    def edit_item(self, item_id, new_name, new_quantity, new_price):
-        try:
-            self.cursor.execute("UPDATE inventory SET name=?, quantity=?, price=? WHERE id=?",
-                                (new_name, new_quantity, new_price, item_id))
-            self.conn.commit()
-        except sqlite3.Error as e:
-            print("Error editing item:", e)
-
-    def __del__(self):
-        self.conn.close()
-
+from functools import partial
+from tkinter import filedialog, messagebox
+from GMS_Alerts import LowStockWatcher, describe_low_stock
+from GMS_Database import get_database_manager
+from GMS_Import import import_inventory_csv
+from GMS_Search import BackgroundSearch
+from GMS_UIMonitor import install_from_environment
+from GMS_Widgets import VirtualTable
 
 class GroceryManagementSystem:
-    def __init__(self, master):
+    def __init__(self, master, db_manager=None):
         self.master = master
         self.master.title("Grocery Management System")
-        self.db_manager = DatabaseManager("grocery_database.db")
+        self.db_manager = db_manager or get_database_manager("grocery_database.db")
 
         self.bg_color = "#cabeaf"
         self.button_color = "#b5485d"
@@ -129,11 +41,35 @@ class GroceryManagementSystem:
         self.item_prices_entry.bind("<KeyRelease>", self.search_items)
         
         #Listbox1
-        self.item_prices_listbox = tk.Listbox(self.master, bg=self.bg_color, fg=self.text_color, font=("Arial", 10))
-        self.item_prices_listbox.place(x=580, y=250, width=380, height=200)
+        self.item_prices_table = VirtualTable(self.master, ("Item Name", "Item Price", "Quantity Left"), bg=self.bg_color)
+        self.item_prices_table.place(x=580, y=250, width=380, height=200)
+
+        # Searches are debounced and answered from the shared inventory cache (or a worker thread without it)
+        self.item_prices_search = BackgroundSearch(self.item_prices_entry, self.db_manager.db_file, self.show_item_prices, cache=self.db_manager.inventory_cache)
+
+        self.low_stock_label = tk.Label(self.master, text="Low Stock", bg=self.bg_color, fg=self.text_color, font=("Arial", 12, "bold"))
+        self.low_stock_label.place(x=580, y=465)
+
+        #Listbox2
+        self.low_stock_listbox = tk.Listbox(self.master, bg=self.bg_color, fg=self.text_color, font=("Arial", 10))
+        self.low_stock_listbox.place(x=580, y=490, width=380, height=120)
+
+        # Reads only the trigger-maintained low_stock table, and only after something was committed
+        self.low_stock_watcher = LowStockWatcher(self.low_stock_listbox, self.db_manager, self.show_low_stock)
 
         self.current_window = None
 
+    def show_low_stock(self, rows, new_ids):
+        self.low_stock_listbox.delete(0, tk.END)
+        for index, row in enumerate(rows):
+            self.low_stock_listbox.insert(tk.END, describe_low_stock(row))
+            if row[0] in new_ids:
+                self.low_stock_listbox.itemconfig(index, fg=self.button_color)
+        text = f"Low Stock ({len(rows)})" if rows else "Low Stock"
+        if new_ids:
+            text += f" - {len(new_ids)} new!"
+        self.low_stock_label.config(text=text, fg=self.button_color if new_ids else self.text_color)
+
     def open_inventory_window(self):
         if self.current_window:
             self.current_window.destroy()
@@ -164,62 +100,56 @@ class GroceryManagementSystem:
         # Create search entry and store it as an attribute
         self.search_entry = tk.Entry(inventory_window, bg=self.bg_color, fg=self.text_color, font=("Arial", 10))
         self.search_entry.place(x=50, y=350, width=130)
-        self.search_entry.bind("<KeyRelease>", self.search_items)
+        self.search_entry.bind("<KeyRelease>", self.search_inventory_items)
+        self.inventory_search = BackgroundSearch(self.search_entry, self.db_manager.db_file, self.show_inventory_search, cache=self.db_manager.inventory_cache)
+
+        import_csv_button = tk.Button(inventory_window, text="Import CSV", bg=self.button_color, fg=self.text_color_white, font=("Arial", 10, "bold"), command=self.import_csv)
+        import_csv_button.place(x=50, y=390, width=130, height=40)
         
         # Listbox2
-        self.info_listbox = tk.Listbox(inventory_window, bg=self.bg_color, fg=self.text_color, font=("Arial", 10))
-        self.info_listbox.place(x=280, y=100, width=600, height=400)
+        self.info_table = VirtualTable(inventory_window, ("Item Name", "Item Price", "Quantity Left"), bg=self.bg_color)
+        self.info_table.place(x=280, y=100, width=600, height=400)
 
         self.current_window = inventory_window
 
     def search_items(self, event=None):
+        # Typing shows the best matches; Enter lists every match to scroll through in the table's order
         search_query = self.item_prices_entry.get()
-        self.item_prices_listbox.delete(0, tk.END)  # Clear previous items
-
-        items = self.db_manager.search_item(search_query)
-        if items:
-            self.item_prices_listbox.insert(tk.END, "{:<20} {:<15} {:<15}".format("Item Name", "Item Price", "Quantity Left"))
-            for item in items:
-                item_str = "{:<20} {:<15} {:<15}".format(item[0], item[1], item[2])
-                self.item_prices_listbox.insert(tk.END, item_str)
-
-        # Connect search entry 2 to its respective listbox
-        if self.current_window:  # Check if inventory window is open
-            search_query_2 = self.search_entry.get()
-            if search_query_2:  # Check if the search query is not empty
-                items_2 = self.db_manager.search_item(search_query_2)
-                if items_2:
-                    self.info_listbox.delete(0, tk.END)  # Clear previous items
-                    self.info_listbox.insert(tk.END, "{:<20} {:<15} {:<15}".format("Item Name", "Item Price", "Quantity Left"))
-                    for item in items_2:
-                        item_str = "{:<20} {:<15} {:<15}".format(item[0], item[1], item[2])
-                        self.info_listbox.insert(tk.END, item_str)
-                else:
-                    self.info_listbox.delete(0, tk.END)  # Clear previous items
-                    self.info_listbox.insert(tk.END, "Item not found")
+        if search_query and event is not None and event.keysym == "Return":
+            self.item_prices_search.cancel()
+            self.item_prices_table.show_pages(partial(self.db_manager.inventory_page, search=search_query), "Item not found")
+        elif search_query:
+            self.item_prices_search.search(search_query)
+        else:
+            self.item_prices_search.cancel()
+            self.show_items()
+
+    def search_inventory_items(self, event=None):
+        search_query = self.search_entry.get()
+        if search_query and event is not None and event.keysym == "Return":
+            self.inventory_search.cancel()
+            self.info_table.show_pages(partial(self.db_manager.inventory_page, search=search_query), "Item not found")
+        elif search_query:  # Check if the search query is not empty
+            self.inventory_search.search(search_query)
+
+    def show_item_prices(self, search_query, items):
+        # Called back on the Tk thread with the results of the latest dashboard search
+        self.item_prices_table.show_rows(items)
+
+    def show_inventory_search(self, search_query, items):
+        # Called back on the Tk thread with the results of the latest Store Inventory search
+        self.info_table.show_rows(items, "Item not found")
 
     def show_items(self):
-        # Fetch and display items in the item prices listbox
-        self.item_prices_listbox.delete(0, tk.END)  # Clear previous items
-        
-        inventory_items = self.db_manager.view_inventory()
-        
-        # Add headers
-        self.item_prices_listbox.insert(tk.END, "{:<20} {:<15} {:<15}".format("Item Name", "Item Price", "Quantity Left"))
-        
-        for item in inventory_items:
-            item_name = item[0]
-            item_price = item[1]
-            item_quantity = item[2]
-            # Format each item to align properly in columns
-            item_str = "{:<20} {:<15} {:<15}".format(item_name, item_price, item_quantity)
-            self.item_prices_listbox.insert(tk.END, item_str)
+        # Page through all items in the item prices table, in the order picked above it
+        self.item_prices_table.show_pages(self.db_manager.inventory_page, count_rows=self.db_manager.count_inventory)
 
     def add_items(self):
         def add_new_item_to_database():
             item_name = new_item_name_entry.get()
             item_quantity = new_item_quantity_entry.get()
             item_price = new_item_price_entry.get()
+            item_barcode = new_item_barcode_entry.get().strip()
             
             # Check if any field is empty
             if not item_name or not item_quantity or not item_price:
@@ -233,7 +163,7 @@ class GroceryManagementSystem:
                 messagebox.showerror("Error", "Invalid input! Quantity should be an integer and Price should be a number.")
                 return
         
-            self.db_manager.add_item(item_name, item_quantity, item_price)
+            self.db_manager.add_item(item_name, item_quantity, item_price, item_barcode or None)
             add_window.destroy()
             # Ask if the user wants to add another item
             if messagebox.askyesno("Add Another Item", "Do you want to add another item?"):
@@ -260,8 +190,13 @@ class GroceryManagementSystem:
         new_item_price_entry = tk.Entry(new_item_frame)
         new_item_price_entry.grid(row=2, column=1, padx=10, pady=5)
 
+        new_item_barcode_label = tk.Label(new_item_frame, text="Barcode (optional):")
+        new_item_barcode_label.grid(row=3, column=0, padx=10, pady=5, sticky="e")
+        new_item_barcode_entry = tk.Entry(new_item_frame)
+        new_item_barcode_entry.grid(row=3, column=1, padx=10, pady=5)
+
         add_new_item_button = tk.Button(new_item_frame, text="Add New Item", command=add_new_item_to_database)
-        add_new_item_button.grid(row=3, column=0, columnspan=2, pady=10)
+        add_new_item_button.grid(row=4, column=0, columnspan=2, pady=10)
 
         existing_item_frame = tk.LabelFrame(add_window, text="Add Existing Item")
         existing_item_frame.grid(row=1, column=0, padx=10, pady=5, sticky="ew")
@@ -293,9 +228,9 @@ class GroceryManagementSystem:
 
             item = self.db_manager.get_item_by_name(item_name)
             if item:
-                current_quantity = item[2]
-                new_quantity = current_quantity + item_quantity
-                self.db_manager.edit_item(item[0], item[1], new_quantity, item[3])
+                # add_item adds to the stored quantity in one statement, so restocks from
+                # two terminals at once both count, and journals it as a restock
+                self.db_manager.add_item(item[1], item_quantity, item[3])
                 add_window.destroy()
                 self.view_inventory()
             else:
@@ -349,11 +284,23 @@ class GroceryManagementSystem:
         new_price_entry = tk.Entry(edit_window)
         new_price_entry.grid(row=3, column=1, padx=10, pady=5)
 
+        new_barcode_label = tk.Label(edit_window, text="New Barcode (optional):")
+        new_barcode_label.grid(row=4, column=0, padx=10, pady=5, sticky="e")
+        new_barcode_entry = tk.Entry(edit_window)
+        new_barcode_entry.grid(row=4, column=1, padx=10, pady=5)
+
+        new_reorder_level_label = tk.Label(edit_window, text="Reorder Level (optional):")
+        new_reorder_level_label.grid(row=5, column=0, padx=10, pady=5, sticky="e")
+        new_reorder_level_entry = tk.Entry(edit_window)
+        new_reorder_level_entry.grid(row=5, column=1, padx=10, pady=5)
+
         def update_item_in_database():
             item_name = item_name_entry.get()
             new_name = new_name_entry.get()
             new_quantity = new_quantity_entry.get()
             new_price = new_price_entry.get()
+            new_barcode = new_barcode_entry.get().strip()
+            new_reorder_level = new_reorder_level_entry.get().strip()
 
             # Check if any field is empty
             if not item_name or not new_name or not new_quantity or not new_price:
@@ -363,20 +310,21 @@ class GroceryManagementSystem:
             try:
                 new_quantity = int(new_quantity)
                 new_price = float(new_price)
+                new_reorder_level = int(new_reorder_level) if new_reorder_level else None
             except ValueError:
-                messagebox.showerror("Error", "Invalid input! Quantity should be an integer and Price should be a number.")
+                messagebox.showerror("Error", "Invalid input! Quantity and Reorder Level should be integers and Price should be a number.")
                 return
 
             item = self.db_manager.get_item_by_name(item_name)
             if item:
-                self.db_manager.edit_item(item[0], new_name, new_quantity, new_price)
+                self.db_manager.edit_item(item[0], new_name, new_quantity, new_price, new_barcode or None, new_reorder_level)
                 edit_window.destroy()
                 self.view_inventory()
             else:
                 messagebox.showerror("Item Not Found", "The item does not exist in the database.")
 
         edit_item_button = tk.Button(edit_window, text="Edit Item", command=update_item_in_database)
-        edit_item_button.grid(row=4, column=0, columnspan=2, pady=10)
+        edit_item_button.grid(row=6, column=0, columnspan=2, pady=10)
 
     def confirm_clear_inventory(self):
         response = messagebox.askyesno("Confirm", "Do you want to clear the entire inventory?")
@@ -384,24 +332,25 @@ class GroceryManagementSystem:
             self.db_manager.clear_inventory()
             self.view_inventory()
 
+    def import_csv(self):
+        csv_path = filedialog.askopenfilename(title="Import Inventory", filetypes=[("CSV files", "*.csv"), ("All files", "*.*")])
+        if not csv_path:
+            return
+        result = import_inventory_csv(self.db_manager, csv_path)
+        if result.error:
+            messagebox.showerror("Import Failed", result.summary())
+            return
+        messagebox.showinfo("Import Finished", result.summary())
+        self.view_inventory()
+        self.show_items()
+
     def view_inventory(self):
-        inventory_items = self.db_manager.view_inventory()
-        self.info_listbox.delete(0, tk.END)  # Clear previous items
-
-        if inventory_items:
-            self.info_listbox.insert(tk.END, "{:<20} {:<15} {:<15}".format("Item Name", "Item Price", "Quantity Left"))
-            for item in inventory_items:
-                item_name = item[0]
-                item_price = item[1]
-                item_quantity = item[2]
-                item_str = "{:<20} {:<15} {:<15}".format(item_name, item_price, item_quantity)
-                self.info_listbox.insert(tk.END, item_str)
-        else:
-            self.info_listbox.insert(tk.END, "Inventory is empty")
+        self.info_table.show_pages(self.db_manager.inventory_page, "Inventory is empty", self.db_manager.count_inventory)
 
 
 def main():
     root = tk.Tk()
+    install_from_environment(root)  # Opt-in callback timing, see GMS_UIMonitor
     app = GroceryManagementSystem(root)
     root.state('zoomed')
     root.mainloop()
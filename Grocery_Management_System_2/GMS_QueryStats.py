@@ -0,0 +1,203 @@
+import atexit
+import json
+import os
+import sqlite3
+import time
+import zlib
+from collections import deque
+
+# Query instrumentation for DatabaseManager. It is off unless a QueryStats is passed in
+# (get_database_manager turns it on when GMS_QUERY_STATS names an export file), and when
+# off the data layer uses plain sqlite3 cursors, so there is no cost at all.
+DEFAULT_SLOW_MS = 100
+DEFAULT_EXPORT_INTERVAL = 60
+KEEP_SLOW_QUERIES = 100
+
+# Positions in the per-statement counter lists (lists are cheaper to update than objects)
+COUNT, TOTAL_MS, MAX_MS, ERRORS = range(4)
+
+def normalize(sql):
+    return " ".join(sql.split())
+
+class QueryStats:
+    def __init__(self, export_path=None, slow_ms=DEFAULT_SLOW_MS, export_interval=DEFAULT_EXPORT_INTERVAL, slow_log_path=None):
+        self.export_path = export_path
+        self.slow_ms = slow_ms
+        self.export_interval = export_interval
+        # Slow queries are appended as JSON lines next to the export file unless told otherwise
+        self.slow_log_path = slow_log_path or (os.path.splitext(export_path)[0] + ".slow.jsonl" if export_path else None)
+        self.statements = {}  # SQL text -> [count, total ms, max ms, errors]
+        self.slow_queries = deque(maxlen=KEEP_SLOW_QUERIES)
+        self.started = time.time()
+        self.last_export = time.monotonic()
+        if export_path:
+            atexit.register(self.export)  # The windows never close the database, so export on the way out
+
+    def cursor_factory(self, conn):
+        return InstrumentedCursor(conn, self)
+
+    def entry(self, sql):
+        entry = self.statements.get(sql)
+        if entry is None:
+            entry = self.statements[sql] = [0, 0.0, 0.0, 0]
+        return entry
+
+    def log_slow(self, conn, sql, parameters, elapsed_ms):
+        plan = None
+        if parameters is not None:
+            try:
+                plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, parameters)]
+            except sqlite3.Error as e:
+                plan = [f"EXPLAIN failed: {e}"]
+        slow_query = {
+            "at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "ms": round(elapsed_ms, 3),
+            "sql": normalize(sql),
+            "parameters": [repr(value) for value in parameters] if parameters is not None else None,
+            "plan": plan,
+        }
+        self.slow_queries.append(slow_query)
+        if self.slow_log_path:
+            try:
+                with open(self.slow_log_path, "a", encoding="utf-8") as slow_log:
+                    slow_log.write(json.dumps(slow_query) + "\n")
+            except OSError as e:
+                print("Error writing slow query log:", e)
+
+    def maybe_export(self):
+        if self.export_path and time.monotonic() - self.last_export >= self.export_interval:
+            self.export()
+
+    def snapshot(self):
+        # Statements sorted by total time, slowest first
+        rows = [{"sql": normalize(sql), "count": count, "total_ms": round(total, 3), "max_ms": round(maximum, 3),
+                 "avg_ms": round(total / count, 3) if count else 0.0, "errors": errors}
+                for sql, (count, total, maximum, errors) in self.statements.items()]
+        rows.sort(key=lambda row: row["total_ms"], reverse=True)
+        return rows
+
+    def export(self, path=None):
+        # JSON for a .json path, otherwise the Prometheus text format, which node_exporter's
+        # textfile collector can pick up. Written to a temporary file and renamed, so a
+        # scraper never reads half a file.
+        path = path or self.export_path
+        self.last_export = time.monotonic()
+        rows = self.snapshot()
+        if path.endswith(".json"):
+            text = json.dumps({"started": self.started, "exported": time.time(), "statements": rows,
+                               "slow_queries": list(self.slow_queries)}, indent=2)
+        else:
+            lines = []
+            for metric, key, kind, help_text in (("gms_query_count", "count", "counter", "Statements executed"),
+                                                 ("gms_query_seconds_total", "total_ms", "counter", "Time spent in statements"),
+                                                 ("gms_query_max_seconds", "max_ms", "gauge", "Slowest single run"),
+                                                 ("gms_query_errors", "errors", "counter", "Statements that raised an error")):
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} {kind}")
+                for row in rows:
+                    value = round(row[key] / 1000, 6) if key.endswith("_ms") else row[key]
+                    # Labels are cut short, so the id keeps statements with the same start apart
+                    label = row["sql"][:200].replace("\\", "\\\\").replace('"', '\\"')
+                    statement_id = format(zlib.crc32(row["sql"].encode("utf-8")), "08x")
+                    lines.append(f'{metric}{{id="{statement_id}",statement="{label}"}} {value}')
+            text = "\n".join(lines) + "\n"
+        try:
+            with open(path + ".tmp", "w", encoding="utf-8") as export_file:
+                export_file.write(text)
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            print("Error exporting query stats:", e)
+
+def query_stats_from_environment():
+    # GMS_QUERY_STATS=<file> turns instrumentation on; GMS_SLOW_QUERY_MS and
+    # GMS_QUERY_STATS_INTERVAL (seconds) tune the slow-query threshold and export interval
+    export_path = os.environ.get("GMS_QUERY_STATS")
+    if not export_path:
+        return None
+    return QueryStats(export_path,
+                      float(os.environ.get("GMS_SLOW_QUERY_MS", DEFAULT_SLOW_MS)),
+                      float(os.environ.get("GMS_QUERY_STATS_INTERVAL", DEFAULT_EXPORT_INTERVAL)))
+
+class InstrumentedCursor(sqlite3.Cursor):
+    # A statement's time is its execute() plus every fetch until its rows run out or the
+    # cursor runs the next statement; that is when max time and the slow log are checked.
+    def __init__(self, conn, stats):
+        super().__init__(conn)
+        self.stats = stats
+        self.run = None  # [counters, sql, parameters, milliseconds so far]
+
+    def finish(self):
+        run, self.run = self.run, None
+        if run is not None:
+            entry, sql, parameters, elapsed_ms = run
+            if elapsed_ms > entry[MAX_MS]:
+                entry[MAX_MS] = elapsed_ms
+            if elapsed_ms >= self.stats.slow_ms:
+                self.stats.log_slow(self.connection, sql, parameters, elapsed_ms)
+            self.stats.maybe_export()
+
+    def timed(self, method, sql, parameters, *args):
+        self.finish()
+        entry = self.stats.entry(sql)
+        entry[COUNT] += 1
+        start = time.perf_counter()
+        try:
+            result = method(self, *args)
+        except sqlite3.Error:
+            entry[ERRORS] += 1
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            entry[TOTAL_MS] += elapsed_ms
+            self.run = [entry, sql, parameters, elapsed_ms]
+        return result
+
+    def add_fetch_time(self, start, done):
+        if self.run is not None:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.run[0][TOTAL_MS] += elapsed_ms
+            self.run[3] += elapsed_ms
+            if done:
+                self.finish()
+
+    def execute(self, sql, parameters=()):
+        return self.timed(sqlite3.Cursor.execute, sql, parameters, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        # The parameters may be a generator, so there is nothing to EXPLAIN with
+        return self.timed(sqlite3.Cursor.executemany, sql, None, sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.timed(sqlite3.Cursor.executescript, sql_script, None, sql_script)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self.add_fetch_time(start, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self.add_fetch_time(start, not rows)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self.add_fetch_time(start, True)
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self.add_fetch_time(start, True)
+            raise
+        self.add_fetch_time(start, False)
+        return row
+
+    def close(self):
+        self.finish()
+        super().close()
@@ -0,0 +1,76 @@
+import argparse
+from datetime import date, timedelta
+from GMS_Database import get_database_manager
+
+# Command line access to the sales rollups and the stock journal:
+#   python GMS_Reports.py rebuild
+#   python GMS_Reports.py report --from 2024-01-01 --to 2024-01-31 --by item
+#   python GMS_Reports.py checkpoint          (the data layer also takes them as the journal grows)
+#   python GMS_Reports.py stock --at "2024-01-31 21:00:00" [--item "Milk 1L"]
+
+def rebuild(db_manager, args):
+    if db_manager.rebuild_sales_rollups():
+        print("Sales rollups rebuilt.")
+
+def report(db_manager, args):
+    rows = db_manager.sales_report(args.start, args.end, args.by)
+    if args.by == "day":
+        print("{:<12} {:>10} {:>10} {:>14}".format("Day", "Sales", "Units", "Revenue"))
+        for day, sales_count, units, revenue in rows:
+            print("{:<12} {:>10} {:>10} {:>14.2f}".format(day, sales_count, units, revenue))
+    elif args.by == "item":
+        print("{:<8} {:<30} {:>10} {:>14}".format("Item ID", "Item Name", "Units", "Revenue"))
+        for item_id, name, units, revenue in rows:
+            print("{:<8} {:<30} {:>10} {:>14.2f}".format(item_id, name or "(unknown item)", units, revenue))
+    else:
+        print("{:<20} {:>10} {:>10} {:>14}".format("Cashier", "Sales", "Units", "Revenue"))
+        for cashier, sales_count, units, revenue in rows:
+            print("{:<20} {:>10} {:>10} {:>14.2f}".format(cashier or "(unknown)", sales_count, units, revenue))
+
+def checkpoint(db_manager, args):
+    checkpoint_id = db_manager.checkpoint_stock()
+    if checkpoint_id is not None:
+        print(f"Stock checkpoint {checkpoint_id} taken.")
+
+def stock(db_manager, args):
+    if args.item:
+        item = db_manager.get_item_by_name(args.item)
+        if item is None:
+            print(f"No item named {args.item!r}.")
+            return
+        quantity = db_manager.stock_at(args.at, item[0])
+        if quantity is None:
+            print(f"No stock history as early as {args.at}.")
+        else:
+            print(f"{item[1]}: {quantity} in stock at {args.at}")
+        return
+    stock_levels = db_manager.stock_at(args.at)
+    if stock_levels is None:
+        print(f"No stock history as early as {args.at}.")
+        return
+    columns, batches = db_manager.export_rows("inventory")
+    names = {row[0]: row[1] for rows in batches for row in rows}
+    print("{:<8} {:<30} {:>10}".format("Item ID", "Item Name", "Quantity"))
+    for item_id, quantity in sorted(stock_levels.items()):
+        print("{:<8} {:<30} {:>10}".format(item_id, names.get(item_id, "(deleted item)"), quantity))
+
+def main():
+    parser = argparse.ArgumentParser(description="Sales rollup maintenance and reports")
+    parser.add_argument("--db", default="grocery_database.db")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("rebuild", help="recompute the rollup tables from the sales history").set_defaults(run=rebuild)
+    report_parser = commands.add_parser("report", help="revenue and units for a date range")
+    report_parser.add_argument("--from", dest="start", default=str(date.today() - timedelta(days=6)))
+    report_parser.add_argument("--to", dest="end", default=str(date.today()))
+    report_parser.add_argument("--by", choices=["day", "item", "cashier"], default="day")
+    report_parser.set_defaults(run=report)
+    commands.add_parser("checkpoint", help="snapshot every item's stock for point-in-time lookups").set_defaults(run=checkpoint)
+    stock_parser = commands.add_parser("stock", help="stock levels as they were at a given time")
+    stock_parser.add_argument("--at", required=True, help='"YYYY-MM-DD HH:MM:SS"')
+    stock_parser.add_argument("--item", help="one item's name instead of every item")
+    stock_parser.set_defaults(run=stock)
+    args = parser.parse_args()
+    args.run(get_database_manager(args.db), args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+import sqlite3
+import threading
+import time
+from collections import deque
+from GMS_Migrations import INVENTORY_SEARCH_INDEX, has_search_index
+
+# Most rows a search returns; the search boxes only need the best matches
+SEARCH_LIMIT = 100
+# The trigram index can only match terms of at least three characters
+MIN_TRIGRAM_LENGTH = 3
+# Substring candidates fetched per result slot before ranking
+CANDIDATE_FACTOR = 4
+# Orders a listing can be paged in. Name and price pages are index seeks; quantity changes
+# with every sale and has no index, so a quantity page is one scan keeping the top rows.
+SORT_COLUMNS = {"name": "name COLLATE NOCASE", "price": "price", "quantity": "quantity"}
+PAGE_SIZE = 100
+
+def escape_like(term):
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def match_phrase(term):
+    # The term as one quoted FTS phrase, so its punctuation isn't read as query syntax
+    return '"' + term.replace('"', '""') + '"'
+
+def inventory_page(cursor, sort="name", descending=False, page_size=PAGE_SIZE, after=None, term=None, use_index=True):
+    # One page of (name, price, quantity) rows in sort order, optionally only names
+    # containing term, and the cursor to pass as after for the next page (None after the
+    # last). Pages continue from the (value, id) of the last row instead of an OFFSET, so
+    # page 5000 costs the same as page 1.
+    if sort not in SORT_COLUMNS:
+        raise ValueError(f"Unknown sort key: {sort}")
+    column = SORT_COLUMNS[sort]
+    direction, comparison = ("DESC", "<") if descending else ("ASC", ">")
+    conditions = []
+    params = []
+    if after is not None:
+        if sort == "name":
+            # Names are unique, so the name alone says where the page ends
+            conditions.append(f"name {comparison} ? COLLATE NOCASE")
+            params.append(after[0])
+        else:
+            conditions.append(f"({column}, id) {comparison} (?, ?)")
+            params.extend(after)
+    if term:
+        if use_index and len(term) >= MIN_TRIGRAM_LENGTH:
+            conditions.append(f"id IN (SELECT rowid FROM {INVENTORY_SEARCH_INDEX} WHERE {INVENTORY_SEARCH_INDEX} MATCH ?)")
+            params.append(match_phrase(term))
+        else:
+            # As with search_inventory, terms too short for the index only match prefixes
+            conditions.append("name LIKE ? ESCAPE '\\'")
+            params.append(("" if use_index else "%") + escape_like(term) + "%")
+    where = "WHERE " + " AND ".join(conditions) if conditions else ""
+    order = f"{column} {direction}" if sort == "name" else f"{column} {direction}, id {direction}"
+    cursor.execute(f"SELECT id, name, price, quantity FROM inventory {where} ORDER BY {order} LIMIT ?", params + [page_size])
+    rows = cursor.fetchall()
+    next_after = None
+    if len(rows) == page_size:
+        last = rows[-1]
+        next_after = (last[1] if sort == "name" else last[2] if sort == "price" else last[3], last[0])
+    return [row[1:] for row in rows], next_after
+
+def search_inventory(cursor, term, limit=SEARCH_LIMIT, use_index=True):
+    # Returns up to `limit` (name, price, quantity) rows: names starting with the
+    # term first, in name order, then names containing it, best match first
+    cursor.execute("""SELECT id, name, price, quantity FROM inventory
+                      WHERE name LIKE ? ESCAPE '\\'
+                      ORDER BY name COLLATE NOCASE LIMIT ?""", (escape_like(term) + "%", limit))
+    prefix_rows = cursor.fetchall()
+    results = [row[1:] for row in prefix_rows]
+    if len(results) >= limit or not term:
+        return results
+    # One or two characters are too short for the trigram index, and a substring
+    # scan for them would read every row, so they only match name prefixes
+    if use_index and len(term) < MIN_TRIGRAM_LENGTH:
+        return results
+
+    seen = {row[0] for row in prefix_rows}
+    if use_index:
+        cursor.execute(f"""SELECT i.id, i.name, i.price, i.quantity FROM {INVENTORY_SEARCH_INDEX} f
+                           JOIN inventory i ON i.id = f.rowid
+                           WHERE {INVENTORY_SEARCH_INDEX} MATCH ? LIMIT ?""",
+                       (match_phrase(term), limit * CANDIDATE_FACTOR))
+    else:
+        cursor.execute("""SELECT id, name, price, quantity FROM inventory
+                          WHERE name LIKE ? ESCAPE '\\' LIMIT ?""",
+                       ("%" + escape_like(term) + "%", limit * CANDIDATE_FACTOR))
+    candidates = [row for row in cursor.fetchall() if row[0] not in seen]
+
+    # Earlier and tighter matches rank higher
+    lowered = term.lower()
+    candidates.sort(key=lambda row: (row[1].lower().find(lowered), len(row[1]), row[1]))
+    results.extend(row[1:] for row in candidates[:limit - len(results)])
+    return results
+
+class BackgroundSearch:
+    # Runs inventory searches for a Tk search box on a worker thread.
+    # Keystrokes are debounced with after(), a newer query interrupts the one in
+    # flight, and only the result of the latest query is handed back to Tk.
+    # Given a GMS_Cache.InventoryCache, debounced queries are answered from memory
+    # on the Tk thread instead and no worker is started. Given search(term, limit),
+    # e.g. a GMS_Service.ServiceClient's search_item, the worker calls that instead of SQLite.
+    def __init__(self, widget, db_file, on_results, delay=150, poll_interval=15, limit=SEARCH_LIMIT, keep_timings=200,
+                 cache=None, search=None):
+        self.widget = widget
+        self.db_file = db_file
+        self.cache = cache
+        self.search_function = search
+        self.on_results = on_results
+        self.delay = delay
+        self.poll_interval = poll_interval
+        self.limit = limit
+
+        self.pending_after = None
+        self.polling = False
+        self.lock = threading.Condition()
+        self.generation = 0  # Bumped for every submitted query; older ones are stale
+        self.request = None
+        self.running = None
+        self.result = None
+        self.closed = False
+        self.conn = None
+
+        # Counters for how the pipeline behaves under typing bursts
+        self.submitted = 0
+        self.debounced = 0
+        self.cancelled = 0
+        self.completed = 0
+        self.timings = deque(maxlen=keep_timings)  # (term, milliseconds) of finished queries
+
+        self.thread = None
+        if cache is None:
+            self.thread = threading.Thread(target=self.worker, name="inventory-search", daemon=True)
+            self.thread.start()
+        self.widget.bind("<Destroy>", lambda event: self.close(), add="+")
+
+    def search(self, term):
+        # Call on every keystroke; the query only starts once typing pauses
+        if self.pending_after is not None:
+            self.widget.after_cancel(self.pending_after)
+            self.debounced += 1
+        self.pending_after = self.widget.after(self.delay, self.submit, term)
+
+    def submit(self, term):
+        self.pending_after = None
+        if self.cache is not None:
+            self.search_cache(term)
+            return
+        with self.lock:
+            self.generation += 1
+            self.submitted += 1
+            if self.request is not None:
+                self.cancelled += 1  # Queued but never started
+            self.request = (self.generation, term)
+            if self.running is not None and self.conn is not None:
+                self.conn.interrupt()  # Abort the out-of-date query in flight
+            self.lock.notify()
+        if not self.polling:
+            self.polling = True
+            self.widget.after(self.poll_interval, self.poll)
+
+    def cancel(self):
+        # Drop whatever is pending or running, e.g. when the caller shows something else instead
+        if self.pending_after is not None:
+            self.widget.after_cancel(self.pending_after)
+            self.pending_after = None
+        with self.lock:
+            self.generation += 1
+            if self.request is not None:
+                self.request = None
+                self.cancelled += 1
+            if self.running is not None and self.conn is not None:
+                self.conn.interrupt()
+
+    def poll(self):
+        with self.lock:
+            result, self.result = self.result, None
+            waiting = self.request is not None or self.running is not None
+        if result is not None and not self.closed:
+            generation, term, rows = result
+            if generation == self.generation:
+                self.on_results(term, rows)
+        if waiting and not self.closed:
+            self.widget.after(self.poll_interval, self.poll)
+        else:
+            self.polling = False
+
+    def search_cache(self, term):
+        start = time.perf_counter()
+        try:
+            rows = self.cache.search(term, self.limit)
+        except sqlite3.Error as e:
+            print("Error searching inventory:", e)
+            return
+        with self.lock:
+            self.generation += 1
+            self.submitted += 1
+            self.completed += 1
+            self.timings.append((term, (time.perf_counter() - start) * 1000))
+        if not self.closed:
+            self.on_results(term, rows)
+
+    def worker(self):
+        if self.search_function is None:
+            self.conn = sqlite3.connect(self.db_file, timeout=10)
+            cursor = self.conn.cursor()
+            use_index = has_search_index(cursor)
+        while True:
+            with self.lock:
+                while self.request is None and not self.closed:
+                    self.lock.wait()
+                if self.closed:
+                    break
+                generation, term = self.running = self.request
+                self.request = None
+
+            start = time.perf_counter()
+            try:
+                if self.search_function is not None:
+                    rows = self.search_function(term, self.limit)
+                else:
+                    rows = search_inventory(cursor, term, self.limit, use_index)
+            except sqlite3.Error as e:
+                rows = None
+                if "interrupted" not in str(e):
+                    print("Error searching inventory:", e)
+                    rows = []  # Show no matches rather than leave the previous term's results up
+            except Exception as e:
+                # Whatever went wrong, this thread keeps serving and running is cleared below,
+                # otherwise poll() would wait for a result forever
+                print("Error searching inventory:", e)
+                rows = []
+            elapsed = (time.perf_counter() - start) * 1000
+
+            with self.lock:
+                self.running = None
+                if rows is None or generation != self.generation:
+                    self.cancelled += 1
+                else:
+                    self.completed += 1
+                    self.timings.append((term, elapsed))
+                    self.result = (generation, term, rows)
+        if self.conn is not None:
+            self.conn.close()
+
+    def stats(self):
+        with self.lock:
+            timings = [elapsed for term, elapsed in self.timings]
+            return {
+                "submitted": self.submitted,
+                "debounced": self.debounced,
+                "cancelled": self.cancelled,
+                "completed": self.completed,
+                "last_ms": timings[-1] if timings else None,
+                "max_ms": max(timings) if timings else None,
+                "timings": list(self.timings),
+            }
+
+    def close(self):
+        if self.pending_after is not None:
+            self.widget.after_cancel(self.pending_after)
+            self.pending_after = None
+        with self.lock:
+            self.closed = True
+            self.lock.notify()
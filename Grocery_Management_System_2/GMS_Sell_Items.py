@@ -1,123 +1,24 @@
+import sys
 import tkinter as tk
-from tkinter import ttk, messagebox
-import sqlite3
-
-class DatabaseManager:
-    def __init__(self, db_file):
-        self.conn = sqlite3.connect(db_file)
-        self.cursor = self.conn.cursor()
-        self.create_tables()
-
-    def create_tables(self):
-        try:
-            # Create tables for store inventory and sales
-            self.cursor.execute("""CREATE TABLE IF NOT EXISTS inventory (
-                                    id INTEGER PRIMARY KEY,
-                                    name TEXT,
-                                    quantity INTEGER,
-                                    price REAL
-                                )""")
-
-            self.cursor.execute("""CREATE TABLE IF NOT EXISTS sales (
-                                    id INTEGER PRIMARY KEY,
-                                    items_bought TEXT,
-                                    total_price REAL
-                                )""")
-            self.conn.commit()
-
-            # Print schema of the sales table
-            self.cursor.execute("PRAGMA table_info(sales)")
-            print(self.cursor.fetchall())  # Print the schema of the sales table
-        except sqlite3.Error as e:
-            print("Error creating tables:", e)
-
-    # Store Inventory methods
-    def add_item(self, name, quantity, price):
-        try:
-            self.cursor.execute("INSERT INTO inventory (name, quantity, price) VALUES (?, ?, ?)",
-                                (name, quantity, price))
-            self.conn.commit()
-        except sqlite3.Error as e:
-            print("Error adding item to inventory:", e)
-
-    def sell_item(self, item_name, quantity_sold):
-        try:
-            item = self.get_item_by_name(item_name)
-            if item:
-                item_id = item[0]
-                current_quantity = item[2]
-                if current_quantity >= quantity_sold:
-                    new_quantity = current_quantity - quantity_sold
-                    self.cursor.execute("UPDATE inventory SET quantity=? WHERE id=?", (new_quantity, item_id))
-                    self.conn.commit()
-                    return True, item[3], new_quantity  # Return True, item price, and new quantity
-                else:
-                    return False, f"Sorry! Only {current_quantity} items left!", None
-            else:
-                return False, "Sorry, out of stock", None
-        except sqlite3.Error as e:
-            print("Error selling item:", e)
-            return False, "An error occurred", None
-
-    def get_item_by_name(self, item_name):
-        try:
-            self.cursor.execute("SELECT * FROM inventory WHERE name=?", (item_name,))
-            return self.cursor.fetchone()
-        except sqlite3.Error as e:
-            print("Error getting item by name:", e)
-            return None
-
-    def search_item_by_name(self, item_name):
-        try:
-            self.cursor.execute("SELECT name, price, quantity FROM inventory WHERE name LIKE ?", ('%' + item_name + '%',))
-            return self.cursor.fetchall()
-        except sqlite3.Error as e:
-            print("Error searching item by name:", e)
-            return []
-
-    def save_sale(self, items_bought, total_price):
-        try:
-            self.cursor.execute("INSERT INTO sales (items_bought, total_price) VALUES (?, ?)", (items_bought, total_price))
-            self.conn.commit()
-        except sqlite3.Error as e:
-            print("Error saving sale:", e)
-
-    def view_inventory(self):
-        try:
-            self.cursor.execute("SELECT name, price, quantity FROM inventory")
-            return self.cursor.fetchall()
-        except sqlite3.Error as e:
-            print("Error viewing inventory:", e)
-            return []
-
-    def get_latest_sale_id(self):
-        try:
-            self.cursor.execute("SELECT MAX(id) FROM sales")
-            result = self.cursor.fetchone()
-            if result and result[0]:
-                return result[0]
-            else:
-                return 0
-        except sqlite3.Error as e:
-            print("Error fetching latest sale ID:", e)
-            return 0
-
-    def __del__(self):
-        self.conn.close()
+from functools import partial
+from tkinter import messagebox
+from GMS_Cart import Cart, format_cents, to_cents
+from GMS_Database import get_database_manager
+from GMS_Search import BackgroundSearch
+from GMS_Service import ServiceClient, service_client_from_environment
+from GMS_UIMonitor import install_from_environment
+from GMS_Widgets import VirtualTable
 
 #------------------------------------------------------------Main Window----------------------------------------------------
 class SellItemApp:
-    def __init__(self, master, db_manager):
+    # db_manager is a DatabaseManager, or a GMS_Service.ServiceClient when the terminal
+    # checks out through a shared service instead of opening the database file itself
+    def __init__(self, master, db_manager, cashier=None):
         self.master = master
         self.master.title("Sell Items")
         self.master.configure(bg="#cabeaf")
         self.db_manager = db_manager
-
-        # Fetch the latest sale ID from the database
-        self.latest_sale_id = self.db_manager.get_latest_sale_id()
-
-        # Initialize total price variable
-        self.total_price = 0
+        self.cashier = cashier  # Username recorded on every sale
 
         # Title label
         self.title_label = tk.Label(self.master, text="Sell Items", bg="#cabeaf", fg="black", font=("Arial", 20, "bold"))
@@ -135,27 +36,33 @@ class SellItemApp:
         self.search_entry = tk.Entry(self.master, font=("Arial", 12))
         self.search_entry.pack(pady=10)
         self.search_entry.bind("<KeyRelease>", self.search_inventory)
+        self.background_search = self.start_search(self.search_entry, self.show_search_results)
+
+        # One page of the inventory at a time, in the order picked above the table
+        self.receipt_table = VirtualTable(self.master, ("Item Name", "Item Price", "Quantity"), bg="#cabeaf")
+        self.receipt_table.pack(pady=20, padx=10, fill=tk.BOTH, expand=True)
 
-        self.receipt_treeview = ttk.Treeview(self.master, columns=("Item Name", "Item Price", "Quantity"), show="headings")
-        self.receipt_treeview.heading("Item Name", text="Item Name")
-        self.receipt_treeview.heading("Item Price", text="Item Price")
-        self.receipt_treeview.heading("Quantity", text="Quantity")
-        self.receipt_treeview.pack(pady=20, padx=10, fill=tk.BOTH, expand=True)
+    def start_search(self, entry, on_results):
+        # Searches are debounced and answered from the shared inventory cache, or on a
+        # worker thread when there is no cache or the data is behind the service
+        if isinstance(self.db_manager, ServiceClient):
+            return BackgroundSearch(entry, None, on_results, search=self.db_manager.search_item)
+        return BackgroundSearch(entry, self.db_manager.db_file, on_results, cache=self.db_manager.inventory_cache)
 
     def search_inventory(self, event):
+        # Typing shows the best matches; Enter lists every match to scroll through in the table's order
         search_term = self.search_entry.get()
-        if search_term:
-            results = self.db_manager.search_item_by_name(search_term)
+        if search_term and event.keysym == "Return":
+            self.background_search.cancel()
+            self.receipt_table.show_pages(partial(self.db_manager.inventory_page, search=search_term), "Item not found")
+        elif search_term:
+            self.background_search.search(search_term)
         else:
-            results = self.db_manager.view_inventory()
+            self.background_search.cancel()
+            self.show_stock()
 
-        self.receipt_treeview.delete(*self.receipt_treeview.get_children())  # Clear previous items
-
-        for item in results:
-            item_name = item[0]
-            item_price = item[1]
-            item_quantity = item[2]
-            self.receipt_treeview.insert("", tk.END, values=(item_name, item_price, item_quantity))
+    def show_search_results(self, search_term, results):
+        self.receipt_table.show_rows(results)
 
     #------------------------------------------------------------Sell Item Window----------------------------------------------------
     def sell_item_window(self):
@@ -164,13 +71,37 @@ class SellItemApp:
         sell_window.geometry("900x600")
         sell_window.configure(bg="#cabeaf")
 
-        # Calculate the next sale ID
-        self.latest_sale_id += 1
+        # The sale is saved under the ID shown here, reserved for this terminal alone
+        sale_id = self.db_manager.next_sale_id()
 
         # Item ID label
-        item_id_label = tk.Label(sell_window, text=f"ID: {self.latest_sale_id}", bg="#cabeaf", fg="black", font=("Arial", 12))
+        item_id_label = tk.Label(sell_window, text=f"ID: {sale_id}", bg="#cabeaf", fg="black", font=("Arial", 12))
         item_id_label.pack(pady=10)
 
+        # Barcode entry. A scanner types the code as a burst of keystrokes and then Enter, so
+        # only <Return> does any work, and problems show in a label: a dialog would swallow the next scans.
+        scan_label = tk.Label(sell_window, text="Scan Barcode:", bg="#cabeaf", fg="black", font=("Arial", 12))
+        scan_label.pack(pady=5)
+        scan_entry = tk.Entry(sell_window, font=("Arial", 12))
+        scan_entry.pack(pady=5)
+        scan_entry.focus_set()
+        scan_status_label = tk.Label(sell_window, text="", bg="#cabeaf", fg="black", font=("Arial", 10))
+        scan_status_label.pack()
+
+        def scan(event):
+            barcode = scan_entry.get().strip()
+            scan_entry.delete(0, tk.END)
+            if not barcode:
+                return
+            item = self.db_manager.get_item_by_barcode(barcode)
+            if not item:
+                scan_status_label.config(text=f"Unknown barcode: {barcode}", fg="#b5485d")
+                return
+            error = add_to_cart(item, 1)
+            scan_status_label.config(text=error or f"Added {item[1]}", fg="#b5485d" if error else "black")
+
+        scan_entry.bind("<Return>", scan)
+
         # Item Name entry
         item_name_label = tk.Label(sell_window, text="Item Name:", bg="#cabeaf", fg="black", font=("Arial", 12))
         item_name_label.pack(pady=5)
@@ -197,29 +128,25 @@ class SellItemApp:
             search_entry = tk.Entry(stocks_window, font=("Arial", 12))
             search_entry.pack(pady=10)
 
-            # Create Treeview for tabular display
-            tree = ttk.Treeview(stocks_window, columns=("Item Name", "Item Price", "Quantity Left"), show="headings")
-            tree.heading("Item Name", text="Item Name")
-            tree.heading("Item Price", text="Item Price")
-            tree.heading("Quantity Left", text="Quantity Left")
-            tree.pack(pady=20, padx=10, fill=tk.BOTH, expand=True)
+            # Paged table for tabular display
+            table = VirtualTable(stocks_window, ("Item Name", "Item Price", "Quantity Left"), bg="#cabeaf")
+            table.pack(pady=20, padx=10, fill=tk.BOTH, expand=True)
+
+            def show_results(search_term, results):
+                table.show_rows(results)
+
+            background_search = self.start_search(search_entry, show_results)
 
             def search_inventory(event):
                 search_term = search_entry.get()
-                if search_term:
-                    results = self.db_manager.search_item_by_name(search_term)
+                if search_term and event is not None and event.keysym == "Return":
+                    background_search.cancel()
+                    table.show_pages(partial(self.db_manager.inventory_page, search=search_term), "Item not found")
+                elif search_term:
+                    background_search.search(search_term)
                 else:
-                    results = self.db_manager.view_inventory()
-
-                # Clear previous items in the tree
-                for item in tree.get_children():
-                    tree.delete(item)
-
-                for item in results:
-                    item_name = item[0]
-                    item_price = item[1]
-                    item_quantity = item[2]
-                    tree.insert("", tk.END, values=(item_name, item_price, item_quantity))
+                    background_search.cancel()
+                    table.show_pages(self.db_manager.inventory_page, count_rows=self.db_manager.count_inventory)
 
             search_entry.bind("<KeyRelease>", search_inventory)
 
@@ -233,39 +160,69 @@ class SellItemApp:
         self.checkout_result_listbox = tk.Listbox(sell_window, bg="#cabeaf", fg="black", font=("Arial", 12))
         self.checkout_result_listbox.pack(pady=20, padx=10, fill=tk.BOTH, expand=True)
 
+        # Running total of the cart
+        total_label = tk.Label(sell_window, text="Total: 0.00", bg="#cabeaf", fg="black", font=("Arial", 12, "bold"))
+        total_label.pack(pady=5)
+
+        # The sale being rung up, one listbox row per line; stock is only taken when the cart is billed out
+        cart = Cart()
+
+        def add_to_cart(item, item_quantity):
+            # Add an (id, name, quantity, price) item; returns an error message or None
+            line, index = cart.add(item, item_quantity)
+            if line is None:
+                return index
+            message = f"Item Name: {line.name:<20} Price per Item: {format_cents(line.unit_cents):<15} Quantity: {line.quantity:<15} Total Price: {format_cents(line.total_cents):<15} Item Left: {item[2] - line.quantity:<10}"
+            if index < self.checkout_result_listbox.size():
+                self.checkout_result_listbox.delete(index)
+            self.checkout_result_listbox.insert(index, message)
+            total_label.config(text=f"Total: {format_cents(cart.total_cents)}")
+            return None
+
         def checkout():
             item_name = item_name_entry.get()
-            item_quantity = int(item_quantity_entry.get())
-
-            # Fetch item price and remaining quantity after selling
-            success, item_price, remaining_quantity = self.db_manager.sell_item(item_name, item_quantity)
+            try:
+                item_quantity = int(item_quantity_entry.get())
+            except ValueError:
+                messagebox.showerror("Error", "Invalid input! Quantity should be an integer.")
+                return
 
-            if success:
-                total_price = item_quantity * item_price
-                self.total_price += total_price  # Update the total price
-                if remaining_quantity is not None:
-                    message = f"Item Name: {item_name:<20} Price per Item: {item_price:<15} Quantity: {item_quantity:<15} Total Price: {total_price:<15} Item Left: {remaining_quantity:<10}"
-                else:
-                    message = f"Item Name: {item_name:<20} Price per Item: {item_price:<15} Quantity: {item_quantity:<15} Total Price: {total_price:<15}"
-                self.checkout_result_listbox.insert(tk.END, message)
-            else:
-                messagebox.showerror("Error", item_price)
+            item = self.db_manager.get_item_by_name(item_name)
+            if not item:
+                messagebox.showerror("Error", "Sorry, out of stock")
+                return
+            error = add_to_cart(item, item_quantity)
+            if error:
+                messagebox.showerror("Error", error)
 
         # Checkout button
         checkout_button = tk.Button(sell_window, text="Add to Cart", bg="#b5485d", fg="white", font=("Arial", 12, "bold"), command=checkout)
         checkout_button.pack(pady=10)
 
         def bill_out():
+            nonlocal sale_id
+            if not len(cart):
+                messagebox.showerror("Error", "The cart is empty.")
+                return
             items_bought = self.checkout_result_listbox.get(0, tk.END)
-            total_price = self.total_price  # Use the instance variable total price
-            self.db_manager.save_sale("\n".join(items_bought), total_price)
-            self.show_receipt(items_bought, total_price)
+            # Take the stock for the whole cart at the prices shown and record the sale and its lines in one commit
+            success, result = self.db_manager.sell_cart(cart.sale_lines(), self.cashier, sale_id)
+            if not success:
+                messagebox.showerror("Error", result)
+                return
+            self.show_receipt(result, items_bought, cart.total_cents)
+            # The next sale from this window starts from an empty cart and an ID of its own
+            cart.clear()
+            self.checkout_result_listbox.delete(0, tk.END)
+            total_label.config(text=f"Total: {format_cents(cart.total_cents)}")
+            sale_id = self.db_manager.next_sale_id()
+            item_id_label.config(text=f"ID: {sale_id}")
 
         # Bill Out button
         bill_out_button = tk.Button(sell_window, text="Bill Out", bg="#b5485d", fg="white", font=("Arial", 12, "bold"), command=bill_out)
         bill_out_button.pack(pady=10)
 
-    def show_receipt(self, items_bought, total_price):
+    def show_receipt(self, sale_id, items_bought, total_cents):
         receipt_window = tk.Toplevel(self.master)
         receipt_window.title("Receipt")
         receipt_window.geometry("900x600")
@@ -275,6 +232,10 @@ class SellItemApp:
         receipt_title_label = tk.Label(receipt_window, text="Receipt", bg="#cabeaf", fg="black", font=("Arial", 20, "bold"))
         receipt_title_label.pack(pady=10)
 
+        # Sale ID label, the ID the sale was saved under
+        sale_id_label = tk.Label(receipt_window, text=f"Sale ID: {sale_id}", bg="#cabeaf", fg="black", font=("Arial", 12))
+        sale_id_label.pack(pady=5)
+
         # Items bought label
         items_label = tk.Label(receipt_window, text="Items Bought:", bg="#cabeaf", fg="black", font=("Arial", 12))
         items_label.pack(pady=5)
@@ -286,7 +247,7 @@ class SellItemApp:
         items_listbox.pack(pady=10, padx=10, fill=tk.BOTH, expand=True)
 
         # Total price label
-        total_price_label = tk.Label(receipt_window, text=f"Total Price: {total_price}", bg="#cabeaf", fg="black", font=("Arial", 12))
+        total_price_label = tk.Label(receipt_window, text=f"Total Price: {format_cents(total_cents)}", bg="#cabeaf", fg="black", font=("Arial", 12))
         total_price_label.pack(pady=10)
 
         # Money entry
@@ -299,8 +260,7 @@ class SellItemApp:
         def calculate_change():
             try:
                 money = float(money_entry.get())
-                change = money - total_price
-                change_label.config(text=f"Change: {change}")
+                change_label.config(text=f"Change: {format_cents(to_cents(money) - total_cents)}")
             except ValueError:
                 messagebox.showerror("Error", "Invalid input for money.")
 
@@ -320,23 +280,17 @@ class SellItemApp:
         finish_button.pack(pady=10)
 
     def show_stock(self):
-        # Clear previous items
-        self.receipt_treeview.delete(*self.receipt_treeview.get_children())
-
-        inventory_items = self.db_manager.view_inventory()
-
-        for item in inventory_items:
-            item_name = item[0]
-            item_price = item[1]
-            item_quantity = item[2]
-            # Insert each item into the treeview with correct values
-            self.receipt_treeview.insert("", tk.END, values=(item_name, item_price, item_quantity))
+        # Page through the whole inventory
+        self.receipt_table.show_pages(self.db_manager.inventory_page, count_rows=self.db_manager.count_inventory)
 
 def main():
-    db_manager = DatabaseManager("grocery_database.db")
+    # GMS_SERVER=host:port checks out through a running GMS_Service instead of the database file
+    db_manager = service_client_from_environment() or get_database_manager("grocery_database.db")
+    cashier = sys.argv[1] if len(sys.argv) > 1 else None  # Only when running this file on its own, e.g. python GMS_Sell_Items.py alice
     root = tk.Tk()
+    install_from_environment(root)  # Opt-in callback timing, see GMS_UIMonitor
     root.state("zoomed")
-    app = SellItemApp(root, db_manager)
+    app = SellItemApp(root, db_manager, cashier)
     root.mainloop()
 
 if __name__ == "__main__":
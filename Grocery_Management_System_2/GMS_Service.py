@@ -0,0 +1,364 @@
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+from GMS_Database import DEFAULT_DB_FILE, DEFAULT_DURABILITY, DURABILITY_PROFILES, SALE_ID_BLOCK_SIZE, DatabaseManager
+from GMS_Search import PAGE_SIZE, SEARCH_LIMIT, SORT_COLUMNS
+
+DEFAULT_PORT = 8750
+READER_THREADS = 4
+# Checkouts waiting for the writer are committed together, at most this many per commit
+MAX_CHECKOUT_BATCH = 64
+MAX_PAGE_SIZE = 1000
+MAX_HEADER_LINES = 100
+
+class BadRequest(Exception):
+    pass
+
+class InventoryServer:
+    # Optional JSON service owning the database for several POS terminals. Checkouts go
+    # through one writer connection on a thread of its own: carts that arrive while a
+    # commit is in progress are sold together in the next unit of work, each cart in its
+    # own savepoint, so terminals never queue on the SQLite file lock. Lookups, searches
+    # and reports run on a small pool of reader threads with a connection each.
+    #
+    #   GET  /items/<name>                          {"item": [id, name, quantity, price]}
+    #   GET  /barcodes/<code>                       {"item": [id, name, quantity, price]}
+    #   GET  /items?search=<term>&limit=<n>         {"items": [[name, price, quantity], ...]}
+    #   GET  /inventory/count                       {"total": n}
+    #   GET  /inventory?sort=name|price|quantity&order=asc|desc&limit=<n>&search=<term>&after=<cursor>
+    #                                               {"items": [...], "next": cursor for the next page or null}
+    #   GET  /low-stock                             {"items": [[id, name, quantity, reorder level, since], ...]}
+    #   GET  /sales/latest                          {"sale_id": n}
+    #   POST /sale-ids {"count": n}                 {"first": id, "count": n}, a block of IDs for one terminal
+    #   GET  /reports/sales?start=&end=&group_by=   {"rows": [...]}
+    #   POST /checkout {"items": [[name, qty(, unit price)], ...], "cashier": name, "sale_id": id}   {"sale_id": id}, 409 if out of stock
+    #   GET  /stats                                 request and commit counters
+    def __init__(self, db_file=DEFAULT_DB_FILE, host="127.0.0.1", port=DEFAULT_PORT, readers=READER_THREADS,
+                 durability=DEFAULT_DURABILITY):
+        self.db_file = db_file
+        self.host = host
+        self.port = port
+        self.durability = durability
+        self.local = threading.local()
+        # Create the schema once before the pools open their own connections
+        DatabaseManager(db_file, durability=durability, cache=False).conn.close()
+        # The per-process inventory cache would be duplicated in every reader, so readers ask SQLite
+        self.readers = ThreadPoolExecutor(readers, thread_name_prefix="gms-reader", initializer=self.open_connection)
+        self.writer = ThreadPoolExecutor(1, thread_name_prefix="gms-writer", initializer=self.open_connection)
+        self.pending_checkouts = []
+        self.writing = False
+        self.server = None
+
+        self.requests = 0
+        self.errors = 0
+        self.checkouts = 0
+        self.commits = 0
+
+    def open_connection(self):
+        self.local.db_manager = DatabaseManager(self.db_file, durability=self.durability, cache=False)
+
+    def call(self, method, *args):
+        return getattr(self.local.db_manager, method)(*args)
+
+    async def read(self, method, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.readers, self.call, method, *args)
+
+    async def write(self, method, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.writer, self.call, method, *args)
+
+    # Checkouts
+    def sell_carts(self, carts):
+        # Runs on the writer thread: one commit for the whole batch
+        db_manager = self.local.db_manager
+        with db_manager.unit_of_work():
+            return [db_manager.sell_cart(cart_items, cashier, sale_id) for cart_items, cashier, sale_id in carts]
+
+    async def checkout(self, cart_items, cashier, sale_id):
+        future = asyncio.get_running_loop().create_future()
+        self.pending_checkouts.append((cart_items, cashier, sale_id, future))
+        if not self.writing:
+            self.writing = True
+            asyncio.create_task(self.write_checkouts())
+        return await future
+
+    async def write_checkouts(self):
+        loop = asyncio.get_running_loop()
+        while self.pending_checkouts:
+            batch = self.pending_checkouts[:MAX_CHECKOUT_BATCH]
+            del self.pending_checkouts[:MAX_CHECKOUT_BATCH]
+            try:
+                results = await loop.run_in_executor(self.writer, self.sell_carts, [checkout[:3] for checkout in batch])
+                self.commits += 1
+            except Exception as e:
+                print("Error committing checkouts:", e)
+                results = [(False, "An error occurred")] * len(batch)
+            for (cart_items, cashier, sale_id, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+            if not self.pending_checkouts:
+                # Between bursts the writer has time for a stock checkpoint, if one is due
+                await loop.run_in_executor(self.writer, self.call, "checkpoint_stock_if_due")
+        self.writing = False
+
+    # Requests
+    async def dispatch(self, method, target, body):
+        url = urlsplit(target)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        path = url.path.rstrip("/")
+
+        if method == "GET" and path.startswith("/items/"):
+            item = await self.read("get_item_by_name", unquote(path[len("/items/"):]))
+            if item is None:
+                return HTTPStatus.NOT_FOUND, {"error": "Sorry, out of stock"}
+            return HTTPStatus.OK, {"item": item}
+        if method == "GET" and path.startswith("/barcodes/"):
+            item = await self.read("get_item_by_barcode", unquote(path[len("/barcodes/"):]))
+            if item is None:
+                return HTTPStatus.NOT_FOUND, {"error": "Unknown barcode"}
+            return HTTPStatus.OK, {"item": item}
+        if method == "GET" and path == "/items":
+            if "search" not in query:
+                raise BadRequest("Missing search; page through the inventory with /inventory")
+            limit = min(int(query.get("limit", SEARCH_LIMIT)), MAX_PAGE_SIZE)
+            return HTTPStatus.OK, {"items": await self.read("search_item", query["search"], limit)}
+        if method == "GET" and path == "/inventory/count":
+            return HTTPStatus.OK, {"total": await self.read("count_inventory")}
+        if method == "GET" and path == "/inventory":
+            sort = query.get("sort", "name")
+            if sort not in SORT_COLUMNS:
+                raise BadRequest(f"Unknown sort key: {sort}")
+            limit = min(int(query.get("limit", PAGE_SIZE)), MAX_PAGE_SIZE)
+            after = json.loads(query["after"]) if query.get("after") else None
+            rows, next_after = await self.read("inventory_page", sort, query.get("order") == "desc", limit, after, query.get("search"))
+            return HTTPStatus.OK, {"items": rows, "next": next_after}
+        if method == "GET" and path == "/low-stock":
+            return HTTPStatus.OK, {"items": await self.read("get_low_stock")}
+        if method == "GET" and path == "/sales/latest":
+            return HTTPStatus.OK, {"sale_id": await self.read("get_latest_sale_id")}
+        if method == "POST" and path == "/sale-ids":
+            count = int(json.loads(body or b"{}").get("count", SALE_ID_BLOCK_SIZE))
+            if not 0 < count <= MAX_PAGE_SIZE:
+                raise BadRequest(f"count must be between 1 and {MAX_PAGE_SIZE}")
+            sale_ids = await self.write("reserve_sale_ids", count)
+            return HTTPStatus.OK, {"first": sale_ids.start, "count": len(sale_ids)}
+        if method == "GET" and path == "/reports/sales":
+            if "start" not in query or "end" not in query:
+                raise BadRequest("start and end are required")
+            group_by = query.get("group_by", "day")
+            if group_by not in ("day", "item", "cashier"):
+                raise BadRequest(f"Unknown report grouping: {group_by}")
+            return HTTPStatus.OK, {"rows": await self.read("sales_report", query["start"], query["end"], group_by)}
+        if method == "POST" and path == "/checkout":
+            request = json.loads(body or b"{}")
+            cart_items = [(str(name), int(quantity), *map(float, snapshot)) for name, quantity, *snapshot in request.get("items", [])]
+            if not cart_items or any(line[1] <= 0 or len(line) > 3 for line in cart_items):
+                raise BadRequest("items must be a non-empty list of [name, quantity > 0] or [name, quantity, unit price]")
+            sale_id = int(request["sale_id"]) if request.get("sale_id") is not None else None
+            self.checkouts += 1
+            success, result = await self.checkout(cart_items, request.get("cashier"), sale_id)
+            if not success:
+                return HTTPStatus.CONFLICT, {"error": result}
+            return HTTPStatus.OK, {"sale_id": result}
+        if method == "GET" and path == "/stats":
+            return HTTPStatus.OK, {"requests": self.requests, "errors": self.errors, "checkouts": self.checkouts,
+                                   "commits": self.commits, "pending_checkouts": len(self.pending_checkouts)}
+        return HTTPStatus.NOT_FOUND, {"error": f"No such endpoint: {method} {url.path}"}
+
+    async def respond(self, method, target, body):
+        self.requests += 1
+        try:
+            return await self.dispatch(method, target, body)
+        except (BadRequest, ValueError, TypeError) as e:
+            self.errors += 1
+            return HTTPStatus.BAD_REQUEST, {"error": str(e)}
+        except Exception as e:
+            self.errors += 1
+            print("Error handling request:", e)
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "An error occurred"}
+
+    async def handle_connection(self, reader, writer):
+        # Minimal HTTP/1.1 with keep-alive: terminals re-use one connection for every call
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+                headers = {}
+                for _ in range(MAX_HEADER_LINES):
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                status, payload = await self.respond(method, target, body)
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                data = json.dumps(payload).encode()
+                head = f"HTTP/1.1 {status.value} {status.phrase}\r\nContent-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                if not keep_alive:
+                    head += "Connection: close\r\n"
+                writer.write(head.encode("latin-1") + b"\r\n" + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+            pass  # Malformed request or the terminal went away
+        finally:
+            writer.close()
+
+    async def serve(self, ready=None):
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        print(f"Serving {self.db_file} on http://{self.host}:{self.port}", flush=True)
+        if ready:
+            ready()
+        async with self.server:
+            await self.server.serve_forever()
+
+class ServiceClient:
+    # Talks to a running InventoryServer with the DatabaseManager method names the cashier
+    # screen uses, so SellItemApp works with either. One keep-alive connection per thread.
+    def __init__(self, address, timeout=10):
+        address = address.split("://")[-1].rstrip("/")
+        host, _, port = address.rpartition(":")
+        self.host = host or address
+        self.port = int(port) if host else DEFAULT_PORT
+        self.timeout = timeout
+        self.local = threading.local()
+        # Not backed by a local file or cache; searches go to the server
+        self.db_file = None
+        self.inventory_cache = None
+        self.sale_ids = iter(())  # This terminal's reserved block, as in DatabaseManager
+
+    def request(self, method, path, payload=None):
+        # Returns (status, decoded JSON). GETs are retried once on a fresh connection,
+        # e.g. after the server restarted; a checkout is never sent twice.
+        for attempt in range(2):
+            conn = getattr(self.local, "conn", None)
+            if conn is None:
+                conn = self.local.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                body = json.dumps(payload).encode() if payload is not None else None
+                conn.request(method, path, body, {"Content-Type": "application/json"} if body else {})
+                response = conn.getresponse()
+                return response.status, json.loads(response.read())
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                self.local.conn = None
+                if method != "GET" or attempt:
+                    raise
+
+    def get(self, path, key, default, what):
+        try:
+            status, data = self.request("GET", path)
+            if status == HTTPStatus.OK:
+                return data[key]
+            if status != HTTPStatus.NOT_FOUND:
+                print(f"Error {what}:", data.get("error"))
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            print(f"Error {what}:", e)
+        return default
+
+    def get_item_by_name(self, item_name):
+        item = self.get(f"/items/{quote(item_name, safe='')}", "item", None, "getting item by name")
+        return tuple(item) if item else None
+
+    def get_item_by_barcode(self, barcode):
+        item = self.get(f"/barcodes/{quote(barcode, safe='')}", "item", None, "getting item by barcode")
+        return tuple(item) if item else None
+
+    def search_item(self, item_name, limit=SEARCH_LIMIT):
+        rows = self.get(f"/items?search={quote(item_name, safe='')}&limit={limit}", "items", [], "searching item")
+        return [tuple(row) for row in rows]
+
+    search_item_by_name = search_item
+
+    def count_inventory(self):
+        return self.get("/inventory/count", "total", 0, "counting inventory")
+
+    def inventory_page(self, sort="name", descending=False, page_size=PAGE_SIZE, after=None, search=None):
+        path = f"/inventory?sort={sort}&order={'desc' if descending else 'asc'}&limit={page_size}"
+        if after is not None:
+            path += "&after=" + quote(json.dumps(after), safe="")
+        if search:
+            path += "&search=" + quote(search, safe="")
+        try:
+            status, data = self.request("GET", path)
+            if status == HTTPStatus.OK:
+                return [tuple(row) for row in data["items"]], data["next"]
+            print("Error reading inventory page:", data.get("error"))
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            print("Error reading inventory page:", e)
+        return [], None
+
+    def get_low_stock(self):
+        rows = self.get("/low-stock", "items", [], "reading low stock")
+        return [tuple(row) for row in rows]
+
+    def get_latest_sale_id(self):
+        return self.get("/sales/latest", "sale_id", 0, "fetching latest sale ID")
+
+    def sales_report(self, start_day, end_day, group_by="day"):
+        rows = self.get(f"/reports/sales?start={start_day}&end={end_day}&group_by={group_by}", "rows", [], "reading sales report")
+        return [tuple(row) for row in rows]
+
+    def next_sale_id(self):
+        sale_id = next(self.sale_ids, None)
+        if sale_id is None:
+            try:
+                status, data = self.request("POST", "/sale-ids", {"count": SALE_ID_BLOCK_SIZE})
+                if status != HTTPStatus.OK:
+                    print("Error reserving sale IDs:", data.get("error"))
+                    return None
+            except (OSError, http.client.HTTPException, ValueError) as e:
+                print("Error reserving sale IDs:", e)
+                return None
+            self.sale_ids = iter(range(data["first"], data["first"] + data["count"]))
+            sale_id = next(self.sale_ids)
+        return sale_id
+
+    def sell_cart(self, cart_items, cashier=None, sale_id=None):
+        try:
+            status, data = self.request("POST", "/checkout", {"items": list(cart_items), "cashier": cashier, "sale_id": sale_id})
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            print("Error selling cart:", e)
+            return False, "Checkout service unavailable"
+        if status == HTTPStatus.OK:
+            return True, data["sale_id"]
+        return False, data.get("error", "An error occurred")
+
+    def close(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is not None:
+            conn.close()
+
+def service_client_from_environment():
+    # GMS_SERVER=host:port makes the cashier screens use a running service instead of the database file
+    address = os.environ.get("GMS_SERVER")
+    return ServiceClient(address) if address else None
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve inventory lookups, searches, checkouts and reports over HTTP/JSON")
+    parser.add_argument("--db", default=DEFAULT_DB_FILE)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="0 picks a free port")
+    parser.add_argument("--readers", type=int, default=READER_THREADS)
+    parser.add_argument("--durability", choices=sorted(DURABILITY_PROFILES), default=DEFAULT_DURABILITY)
+    args = parser.parse_args()
+
+    server = InventoryServer(args.db, args.host, args.port, args.readers, args.durability)
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import atexit
+import bisect
+import functools
+import json
+import os
+import time
+import tkinter as tk
+
+# Opt-in monitor for how long Tk callbacks hold the mainloop. Every callback Tk calls
+# into Python (button commands, bind handlers, after() jobs) is registered through
+# Misc._register, so wrapping that one method times all of them. A heartbeat scheduled
+# with after() notices when the loop stops turning and blames the callback that held it.
+HEARTBEAT_MS = 50
+STALL_MS = 200  # A heartbeat this much later than scheduled counts as a stall
+REPORT_INTERVAL_MS = 30000
+KEEP_STALLS = 500
+# Histogram bucket upper bounds in milliseconds; the last bucket is everything slower
+BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+def callback_target(func):
+    # after() wraps the real job in a closure called callit; look at the job instead
+    code = getattr(func, "__code__", None)
+    if code is not None and code.co_name == "callit" and "func" in code.co_freevars:
+        func = func.__closure__[code.co_freevars.index("func")].cell_contents
+    func = getattr(func, "__func__", func)
+    if isinstance(func, functools.partial):
+        func = func.func
+    return func
+
+def callback_name(func):
+    name = getattr(func, "__qualname__", None) or type(func).__qualname__
+    module = getattr(func, "__module__", None)
+    if module and module != "__main__":
+        name = f"{module}.{name}"
+    if "<lambda>" in name and hasattr(func, "__code__"):
+        name += f":{func.__code__.co_firstlineno}"
+    return name
+
+class HandlerStats:
+    __slots__ = ("count", "total_ms", "max_ms", "histogram")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.histogram = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, held_ms):
+        self.count += 1
+        self.total_ms += held_ms
+        if held_ms > self.max_ms:
+            self.max_ms = held_ms
+        self.histogram[bisect.bisect_left(BUCKETS_MS, held_ms)] += 1
+
+    def as_dict(self):
+        labels = [f"<={bound}ms" for bound in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"]
+        return {"count": self.count, "total_ms": round(self.total_ms, 3), "max_ms": round(self.max_ms, 3),
+                "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+                "histogram": {label: count for label, count in zip(labels, self.histogram) if count}}
+
+class Frame:
+    # One running callback. A callback that opens a message box runs a nested event loop,
+    # and the loop is only held between the nested events, so the time is kept per
+    # stretch ("segment") between them rather than from start to end.
+    __slots__ = ("name", "segment_start", "held_ms")
+
+    def __init__(self, name, now):
+        self.name = name
+        self.segment_start = now
+        self.held_ms = 0.0
+
+class UIMonitor:
+    def __init__(self, root, report_path, heartbeat_ms=HEARTBEAT_MS, stall_ms=STALL_MS, report_interval_ms=REPORT_INTERVAL_MS):
+        self.root = root
+        self.report_path = report_path
+        self.heartbeat_ms = heartbeat_ms
+        self.stall_ms = stall_ms
+        self.report_interval_ms = report_interval_ms
+        self.handlers = {}  # Callback name -> HandlerStats
+        self.stalls = []
+        self.stack = []
+        self.worst_since_beat = (0.0, None)  # Longest hold since the last heartbeat and who did it
+        self.last_beat = None
+        self.original_register = None
+        self.started = time.time()
+
+    def install(self):
+        # Call before the windows are built: callbacks registered earlier are not timed
+        monitor = self
+        original_register = self.original_register = tk.Misc._register
+
+        def _register(widget, func, subst=None, needcleanup=1):
+            return original_register(widget, monitor.wrap(func), subst, needcleanup)
+
+        tk.Misc._register = _register
+        self.last_beat = time.perf_counter()
+        self.root.after(self.heartbeat_ms, self.heartbeat)
+        self.root.after(self.report_interval_ms, self.periodic_report)
+        atexit.register(self.write_report)
+        return self
+
+    def uninstall(self):
+        if self.original_register:
+            tk.Misc._register = self.original_register
+            self.original_register = None
+        self.write_report()
+
+    def wrap(self, func):
+        # The monitor's own after() jobs count as loop activity but stay out of the table
+        target = callback_target(func)
+        name = None if getattr(target, "monitor_internal", False) else callback_name(target)
+        stack = self.stack
+
+        @functools.wraps(func)
+        def timed(*args):
+            now = time.perf_counter()
+            if stack:
+                self.end_segment(stack[-1], now)  # The outer callback is in a nested event loop
+            frame = Frame(name, now)
+            stack.append(frame)
+            try:
+                return func(*args)
+            finally:
+                now = time.perf_counter()
+                stack.pop()
+                self.end_segment(frame, now)
+                if name is not None:
+                    stats = self.handlers.get(name)
+                    if stats is None:
+                        stats = self.handlers[name] = HandlerStats()
+                    stats.add(frame.held_ms)
+                if stack:
+                    stack[-1].segment_start = now
+
+        return timed
+
+    def end_segment(self, frame, now):
+        segment_ms = (now - frame.segment_start) * 1000
+        if segment_ms > frame.held_ms:
+            frame.held_ms = segment_ms
+        if segment_ms > self.worst_since_beat[0]:
+            self.worst_since_beat = (segment_ms, frame.name)
+
+    def heartbeat(self):
+        now = time.perf_counter()
+        late_ms = (now - self.last_beat) * 1000 - self.heartbeat_ms
+        if late_ms >= self.stall_ms:
+            held_ms, name = self.worst_since_beat
+            if name is None:
+                # Nothing in Python held the loop that long: Tk itself was busy (layout, redraw)
+                name, held_ms = "Tk (no Python callback)", late_ms
+            self.stalls.append({"at": time.strftime("%Y-%m-%d %H:%M:%S"), "stall_ms": round(late_ms, 1),
+                                "callback": name, "callback_ms": round(held_ms, 1)})
+            del self.stalls[:-KEEP_STALLS]
+        self.worst_since_beat = (0.0, None)
+        self.last_beat = now
+        self.root.after(self.heartbeat_ms, self.heartbeat)
+
+    def periodic_report(self):
+        self.write_report()
+        self.root.after(self.report_interval_ms, self.periodic_report)
+
+    heartbeat.monitor_internal = True
+    periodic_report.monitor_internal = True
+
+    def report(self):
+        handlers = sorted(self.handlers.items(), key=lambda item: item[1].max_ms, reverse=True)
+        return {"started": self.started, "written": time.time(),
+                "heartbeat_ms": self.heartbeat_ms, "stall_ms": self.stall_ms,
+                "handlers": {name: stats.as_dict() for name, stats in handlers},
+                "stalls": self.stalls}
+
+    def write_report(self):
+        try:
+            with open(self.report_path + ".tmp", "w", encoding="utf-8") as report_file:
+                json.dump(self.report(), report_file, indent=2)
+            os.replace(self.report_path + ".tmp", self.report_path)
+        except OSError as e:
+            print("Error writing UI monitor report:", e)
+
+def install_from_environment(root):
+    # GMS_UI_MONITOR=<report.json> turns the monitor on for this run
+    report_path = os.environ.get("GMS_UI_MONITOR")
+    if not report_path:
+        return None
+    return UIMonitor(root, report_path).install()
@@ -0,0 +1,192 @@
+import tkinter as tk
+from collections import OrderedDict
+from tkinter import ttk
+from GMS_Search import PAGE_SIZE
+
+ROW_HEIGHT = 20
+HEADING_HEIGHT = 24
+# Sort keys offered above the table, as shown -> as passed to fetch_page
+SORT_KEYS = {"Name": "name", "Price": "price", "Quantity": "quantity"}
+# Pages kept in memory; scrolling back to one dropped since is a keyset read from its cursor
+LOADED_PAGES = 5
+
+class VirtualTable(tk.Frame):
+    # Table that only ever holds the rows currently on screen, with the sort key and order
+    # above it. A listing is read from fetch_page(sort, descending, page_size, after) ->
+    # (rows, cursor for the next page), i.e. DatabaseManager.inventory_page, which continues
+    # from the last row read instead of counting an offset. The next page is read once the
+    # viewport gets near the last row read; the start cursor of every page reached is kept,
+    # so scrolling or jumping back re-reads a page with one seek. Scrolling re-uses the same
+    # Treeview items instead of creating one per row.
+    def __init__(self, master, columns, bg=None, page_size=PAGE_SIZE, **kwargs):
+        super().__init__(master, bg=bg, **kwargs)
+        self.columns = columns
+        self.page_size = page_size
+
+        bar = tk.Frame(self, bg=bg)
+        bar.pack(side=tk.TOP, fill=tk.X)
+        tk.Label(bar, text="Sort by", bg=bg).pack(side=tk.LEFT)
+        self.sort_var = tk.StringVar(self, "Name")
+        self.sort_menu = tk.OptionMenu(bar, self.sort_var, *SORT_KEYS, command=lambda label: self.reload())
+        self.sort_menu.pack(side=tk.LEFT)
+        self.descending_var = tk.BooleanVar(self, False)
+        self.descending_check = tk.Checkbutton(bar, text="Descending", variable=self.descending_var, bg=bg, command=self.reload)
+        self.descending_check.pack(side=tk.LEFT)
+
+        style = ttk.Style(self)
+        style.configure("Virtual.Treeview", rowheight=ROW_HEIGHT)
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", style="Virtual.Treeview", selectmode="browse")
+        for column in columns:
+            self.tree.heading(column, text=column)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.fetch_page = None
+        self.count_rows = None
+        self.rows = []  # In-memory rows when no listing is attached
+        self.cursors = []  # The after cursor each page reached so far starts from
+        self.pages = OrderedDict()  # Page number -> rows, least recently used first
+        self.end = None  # Row count once the last page has been read
+        self.counted = None  # count_rows() as of the last reload
+        self.empty_text = ""
+        self.total = 0
+        self.top = 0
+        self.visible = 1
+
+        self.tree.bind("<Configure>", self.on_resize)
+        self.tree.bind("<MouseWheel>", self.on_mousewheel)
+        self.tree.bind("<Button-4>", lambda event: self.scroll_rows(-3))
+        self.tree.bind("<Button-5>", lambda event: self.scroll_rows(3))
+
+    def show_pages(self, fetch_page, empty_text="", count_rows=None):
+        # Scroll through a listing from its first row in the chosen order. count_rows(),
+        # when the listing can be counted cheaply, sizes the scrollbar up front; without
+        # it the scrollbar grows as pages are read.
+        self.fetch_page = fetch_page
+        self.count_rows = count_rows
+        self.rows = []
+        self.empty_text = empty_text
+        self.set_sort_state(tk.NORMAL)
+        self.reload()
+
+    def show_rows(self, rows, empty_text=""):
+        # Show an already fetched, bounded result such as a capped search
+        self.fetch_page = None
+        self.count_rows = None
+        self.cursors = []
+        self.pages = OrderedDict()
+        self.rows = list(rows)
+        self.empty_text = empty_text
+        self.top = 0
+        self.set_sort_state(tk.DISABLED)
+        self.render()
+
+    def clear(self, message=""):
+        self.show_rows([], message)
+
+    def reload(self):
+        # Start again from the first row, e.g. after the sort order changed
+        if self.fetch_page is None:
+            return
+        self.cursors = [None]
+        self.pages = OrderedDict()
+        self.end = None
+        self.counted = self.count_rows() if self.count_rows else None
+        self.top = 0
+        self.render()
+
+    def set_sort_state(self, state):
+        self.sort_menu.config(state=state)
+        self.descending_check.config(state=state)
+
+    def read_page(self, number):
+        rows, next_cursor = self.fetch_page(SORT_KEYS[self.sort_var.get()], self.descending_var.get(), self.page_size,
+                                            self.cursors[number])
+        if next_cursor is None:
+            self.end = number * self.page_size + len(rows)
+            del self.cursors[number + 1:]
+        elif number + 1 == len(self.cursors):
+            self.cursors.append(next_cursor)
+        self.pages[number] = rows
+        while len(self.pages) > LOADED_PAGES:
+            self.pages.popitem(last=False)
+        return rows
+
+    def page(self, number):
+        # Rows of one page. Pages beyond those reached so far are read in turn, as only
+        # the page before one knows where it starts.
+        if number in self.pages:
+            self.pages.move_to_end(number)
+            return self.pages[number]
+        while number >= len(self.cursors) and self.end is None:
+            self.read_page(len(self.cursors) - 1)
+        if number >= len(self.cursors):
+            return []
+        return self.pages[number] if number in self.pages else self.read_page(number)
+
+    def rows_at(self, start, count):
+        if self.fetch_page is None:
+            return self.rows[start:start + count]
+        first = start // self.page_size
+        rows = []
+        for number in range(first, (start + count - 1) // self.page_size + 1):
+            rows.extend(self.page(number))
+        offset = start - first * self.page_size
+        return rows[offset:offset + count]
+
+    def update_total(self):
+        if self.fetch_page is None:
+            self.total = len(self.rows)
+        elif self.end is not None:
+            self.total = self.end
+        else:
+            # Every page reached (the last of them not read yet) leaves room to scroll on,
+            # in case the count was taken before rows were added
+            self.total = max(self.counted or 0, len(self.cursors) * self.page_size)
+
+    def render(self):
+        if self.fetch_page is not None:
+            # Read the next page once the viewport gets within a screen of the last row read
+            self.page((self.top + 2 * self.visible) // self.page_size)
+        self.update_total()
+        self.top = max(0, min(self.top, self.total - self.visible))
+        rows = self.rows_at(self.top, self.visible) if self.total else []
+        if not rows and self.empty_text:
+            rows = [(self.empty_text,)]
+
+        children = self.tree.get_children()
+        for index, row in enumerate(rows):
+            if index < len(children):
+                self.tree.item(children[index], values=row)
+            else:
+                self.tree.insert("", tk.END, values=row)
+        if len(children) > len(rows):
+            self.tree.delete(*children[len(rows):])
+
+        if self.total:
+            self.scrollbar.set(self.top / self.total, min(1.0, (self.top + self.visible) / self.total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def yview(self, *args):
+        # Scrollbar callback: ("moveto", fraction) or ("scroll", amount, "units" | "pages")
+        if args[0] == "moveto":
+            self.top = int(float(args[1]) * self.total)
+            self.render()
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            self.scroll_rows(amount * self.visible if args[2] == "pages" else amount)
+
+    def scroll_rows(self, amount):
+        self.top += amount
+        self.render()
+
+    def on_mousewheel(self, event):
+        self.scroll_rows(-3 if event.delta > 0 else 3)
+
+    def on_resize(self, event):
+        visible = max(1, (event.height - HEADING_HEIGHT) // ROW_HEIGHT)
+        if visible != self.visible:
+            self.visible = visible
+            self.render()
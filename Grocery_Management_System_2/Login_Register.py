@@ -1,90 +1,49 @@
+import time
 import tkinter as tk
 from tkinter import messagebox
-import sqlite3
-import subprocess
+from GMS_Credentials import BackgroundCredentials
+from GMS_Database import get_database_manager
+from GMS_Service import service_client_from_environment
+from GMS_UIMonitor import install_from_environment
 import GMS_Main_File  # Import the main file for admin
 import GMS_Sell_Items  # Import the main file for regular user
 
-class DatabaseManager:
-    def __init__(self, db_file):
-        self.conn = sqlite3.connect(db_file)
-        self.cursor = self.conn.cursor()
-        self.create_tables()
-
-    def create_tables(self):
-        try:
-            # Create tables for store inventory, sales, and users
-            self.cursor.execute("""CREATE TABLE IF NOT EXISTS inventory (
-                                    id INTEGER PRIMARY KEY,
-                                    name TEXT,
-                                    quantity INTEGER,
-                                    price REAL
-                                )""")
-
-            self.cursor.execute("""CREATE TABLE IF NOT EXISTS sales (
-                                    id INTEGER PRIMARY KEY,
-                                    item_id INTEGER,
-                                    item_name TEXT,
-                                    quantity_sold INTEGER,
-                                    FOREIGN KEY (item_id) REFERENCES inventory(id)
-                                )""")  
-
-            self.cursor.execute("""CREATE TABLE IF NOT EXISTS users (
-                                    id INTEGER PRIMARY KEY,
-                                    username TEXT UNIQUE,
-                                    password TEXT,
-                                    role TEXT
-                                )""")  
-            # Check if the users table is empty
-            self.cursor.execute("SELECT COUNT(*) FROM users")
-            count = self.cursor.fetchone()[0]
-            if count == 0:
-                # If the table is empty, set the first user as admin
-                self.cursor.execute("INSERT INTO users (username, password, role) VALUES (?, ?, ?)",
-                                    ("admin", "admin", "Admin"))
-                self.conn.commit()  # Commit the changes
-        except sqlite3.Error as e:
-            print("Error creating tables:", e)
-
-    # User Management methods
-    def register_user(self, username, password):
-        try:
-            # Set the role for subsequent users as "User"
-            self.cursor.execute("INSERT INTO users (username, password, role) VALUES (?, ?, ?)",
-                                (username, password, "User"))
-            self.conn.commit()
-            messagebox.showinfo("Success", "User registered successfully.")
-        except sqlite3.Error as e:
-            messagebox.showerror("Error", f"Error registering user: {e}")
-
-    def login_user(self, username, password):
-        try:
-            self.cursor.execute("SELECT * FROM users WHERE username=? AND password=?",
-                                (username, password))
-            user = self.cursor.fetchone()
-            if user:
-                return user  # Return the user information
-            else:
-                return None  # Return None if user not found
-        except sqlite3.Error as e:
-            messagebox.showerror("Error", f"Error logging in: {e}")
-
-    def __del__(self):
-        self.conn.close()
-
 class UserManagementSystem:
-    def __init__(self, master):
-        # Initialize the main window for user authentication
+    # The whole application in one window: the login view is swapped in place for the
+    # admin or cashier view, which reuse this process's open data layer
+    def __init__(self, master, db_manager=None):
         self.master = master
-        self.master.title("User Authentication")
-        self.master.geometry("400x200")
-        self.db_manager = DatabaseManager("grocery_database.db")  # Changed database filename
+        self.db_manager = db_manager or get_database_manager("grocery_database.db")  # Changed database filename
+        # Password hashing is slow on purpose, so it runs off the Tk thread
+        self.credentials = BackgroundCredentials(self.master, self.db_manager)
 
         # Configure Background
         self.bg_color = "#cabeaf"
         self.button_color = "#b5485d"
         self.text_color = "black"
         self.text_color_white = "white"
+
+        self.app = None  # The admin or cashier view after login
+        self.login_started = None
+        self.login_latency_ms = None  # Time from pressing Login until the view was drawn
+        self.show_login()
+
+    def clear_window(self):
+        # Destroying the widgets also closes their background searches and child windows
+        for child in self.master.winfo_children():
+            child.destroy()
+
+    def show_login(self):
+        # Initialize the main window for user authentication
+        self.clear_window()
+        self.app = None
+        try:
+            self.master.attributes("-zoomed", False)
+        except tk.TclError:
+            pass
+        self.master.state("normal")
+        self.master.title("User Authentication")
+        self.master.geometry("400x200")
         self.master.configure(bg=self.bg_color)
 
         # Title text
@@ -101,6 +60,7 @@ class UserManagementSystem:
         self.password_label.place(x=50, y=100)
         self.password_entry = tk.Entry(self.master, bg=self.bg_color, fg=self.text_color, font=("Arial", 12), show="*")
         self.password_entry.place(x=150, y=100)
+        self.password_entry.bind("<Return>", lambda event: self.login())
 
         # Checkbox for showing password
         self.show_password_var = tk.IntVar()
@@ -114,6 +74,8 @@ class UserManagementSystem:
         self.register_button = tk.Button(self.master, text="Register", bg=self.button_color, fg=self.text_color_white, font=("Arial", 12, "bold"), command=self.register)
         self.register_button.place(x=200, y=160)
 
+        self.username_entry.focus_set()
+
     def toggle_password_visibility(self):
         # Toggle password visibility based on checkbox state
         if self.show_password_var.get() == 1:
@@ -128,19 +90,41 @@ class UserManagementSystem:
         if not username or not password:  # Check if entries are empty
             messagebox.showerror("Error", "Please enter username and password.")
             return
-        user = self.db_manager.login_user(username, password)
+        self.login_started = time.perf_counter()
+        self.set_buttons_state(tk.DISABLED)  # One attempt at a time
+        self.credentials.login(username, password, self.login_finished)
+
+    def login_finished(self, user):
         if user:
-            if user[3] == "Admin":  # Check if the user role is Admin
-                messagebox.showinfo("Success", "Login successful as admin.")
-                # Launch the main file for admin
-                subprocess.Popen(["python", "GMS_Main_File.py"])
-            else:
-                messagebox.showinfo("Success", "Login successful as regular user.")
-                # Launch the sell items file for regular user
-                subprocess.Popen(["python", "GMS_Sell_Items.py"])
+            self.open_view(user)
         else:
+            self.set_buttons_state(tk.NORMAL)
             messagebox.showerror("Error", "Invalid username or password.")
 
+    def set_buttons_state(self, state):
+        self.login_button.config(state=state)
+        self.register_button.config(state=state)
+
+    def open_view(self, user):
+        # Replace the login form with the view for the user's role
+        self.clear_window()
+        if user[3] == "Admin":  # Check if the user role is Admin
+            self.app = GMS_Main_File.GroceryManagementSystem(self.master, self.db_manager)
+        else:
+            # With GMS_SERVER set, checkouts go through the shared service
+            self.app = GMS_Sell_Items.SellItemApp(self.master, service_client_from_environment() or self.db_manager, user[1])
+
+        logout_button = tk.Button(self.master, text="Log Out", bg=self.button_color, fg=self.text_color_white, font=("Arial", 10, "bold"), command=self.show_login)
+        logout_button.place(relx=1.0, x=-20, y=20, anchor="ne")
+        try:
+            self.master.state("zoomed")
+        except tk.TclError:
+            self.master.attributes("-zoomed", True)  # X11 has no "zoomed" state
+
+        # Draw the view before taking the time, so this is what the user actually waits for
+        self.master.update_idletasks()
+        self.login_latency_ms = (time.perf_counter() - self.login_started) * 1000
+
     def register(self):
         # Functionality for user registration
         username = self.username_entry.get()
@@ -148,11 +132,20 @@ class UserManagementSystem:
         if not username or not password:  # Check if entries are empty
             messagebox.showerror("Error", "Please enter username and password.")
             return
-        self.db_manager.register_user(username, password)
+        self.set_buttons_state(tk.DISABLED)
+        self.credentials.register(username, password, self.register_finished)
+
+    def register_finished(self, success, message):
+        self.set_buttons_state(tk.NORMAL)
+        if success:
+            messagebox.showinfo("Success", message)
+        else:
+            messagebox.showerror("Error", message)
 
 def main():
     # Main function to initialize the application
     root = tk.Tk()
+    install_from_environment(root)  # Opt-in callback timing, see GMS_UIMonitor
     app = UserManagementSystem(root)
     root.mainloop()
 
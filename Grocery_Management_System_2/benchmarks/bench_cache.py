@@ -0,0 +1,89 @@
+# What the screens pay per refresh and keystroke with and without the shared inventory
+# cache (GMS_Cache): scrolling pages of the inventory list, per-keystroke searches, and
+# how long the cache takes to catch up after another terminal sells or restocks.
+# Usage: python benchmarks/bench_cache.py [--rows 200000]
+import argparse
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, ".."))
+sys.path.insert(0, BENCH_DIR)
+from bench_search import QUERIES, report, seed_inventory
+from GMS_Database import DatabaseManager
+
+PAGE_SIZE = 40
+
+def time_pages(db_manager, pages):
+    # Next, Next, ... through the name order, starting over after the last page
+    timings = []
+    after = None
+    for page in range(pages):
+        start = time.perf_counter()
+        rows, after = db_manager.inventory_page("name", False, PAGE_SIZE, after)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def time_keystrokes(db_manager):
+    timings = []
+    for query in QUERIES:
+        for length in range(1, len(query) + 1):
+            start = time.perf_counter()
+            db_manager.search_item(query[:length])
+            timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def sell_elsewhere(db_file, name):
+    # Another terminal selling one unit, as a separate process
+    code = ("import sys; sys.path.insert(0, sys.argv[1]); from GMS_Database import DatabaseManager; "
+            "DatabaseManager(sys.argv[2], cache=False).sell_cart([(sys.argv[3], 1)])")
+    subprocess.run([sys.executable, "-c", code, os.path.join(BENCH_DIR, ".."), db_file, name], check=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the shared inventory cache")
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--pages", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, "bench.db")
+        conn = sqlite3.connect(db_file)
+        seed_inventory(conn, args.rows)
+        conn.close()
+        cached = DatabaseManager(db_file)
+        uncached = DatabaseManager(db_file, cache=False)
+
+        start = time.perf_counter()
+        cached.count_inventory()
+        print(f"{args.rows} items, cache loaded in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        print("{:<10} {:>10} {:>10} {:>10} {:>10}".format("", "calls", "p50 (ms)", "p99 (ms)", "max (ms)"))
+        time_keystrokes(uncached)  # Warm the page cache the way a running terminal would
+        report("pages", time_pages(uncached, args.pages))
+        report("  cached", time_pages(cached, args.pages))
+        report("search", time_keystrokes(uncached))
+        report("  cached", time_keystrokes(cached))
+
+        name = cached.view_inventory()[args.rows // 2][0]
+        sell_elsewhere(db_file, name)
+        start = time.perf_counter()
+        cached.get_item_by_name(name)
+        print(f"patch after a sale in another process: {(time.perf_counter() - start) * 1000:.2f} ms")
+        with sqlite3.connect(db_file) as conn:
+            conn.execute("UPDATE inventory SET quantity = quantity + 1")
+        start = time.perf_counter()
+        cached.count_inventory()
+        print(f"reload after a full restock in another process: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        stats = cached.inventory_cache.stats()
+        print(f"hits {stats['hits']}, misses {stats['misses']}, reloads {stats['reloads']}, "
+              f"memory {stats['memory_bytes'] / 1024 / 1024:.1f} MB")
+        cached.close()
+        uncached.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# Checkout throughput under each durability profile. Compares the old path (a commit per
+# line sold plus one for the sale), one commit per cart (sell_cart), and several carts
+# grouped in one unit of work. Run it on the disk the store uses: fsync cost is the point.
+# Usage: python benchmarks/bench_checkout.py [--carts 100] [--lines 30] [--group 10] [--dir .]
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from GMS_Database import DURABILITY_PROFILES, DatabaseManager
+
+def seed(db_manager, items):
+    with db_manager.unit_of_work():
+        db_manager.upsert_items((f"Item {index}", 10 ** 9, 1.25) for index in range(items))
+
+def per_line(db_manager, carts):
+    for cart in carts:
+        for name, quantity in cart:
+            db_manager.sell_item(name, quantity)
+        db_manager.save_sale(f"{len(cart)} lines", len(cart) * 1.25, "bench")
+
+def per_cart(db_manager, carts):
+    for cart in carts:
+        db_manager.sell_cart(cart, "bench")
+
+def grouped(db_manager, carts, group):
+    for start in range(0, len(carts), group):
+        with db_manager.unit_of_work():
+            for cart in carts[start:start + group]:
+                db_manager.sell_cart(cart, "bench")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark checkout throughput per durability profile")
+    parser.add_argument("--carts", type=int, default=100)
+    parser.add_argument("--lines", type=int, default=30)
+    parser.add_argument("--group", type=int, default=10, help="carts per unit of work in the grouped run")
+    parser.add_argument("--dir", help="where to put the test databases (defaults to the temp directory)")
+    args = parser.parse_args()
+
+    carts = [[(f"Item {(cart * args.lines + line) % 500}", 1) for line in range(args.lines)] for cart in range(args.carts)]
+    modes = [("commit per line", per_line), ("commit per cart", per_cart),
+             (f"{args.group} carts per commit", lambda db_manager, carts: grouped(db_manager, carts, args.group))]
+    print(f"{args.carts} carts of {args.lines} lines\n")
+    print(f"{'profile':<10} {'mode':<22} {'carts/s':>10} {'ms/cart':>9}")
+    for profile in DURABILITY_PROFILES:
+        for label, run in modes:
+            with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+                db_manager = DatabaseManager(os.path.join(tmp, "bench.db"), durability=profile)
+                seed(db_manager, 500)
+                start = time.perf_counter()
+                run(db_manager, carts)
+                elapsed = time.perf_counter() - start
+                db_manager.close()
+            print(f"{profile:<10} {label:<22} {args.carts / elapsed:>10.1f} {elapsed / args.carts * 1000:>9.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# Throughput and peak memory of the streaming export at several table sizes.
+# Each export runs in a fresh child process so its peak RSS is measured on its own;
+# with streaming it should stay about the same from the smallest size to the largest.
+# Usage: python benchmarks/bench_export.py [--sizes 1000,100000,1000000] [--format csv|jsonl]
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from GMS_Database import connect
+from GMS_Migrations import run_migrations
+
+def seed_sale_lines(db_file, count):
+    conn = connect(db_file)
+    run_migrations(conn)
+    with conn:
+        conn.execute("""WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < ?)
+                        INSERT INTO sale_lines (sale_id, item_id, item_name, qty, unit_price)
+                        SELECT i / 3 + 1, i % 1000 + 1, 'Item ' || (i % 1000), i % 7 + 1, (i % 5000) / 100.0 FROM n""",
+                     (count,))
+    conn.close()
+
+def child(db_file, file_format):
+    # Runs in the child process: export, then report the peak RSS of this process
+    from GMS_Database import DatabaseManager
+    from GMS_Export import export_table
+    output = os.path.join(os.path.dirname(db_file), "export." + file_format)
+    count, elapsed = export_table(DatabaseManager(db_file), "sale_lines", output, file_format)
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # Kilobytes on Linux
+    print(json.dumps({"rows": count, "seconds": elapsed, "peak_mb": peak_kb / 1024,
+                      "file_mb": os.path.getsize(output) / 1024 / 1024}))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the streaming export")
+    parser.add_argument("--sizes", default="1000,100000,1000000")
+    parser.add_argument("--format", choices=("csv", "jsonl"), default="csv")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.format)
+        return
+
+    for size in (int(size) for size in args.sizes.split(",")):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_file = os.path.join(tmp, "bench.db")
+            seed_sale_lines(db_file, size)
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", db_file, "--format", args.format],
+                                    check=True, capture_output=True, text=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+        print(f"{result['rows']:>10} rows  {result['rows'] / result['seconds']:>9.0f} rows/s  "
+              f"peak RSS {result['peak_mb']:6.1f} MB  file {result['file_mb']:8.1f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# Login-to-ready latency: starting a new interpreter per login (the old behaviour)
+# against switching views inside one running application. Needs a display.
+# Usage: python benchmarks/bench_login.py [--runs 10]
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tkinter as tk
+
+# Longest a login may take before the benchmark gives up on it
+LOGIN_TIMEOUT = 30
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+# What each login used to do: a fresh Python that imports Tk, opens the database and
+# builds the view. The time is taken once the view has been drawn.
+SUBPROCESS_LOGIN = """
+import sys, time, tkinter as tk
+sys.path.insert(0, {root!r})
+from GMS_Database import get_database_manager
+from {module} import {view}
+root = tk.Tk()
+db_manager = get_database_manager({db_file!r})
+app = {view}(root, db_manager{extra})
+root.update_idletasks()
+print("ready", flush=True)
+"""
+
+def time_subprocess(db_file, module, view, extra):
+    code = SUBPROCESS_LOGIN.format(root=os.path.abspath(ROOT), db_file=db_file, module=module, view=view, extra=extra)
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE, text=True)
+    process.stdout.readline()
+    elapsed = (time.perf_counter() - start) * 1000
+    process.kill()
+    process.wait()
+    return elapsed
+
+def time_in_process(shell, username, password):
+    # The password check runs on a worker and finishes through after(), so keep Tk's
+    # event loop going until the view has been drawn and its latency recorded
+    shell.login_latency_ms = None
+    shell.username_entry.insert(0, username)
+    shell.password_entry.insert(0, password)
+    shell.login()
+    deadline = time.perf_counter() + LOGIN_TIMEOUT
+    while shell.login_latency_ms is None:
+        if time.perf_counter() > deadline:
+            raise SystemExit(f"login as {username} did not finish within {LOGIN_TIMEOUT}s")
+        shell.master.update()
+        time.sleep(0.001)
+    latency = shell.login_latency_ms
+    shell.show_login()
+    return latency
+
+def report(label, samples):
+    print(f"{label:<24} median {statistics.median(samples):7.1f} ms  max {max(samples):7.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark login-to-ready latency")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print("This benchmark needs a display:", e)
+        return
+
+    from GMS_Database import get_database_manager
+    from Login_Register import UserManagementSystem
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, "bench.db")
+        db_manager = get_database_manager(db_file)
+        db_manager.register_user("cashier", "cashier")
+        shell = UserManagementSystem(root, db_manager)
+
+        for role, module, view, extra, username in (("admin", "GMS_Main_File", "GroceryManagementSystem", "", "admin"),
+                                                    ("cashier", "GMS_Sell_Items", "SellItemApp", ", 'cashier'", "cashier")):
+            report(f"{role} new process", [time_subprocess(db_file, module, view, extra) for _ in range(args.runs)])
+            report(f"{role} in process", [time_in_process(shell, username, username) for _ in range(args.runs)])
+
+        root.destroy()
+        db_manager.close()
+
+if __name__ == "__main__":
+    main()
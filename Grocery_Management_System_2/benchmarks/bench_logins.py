@@ -0,0 +1,71 @@
+# Logins per second with several terminals logging in at once. Each thread has its own
+# connection, as separate tills would; the key derivation releases the GIL, so the rate
+# should grow with the thread count up to the number of cores.
+# Usage: python benchmarks/bench_logins.py [--threads 1,2,4,8] [--seconds 3] [--target-ms 100]
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import GMS_Credentials
+from GMS_Database import DatabaseManager
+
+USERS = 8
+
+def run_logins(db_file, thread_count, seconds):
+    counts = [0] * thread_count
+    failures = [0] * thread_count
+    ready = threading.Barrier(thread_count + 1)
+    deadline = None
+
+    def worker(index):
+        db_manager = DatabaseManager(db_file)  # Connections belong to the thread that opened them
+        user = index % USERS
+        ready.wait()
+        while time.perf_counter() < deadline:
+            if db_manager.login_user(f"user{user}", f"password{user}"):
+                counts[index] += 1
+            else:
+                failures[index] += 1
+        db_manager.close()
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(thread_count)]
+    for thread in threads:
+        thread.start()
+    start = time.perf_counter()
+    deadline = start + seconds
+    ready.wait()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return sum(counts), sum(failures), elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent logins")
+    parser.add_argument("--threads", default="1,2,4,8")
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--target-ms", type=float, default=GMS_Credentials.TARGET_MS)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    iterations = GMS_Credentials.calibrate_iterations(args.target_ms)
+    print(f"Calibrated to {iterations} PBKDF2 iterations for {args.target_ms:.0f} ms in {time.perf_counter() - start:.2f}s "
+          f"({os.cpu_count()} CPUs)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, "bench.db")
+        db_manager = DatabaseManager(db_file)
+        for user in range(USERS):
+            db_manager.register_user(f"user{user}", f"password{user}")
+        db_manager.close()
+
+        for thread_count in (int(count) for count in args.threads.split(",")):
+            logins, failures, elapsed = run_logins(db_file, thread_count, args.seconds)
+            print(f"{thread_count:>3} threads  {logins / elapsed:7.1f} logins/s  "
+                  f"{elapsed / logins * thread_count * 1000 if logins else 0:7.1f} ms per login  {failures} failed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# Per-lookup latency of "WHERE name=?" before and after the inventory name index.
+# Usage: python benchmarks/bench_name_index.py [--sizes 10000 100000 1000000]
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from GMS_Migrations import migrate_inventory_name_index
+
+LOOKUP_SQL = "SELECT * FROM inventory WHERE name=? COLLATE NOCASE"
+
+def seed_inventory(conn, rows):
+    conn.execute("""CREATE TABLE inventory (
+                        id INTEGER PRIMARY KEY,
+                        name TEXT,
+                        quantity INTEGER,
+                        price REAL
+                    )""")
+    with conn:
+        conn.executemany("INSERT INTO inventory (name, quantity, price) VALUES (?, ?, ?)",
+                         ((f"Item {i:07d}", 100, 1.5) for i in range(rows)))
+
+def time_lookups(conn, names):
+    cursor = conn.cursor()
+    start = time.perf_counter()
+    for name in names:
+        cursor.execute(LOOKUP_SQL, (name,))
+        cursor.fetchone()
+    return (time.perf_counter() - start) / len(names)
+
+def run(rows, lookups):
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, "bench.db"))
+        seed_inventory(conn, rows)
+        rng = random.Random(rows)
+        # Full scans are slow, so time fewer of them on the big tables
+        scan_names = [f"Item {rng.randrange(rows):07d}" for _ in range(max(5, lookups * 10000 // rows))]
+        indexed_names = [f"Item {rng.randrange(rows):07d}" for _ in range(lookups)]
+
+        before = time_lookups(conn, scan_names)
+        start = time.perf_counter()
+        with conn:
+            migrate_inventory_name_index(conn.cursor())
+        migration = time.perf_counter() - start
+        after = time_lookups(conn, indexed_names)
+        conn.close()
+    return before, after, migration
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark inventory lookups by name")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+
+    print("{:>10} {:>14} {:>14} {:>10} {:>12}".format("rows", "scan (us)", "index (us)", "speedup", "migrate (s)"))
+    for rows in args.sizes:
+        before, after, migration = run(rows, args.lookups)
+        print("{:>10} {:>14.1f} {:>14.1f} {:>9.0f}x {:>12.2f}".format(rows, before * 1e6, after * 1e6, before / after, migration))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# Deep pages: how long DatabaseManager.inventory_page takes for the first page and for a
+# page thousands of pages in, per sort key, next to the OFFSET query a scrolled listing
+# used to run. Keyset pages should cost the same however deep they are.
+# Usage: python benchmarks/bench_pagination.py [--items 200000] [--page-size 40] [--repeat 50]
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from GMS_Database import DatabaseManager
+from GMS_Generate import generate_database
+from GMS_Search import SORT_COLUMNS
+
+def median_ms(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def cursor_at(db_manager, sort, page_size, page, search=None):
+    # Walk to the cursor that ends the page before the given one
+    after = None
+    for _ in range(page - 1):
+        rows, after = db_manager.inventory_page(sort, False, page_size, after, search)
+        if after is None:
+            break
+    return after
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark keyset pagination against OFFSET")
+    parser.add_argument("--items", type=int, default=200000)
+    parser.add_argument("--page-size", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, "bench.db")
+        generate_database(db_file, items=args.items, users=1, sales=0, progress=lambda message: None)
+        uncached = DatabaseManager(db_file, cache=False)
+        cached = DatabaseManager(db_file)
+        deep = args.items // args.page_size
+
+        print(f"{args.items} items, pages of {args.page_size}, page 1 vs page {deep}")
+        print("{:<24} {:>12} {:>12} {:>14}".format("listing", "page 1 (ms)", "deep (ms)", "OFFSET (ms)"))
+        for sort, column in SORT_COLUMNS.items():
+            after = cursor_at(uncached, sort, args.page_size, deep)
+            first = median_ms(lambda: uncached.inventory_page(sort, False, args.page_size), args.repeat)
+            keyset = median_ms(lambda: uncached.inventory_page(sort, False, args.page_size, after), args.repeat)
+            order = column if sort == "name" else f"{column}, id"
+            offset_sql = f"SELECT name, price, quantity FROM inventory ORDER BY {order} LIMIT ? OFFSET ?"
+            offset = median_ms(lambda: uncached.cursor.execute(offset_sql, (args.page_size, (deep - 1) * args.page_size)).fetchall(),
+                               max(1, args.repeat // 10))
+            print("{:<24} {:>12.3f} {:>12.3f} {:>14.3f}".format(f"by {sort}", first, keyset, offset))
+
+        after = cursor_at(cached, "name", args.page_size, deep)
+        first = median_ms(lambda: cached.inventory_page("name", False, args.page_size), args.repeat)
+        keyset = median_ms(lambda: cached.inventory_page("name", False, args.page_size, after), args.repeat)
+        print("{:<24} {:>12.3f} {:>12.3f} {:>14}".format("by name, cached", first, keyset, "-"))
+
+        for term in ("milk", "#12"):
+            for sort in ("name", "price"):
+                pages = 0
+                after = None
+                while True:
+                    rows, after = uncached.inventory_page(sort, False, args.page_size, after, term)
+                    pages += 1
+                    if after is None or pages == 50:
+                        break
+                first = median_ms(lambda: uncached.inventory_page(sort, False, args.page_size, None, term), args.repeat)
+                last = median_ms(lambda: uncached.inventory_page(sort, False, args.page_size, after, term), args.repeat)
+                print("{:<24} {:>12.3f} {:>12.3f} {:>14}".format(f"'{term}' by {sort} (p{pages})", first, last, "-"))
+
+if __name__ == "__main__":
+    main()
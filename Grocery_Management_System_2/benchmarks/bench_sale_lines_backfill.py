@@ -0,0 +1,53 @@
+# Time the migration that turns legacy sales.items_bought text into sale_lines.
+# Usage: python benchmarks/bench_sale_lines_backfill.py [--sales 1000000]
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from GMS_Migrations import run_migrations
+
+def cart_text(rng, items):
+    lines = []
+    for _ in range(rng.randint(1, 6)):
+        name, price = rng.choice(items)
+        quantity = rng.randint(1, 5)
+        total_price = quantity * price
+        lines.append(f"Item Name: {name:<20} Price per Item: {price:<15} Quantity: {quantity:<15} Total Price: {total_price:<15} Item Left: {rng.randint(0, 500):<10}")
+    return "\n".join(lines)
+
+def seed_legacy_database(conn, sales, item_count=1000):
+    # The schema as the old Sell Items window left it, before any migration ran
+    conn.executescript("""CREATE TABLE inventory (id INTEGER PRIMARY KEY, name TEXT, quantity INTEGER, price REAL);
+                          CREATE TABLE sales (id INTEGER PRIMARY KEY, items_bought TEXT, total_price REAL);""")
+    rng = random.Random(sales)
+    items = [(f"Item {i}", rng.randint(10, 5000) / 100) for i in range(item_count)]
+    with conn:
+        conn.executemany("INSERT INTO inventory (name, quantity, price) VALUES (?, 1000, ?)", items)
+        conn.executemany("INSERT INTO sales (items_bought, total_price) VALUES (?, 0)",
+                         ((cart_text(rng, items),) for _ in range(sales)))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the sale_lines backfill migration")
+    parser.add_argument("--sales", type=int, default=1000000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, "bench.db"))
+        seed_legacy_database(conn, args.sales)
+        start = time.perf_counter()
+        run_migrations(conn)
+        elapsed = time.perf_counter() - start
+        lines = conn.execute("SELECT COUNT(*) FROM sale_lines").fetchone()[0]
+        unmatched = conn.execute("SELECT COUNT(*) FROM sale_lines WHERE item_id IS NULL").fetchone()[0]
+        conn.close()
+
+    print(f"{args.sales} sales -> {lines} sale lines ({unmatched} without a matching item) in {elapsed:.1f}s")
+    print(f"{args.sales / elapsed:.0f} sales/s, {lines / elapsed:.0f} lines/s")
+
+if __name__ == "__main__":
+    main()
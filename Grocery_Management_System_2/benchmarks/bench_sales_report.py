@@ -0,0 +1,78 @@
+# Date-range report latency from the rollup tables versus aggregating sales/sale_lines directly.
+# Usage: python benchmarks/bench_sales_report.py [--sales 100000 1000000] [--days 730]
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from GMS_Database import DatabaseManager
+
+ITEM_COUNT = 2000
+CASHIERS = ["alice", "bob", "carol", "dave", "erin"]
+RANGES = [7, 30, 365]
+
+def seed_sales(db_manager, sales, days):
+    rng = random.Random(sales)
+    first_day = date.today() - timedelta(days=days - 1)
+    cursor = db_manager.cursor
+    with db_manager.unit_of_work():
+        cursor.executemany("INSERT INTO inventory (name, quantity, price) VALUES (?, 1000000, ?)",
+                           ((f"Item {i}", rng.randint(10, 5000) / 100) for i in range(ITEM_COUNT)))
+        cursor.execute("SELECT id, price FROM inventory")
+        items = cursor.fetchall()
+        sale_rows = []
+        line_rows = []
+        for sale_id in range(1, sales + 1):
+            created_at = f"{first_day + timedelta(days=(sale_id * days) // (sales + 1))} 12:00:00"
+            lines = [rng.choice(items) + (rng.randint(1, 4),) for _ in range(rng.randint(1, 5))]
+            sale_rows.append((sale_id, sum(price * quantity for item_id, price, quantity in lines), created_at, rng.choice(CASHIERS)))
+            line_rows.extend((sale_id, item_id, quantity, price) for item_id, price, quantity in lines)
+        cursor.executemany("INSERT INTO sales (id, total_price, created_at, cashier) VALUES (?, ?, ?, ?)", sale_rows)
+        cursor.executemany("INSERT INTO sale_lines (sale_id, item_id, qty, unit_price) VALUES (?, ?, ?, ?)", line_rows)
+
+def adhoc_item_report(cursor, start_day, end_day):
+    cursor.execute("""SELECT l.item_id, SUM(l.qty), SUM(l.qty * l.unit_price) FROM sales s
+                      JOIN sale_lines l ON l.sale_id = s.id
+                      WHERE s.created_at BETWEEN ? AND ?
+                      GROUP BY l.item_id""", (f"{start_day} 00:00:00", f"{end_day} 23:59:59"))
+    return cursor.fetchall()
+
+def timed(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return (time.perf_counter() - start) * 1000
+
+def run(sales, days):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_manager = DatabaseManager(os.path.join(tmp, "bench.db"))
+        seed_sales(db_manager, sales, days)
+        start = time.perf_counter()
+        db_manager.rebuild_sales_rollups()
+        rebuild = time.perf_counter() - start
+        print(f"{sales} sales over {days} days, rollups rebuilt in {rebuild:.1f}s")
+
+        today = date.today()
+        for length in RANGES:
+            start_day = today - timedelta(days=length - 1)
+            by_day = timed(db_manager.sales_report, start_day, today, "day")
+            by_item = timed(db_manager.sales_report, start_day, today, "item")
+            by_cashier = timed(db_manager.sales_report, start_day, today, "cashier")
+            adhoc = timed(adhoc_item_report, db_manager.cursor, start_day, today)
+            print("  {:>4} days: day {:>7.2f} ms  item {:>7.2f} ms  cashier {:>7.2f} ms  | ad-hoc item {:>9.2f} ms".format(
+                length, by_day, by_item, by_cashier, adhoc))
+        db_manager.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sales reports from the rollup tables")
+    parser.add_argument("--sales", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--days", type=int, default=730)
+    args = parser.parse_args()
+    for sales in args.sales:
+        run(sales, args.days)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# Scan-to-cart lookups: what the sell window's barcode entry pays per scan, from the
+# inventory cache, from SQLite on the barcode index, and through GMS_Service, next to
+# the old exact name lookup. A terminal must keep up with at least 20 scans a second.
+# Usage: python benchmarks/bench_scan.py [--items 200000] [--scans 20000]
+import argparse
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+from GMS_Database import DatabaseManager
+from GMS_Generate import ean13, generate_database
+from GMS_Service import ServiceClient
+
+SCANS_PER_SECOND_REQUIRED = 20
+
+def time_lookups(lookup, keys):
+    timings = []
+    for key in keys:
+        start = time.perf_counter()
+        if lookup(key) is None:
+            raise SystemExit(f"lookup failed for {key!r}")
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def report(label, timings):
+    timings = sorted(timings)
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    print("{:<16} {:>10.3f} {:>10.3f} {:>10.3f} {:>12.0f}".format(label, statistics.median(timings), p99, timings[-1], 1000 / statistics.mean(timings)))
+    return timings[-1]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark barcode scan lookups")
+    parser.add_argument("--items", type=int, default=200000)
+    parser.add_argument("--scans", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, "bench.db")
+        generate_database(db_file, items=args.items, users=1, sales=0, progress=lambda message: None)
+        rng = random.Random(1)
+        numbers = [rng.randint(1, args.items) for _ in range(args.scans)]
+        barcodes = [ean13(number) for number in numbers]
+
+        cached = DatabaseManager(db_file)
+        uncached = DatabaseManager(db_file, cache=False)
+        names = [uncached.get_item_by_barcode(barcode)[1] for barcode in barcodes]
+        start = time.perf_counter()
+        cached.get_item_by_barcode(barcodes[0])
+        print(f"{args.items} items, cache loaded in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        print("{:<16} {:>10} {:>10} {:>10} {:>12}".format("lookup", "p50 (ms)", "p99 (ms)", "max (ms)", "scans/s"))
+        worst = report("barcode cached", time_lookups(cached.get_item_by_barcode, barcodes))
+        report("barcode SQL", time_lookups(uncached.get_item_by_barcode, barcodes))
+        report("name SQL", time_lookups(uncached.get_item_by_name, names))
+
+        server = subprocess.Popen([sys.executable, os.path.join(ROOT, "GMS_Service.py"), "--db", db_file, "--port", "0"],
+                                  stdout=subprocess.PIPE, text=True)
+        try:
+            client = ServiceClient(server.stdout.readline().split()[-1])
+            report("barcode service", time_lookups(client.get_item_by_barcode, barcodes[:2000]))
+        finally:
+            server.terminate()
+            server.wait()
+
+    budget = 1000 / SCANS_PER_SECOND_REQUIRED
+    print(f"slowest cached scan {worst:.3f} ms of the {budget:.0f} ms per scan budget: {'ok' if worst < budget else 'TOO SLOW'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# Per-keystroke latency of the inventory search boxes: every prefix of each query is
+# searched, as happens on <KeyRelease>. Compares the old LIKE '%term%' scan with
+# GMS_Search.search_inventory on the trigram index.
+# Usage: python benchmarks/bench_search.py [--rows 500000]
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from GMS_Migrations import run_migrations
+from GMS_Search import search_inventory
+
+BRANDS = ["Nestle", "Coke", "Pantene", "Tide", "Dove", "Colgate", "Heinz", "Kellogg", "Lipton", "Nivea", "Hi-Ho", "Choc-O"]
+PRODUCTS = ["Milk", "Shampoo", "Soap", "Cereal", "Juice", "Butter", "Cheese", "Bread", "Coffee", "Tea", "Chips", "Hotdog"]
+QUERIES = ["milk", "Tide Soap", "choc-o cer", "hotdog 250", "#4711", "butter", "xylophone"]
+
+def item_names(rows, rng):
+    names = set()
+    while len(names) < rows:
+        names.add(f"{rng.choice(BRANDS)} {rng.choice(PRODUCTS)} {rng.randint(1, 2000)}g #{rng.randint(0, 99999)}")
+    return names
+
+def seed_inventory(conn, rows):
+    conn.execute("""CREATE TABLE inventory (
+                        id INTEGER PRIMARY KEY,
+                        name TEXT,
+                        quantity INTEGER,
+                        price REAL
+                    )""")
+    rng = random.Random(rows)
+    with conn:
+        conn.executemany("INSERT INTO inventory (name, quantity, price) VALUES (?, ?, ?)",
+                         ((name, rng.randint(0, 500), rng.randint(10, 5000) / 100) for name in item_names(rows, rng)))
+
+def like_search(cursor, term):
+    cursor.execute("SELECT name, price, quantity FROM inventory WHERE name LIKE ?", ("%" + term + "%",))
+    return cursor.fetchall()
+
+def indexed_search(cursor, term):
+    return search_inventory(cursor, term)
+
+def time_keystrokes(cursor, search):
+    timings = []
+    for query in QUERIES:
+        for length in range(1, len(query) + 1):
+            start = time.perf_counter()
+            search(cursor, query[:length])
+            timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def report(label, timings):
+    timings = sorted(timings)
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    print("{:<10} {:>10} {:>10.2f} {:>10.2f} {:>10.2f}".format(label, len(timings), statistics.median(timings), p99, timings[-1]))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark inventory search per keystroke")
+    parser.add_argument("--rows", type=int, default=500000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, "bench.db"))
+        seed_inventory(conn, args.rows)
+        start = time.perf_counter()
+        run_migrations(conn)
+        print(f"{args.rows} items, indexes built in {time.perf_counter() - start:.1f}s")
+        cursor = conn.cursor()
+
+        print("{:<10} {:>10} {:>10} {:>10} {:>10}".format("search", "keystrokes", "p50 (ms)", "p99 (ms)", "max (ms)"))
+        time_keystrokes(cursor, indexed_search)  # Warm the page cache the way a running terminal would
+        report("LIKE", time_keystrokes(cursor, like_search))
+        report("trigram", time_keystrokes(cursor, indexed_search))
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# Load test for GMS_Service: several terminal processes run a mix of item lookups,
+# searches and checkouts against a local server, then the same mix with every terminal
+# opening the database file itself, as before the service existed. Afterwards the stock
+# sold is checked against the sale lines written.
+# Usage: python benchmarks/bench_service.py [--terminals 8] [--seconds 10]
+import argparse
+import multiprocessing
+import os
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+from GMS_Database import DatabaseManager
+from GMS_Generate import generate_database
+from GMS_Service import ServiceClient
+
+# Share of each call in the mix; the rest are checkouts
+LOOKUP_SHARE = 0.6
+SEARCH_SHARE = 0.3
+SEARCH_TERMS = ["milk", "tide", "choc", "rice 1", "soap", "#12", "juice 1l"]
+
+def terminal(target, names, seconds, seed, results):
+    if target.startswith("http"):
+        db = ServiceClient(target)
+    else:
+        db = DatabaseManager(target)
+    rng = random.Random(seed)
+    timings = {"lookup": [], "search": [], "checkout": []}
+    failed = 0
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        roll = rng.random()
+        start = time.perf_counter()
+        if roll < LOOKUP_SHARE:
+            kind = "lookup"
+            db.get_item_by_name(rng.choice(names))
+        elif roll < LOOKUP_SHARE + SEARCH_SHARE:
+            kind = "search"
+            db.search_item(rng.choice(SEARCH_TERMS))
+        else:
+            kind = "checkout"
+            cart = [(name, 1) for name in rng.sample(names, rng.randint(1, 8))]
+            success, result = db.sell_cart(cart, f"terminal{seed}")
+            failed += not success
+        timings[kind].append((time.perf_counter() - start) * 1000)
+    results.put((timings, failed))
+
+def run(target, names, terminals, seconds):
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=terminal, args=(target, names, seconds, seed, results)) for seed in range(terminals)]
+    for process in processes:
+        process.start()
+    collected = [results.get() for process in processes]
+    for process in processes:
+        process.join()
+
+    print("{:<10} {:>8} {:>10} {:>10} {:>10}".format("call", "calls/s", "p50 (ms)", "p99 (ms)", "max (ms)"))
+    for kind in ("lookup", "search", "checkout"):
+        timings = sorted(elapsed for result in collected for elapsed in result[0][kind])
+        if timings:
+            p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+            print("{:<10} {:>8.0f} {:>10.2f} {:>10.2f} {:>10.2f}".format(kind, len(timings) / seconds, statistics.median(timings), p99, timings[-1]))
+    print(f"failed checkouts: {sum(result[1] for result in collected)}")
+
+def stock_check(db_file, stock_before):
+    conn = sqlite3.connect(db_file)
+    stock_after = conn.execute("SELECT SUM(quantity) FROM inventory").fetchone()[0]
+    sold = conn.execute("SELECT COALESCE(SUM(qty), 0) FROM sale_lines WHERE sale_id > ?", (stock_before[1],)).fetchone()[0]
+    conn.close()
+    print(f"stock sold {stock_before[0] - stock_after}, sale lines {sold}: {'ok' if stock_before[0] - stock_after == sold else 'MISMATCH'}")
+
+def stock_snapshot(db_file):
+    conn = sqlite3.connect(db_file)
+    snapshot = conn.execute("SELECT SUM(quantity), (SELECT COALESCE(MAX(id), 0) FROM sales) FROM inventory").fetchone()
+    conn.close()
+    return snapshot
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the inventory and checkout service")
+    parser.add_argument("--terminals", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--items", type=int, default=20000)
+    parser.add_argument("--readers", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, "bench.db")
+        generate_database(db_file, items=args.items, users=args.terminals, sales=1000, progress=lambda message: None)
+        conn = sqlite3.connect(db_file)
+        names = [row[0] for row in conn.execute("SELECT name FROM inventory")]
+        conn.close()
+
+        server = subprocess.Popen([sys.executable, os.path.join(ROOT, "GMS_Service.py"), "--db", db_file, "--port", "0",
+                                   "--readers", str(args.readers)], stdout=subprocess.PIPE, text=True)
+        try:
+            address = server.stdout.readline().split()[-1]
+            print(f"{args.terminals} terminals for {args.seconds:g}s against {address}")
+            before = stock_snapshot(db_file)
+            run(address, names, args.terminals, args.seconds)
+            stock_check(db_file, before)
+            print(ServiceClient(address).request("GET", "/stats")[1])
+        finally:
+            server.terminate()
+            server.wait()
+
+        print(f"\n{args.terminals} terminals for {args.seconds:g}s on the database file directly")
+        before = stock_snapshot(db_file)
+        run(db_file, names, args.terminals, args.seconds)
+        stock_check(db_file, before)
+
+if __name__ == "__main__":
+    main()
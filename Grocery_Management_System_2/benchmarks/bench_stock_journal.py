@@ -0,0 +1,108 @@
+# What the stock movement journal costs a checkout: the same carts are sold with and
+# without journaling, alternating rounds between two copies of one database so disk and
+# cache effects hit both alike. The journal must add less than 10% to checkout latency.
+# Also times a checkpoint and point-in-time stock lookups a full checkpoint interval on,
+# and again once another interval of movements has been journaled after them.
+# Usage: python benchmarks/bench_stock_journal.py [--items 20000] [--carts 2000] [--lines 8] [--dir .]
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from GMS_Database import DEFAULT_DURABILITY, STOCK_CHECKPOINT_INTERVAL, DatabaseManager
+from GMS_Generate import generate_database
+
+MAX_OVERHEAD = 0.10
+ROUNDS = 10
+
+def time_checkouts(db_manager, carts):
+    timings = []
+    for cart in carts:
+        start = time.perf_counter()
+        success, result = db_manager.sell_cart(cart, "bench")
+        timings.append((time.perf_counter() - start) * 1000)
+        if not success:
+            raise SystemExit(f"checkout failed: {result}")
+    return timings
+
+def report(label, timings):
+    timings = sorted(timings)
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    print("{:<14} {:>10.3f} {:>10.3f} {:>10.3f}".format(label, statistics.mean(timings), statistics.median(timings), p99))
+    return statistics.mean(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the stock movement journal")
+    parser.add_argument("--items", type=int, default=20000)
+    parser.add_argument("--carts", type=int, default=2000)
+    parser.add_argument("--lines", type=int, default=8)
+    parser.add_argument("--durability", default=DEFAULT_DURABILITY)
+    parser.add_argument("--dir", help="where to put the test databases (defaults to the temp directory)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        journaled_file = os.path.join(tmp, "journaled.db")
+        generate_database(journaled_file, items=args.items, users=1, sales=0, progress=lambda message: None)
+        plain_file = os.path.join(tmp, "plain.db")
+        shutil.copy(journaled_file, plain_file)
+        journaled = DatabaseManager(journaled_file, durability=args.durability, cache=False)
+        plain = DatabaseManager(plain_file, durability=args.durability, cache=False, stock_journal=False)
+        # Restock everything so no cart runs out halfway through
+        with journaled.unit_of_work():
+            journaled.cursor.execute("UPDATE inventory SET quantity = quantity + 1000000")
+        with plain.unit_of_work():
+            plain.cursor.execute("UPDATE inventory SET quantity = quantity + 1000000")
+        names = [row[0] for row in journaled.cursor.execute("SELECT name FROM inventory")]
+
+        rng = random.Random(1)
+        carts = [[(name, rng.randint(1, 3)) for name in rng.sample(names, args.lines)] for _ in range(args.carts)]
+        per_round = max(1, len(carts) // ROUNDS)
+        timings = {"journaled": [], "plain": []}
+        for start in range(0, len(carts), per_round):
+            for label, db_manager in (("plain", plain), ("journaled", journaled)):
+                timings[label] += time_checkouts(db_manager, carts[start:start + per_round])
+
+        print(f"{args.carts} carts of {args.lines} lines, {args.durability} durability")
+        print("{:<14} {:>10} {:>10} {:>10}".format("checkout", "mean (ms)", "p50 (ms)", "p99 (ms)"))
+        plain_mean = report("no journal", timings["plain"])
+        journaled_mean = report("journal", timings["journaled"])
+        overhead = journaled_mean / plain_mean - 1
+
+        # Fill one checkpoint interval with movements, then look up stock from its far end
+        middle = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        filler = args.carts * args.lines
+        with journaled.unit_of_work():
+            for _ in range(0, max(0, STOCK_CHECKPOINT_INTERVAL - filler), args.lines):
+                journaled.sell_cart(rng.choice(carts), "bench")
+        start = time.perf_counter()
+        journaled.checkpoint_stock()
+        print(f"\ncheckpoint of {len(names)} items: {(time.perf_counter() - start) * 1000:.1f} ms")
+        start = time.perf_counter()
+        stock = journaled.stock_at(middle)
+        print(f"stock of every item at a past time: {(time.perf_counter() - start) * 1000:.1f} ms ({len(stock)} items)")
+        item_id = journaled.get_item_by_name(names[0])[0]
+        start = time.perf_counter()
+        journaled.stock_at(middle, item_id)
+        print(f"stock of one item at a past time: {(time.perf_counter() - start) * 1000:.1f} ms")
+        # Movements after the next checkpoint must not slow a lookup down
+        with journaled.unit_of_work():
+            for _ in range(0, STOCK_CHECKPOINT_INTERVAL, args.lines):
+                journaled.sell_cart(rng.choice(carts), "bench")
+        start = time.perf_counter()
+        journaled.stock_at(middle, item_id)
+        print(f"same, with {STOCK_CHECKPOINT_INTERVAL} later movements: {(time.perf_counter() - start) * 1000:.1f} ms")
+        journaled.close()
+        plain.close()
+
+    print(f"\njournal overhead {overhead:+.1%} (limit {MAX_OVERHEAD:.0%}): {'ok' if overhead < MAX_OVERHEAD else 'TOO SLOW'}")
+    if overhead >= MAX_OVERHEAD:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
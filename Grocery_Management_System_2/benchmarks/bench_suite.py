@@ -0,0 +1,161 @@
+# Headless timings for every DatabaseManager operation at several inventory sizes.
+# Writes ops/s and p50/p99 latency as JSON and, given a baseline from an earlier run,
+# flags operations whose median got slower than the threshold (exit status 1).
+# Usage: python benchmarks/bench_suite.py [--scales 1000,10000,100000] [--db generated.db] [--output results.json]
+#                                         [--baseline baseline.json] [--threshold 0.25] [--min-delta-ms 0.05]
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from GMS_Database import DatabaseManager
+
+BRANDS = ["Nestle", "Coke", "Pantene", "Tide", "Dove", "Colgate", "Heinz", "Kellogg", "Lipton", "Nivea"]
+PRODUCTS = ["Milk", "Shampoo", "Soap", "Cereal", "Juice", "Butter", "Cheese", "Bread", "Coffee", "Tea"]
+
+def item_name(index):
+    return f"{BRANDS[index % len(BRANDS)]} {PRODUCTS[index // len(BRANDS) % len(PRODUCTS)]} #{index}"
+
+def seed_inventory(db_manager, items):
+    with db_manager.unit_of_work():
+        db_manager.upsert_items((item_name(index), 1000000, (index % 5000 + 10) / 100) for index in range(items))
+
+def percentile(sorted_timings, fraction):
+    return sorted_timings[min(len(sorted_timings) - 1, int(len(sorted_timings) * fraction))]
+
+def summarize(timings):
+    timings = sorted(timings)
+    total = sum(timings)
+    return {
+        "runs": len(timings),
+        "ops_per_sec": len(timings) / total * 1000 if total else None,
+        "p50_ms": percentile(timings, 0.5),
+        "p99_ms": percentile(timings, 0.99),
+        "max_ms": timings[-1],
+    }
+
+def measure(operation, arguments):
+    # Time each call on its own, in milliseconds
+    timings = []
+    for args in arguments:
+        start = time.perf_counter()
+        operation(*args)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def run_scale(items, runs, auth_runs, seed, source_db=None):
+    # Seed a database with items, or work on a copy of source_db (e.g. from GMS_Generate.py)
+    rng = random.Random(seed)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, "bench.db")
+        if source_db:
+            with sqlite3.connect(source_db) as source, sqlite3.connect(db_file) as copy:
+                source.backup(copy)
+        db_manager = DatabaseManager(db_file)
+        if source_db:
+            items = db_manager.count_inventory()
+        else:
+            seed_inventory(db_manager, items)
+
+        # Look items up by names that really exist, picked at random
+        db_manager.cursor.execute("SELECT MAX(id) FROM inventory")
+        max_id = db_manager.cursor.fetchone()[0] or 0
+        picked = rng.sample(range(1, max_id + 1), min(1000, max_id))
+        db_manager.cursor.execute(f"SELECT name FROM inventory WHERE id IN ({','.join('?' * len(picked))})", picked)
+        pool = db_manager.cursor.fetchall()
+
+        def names(count):
+            return [rng.choice(pool) for _ in range(count)]
+
+        results["add_item"] = measure(db_manager.add_item, [(f"New item {index}", 10, 1.5) for index in range(runs)])
+        results["get_item_by_name"] = measure(db_manager.get_item_by_name, names(runs))
+        results["search_item"] = measure(db_manager.search_item,
+                                         [(rng.choice(BRANDS + PRODUCTS)[:rng.randint(3, 6)],) for _ in range(runs)])
+        results["sell_item"] = measure(db_manager.sell_item, [name + (1,) for name in names(runs)])
+        results["sell_cart"] = measure(db_manager.sell_cart,
+                                       [([(name, 1) for (name,) in names(rng.randint(1, 6))], "bench") for _ in range(runs)])
+        results["save_sale"] = measure(db_manager.save_sale, [(f"{item_name(index)} x1", 1.5, "bench") for index in range(runs)])
+        results["view_inventory"] = measure(db_manager.view_inventory, [()] * max(3, runs // 20))
+        results["register_user"] = measure(db_manager.register_user, [(f"user{index}", f"password{index}") for index in range(auth_runs)])
+        results["login_user"] = measure(db_manager.login_user, [(f"user{index}", f"password{index}") for index in range(auth_runs)])
+
+        # Destructive, so re-seed (untimed) before each run
+        timings = []
+        for _ in range(3):
+            seed_inventory(db_manager, items)
+            timings += measure(db_manager.clear_inventory, [()])
+        results["clear_inventory"] = timings
+        db_manager.close()
+    return {operation: summarize(timings) for operation, timings in results.items()}
+
+def compare(results, baseline, threshold, min_delta_ms):
+    # Print the change in median latency against the baseline; returns the regressions
+    regressions = []
+    print(f"\n{'scale':>8} {'operation':<18} {'baseline p50':>13} {'p50':>10} {'change':>8}")
+    for scale, operations in results["results"].items():
+        for operation, stats in operations.items():
+            previous = baseline.get("results", {}).get(scale, {}).get(operation)
+            if not previous:
+                continue
+            change = stats["p50_ms"] / previous["p50_ms"] - 1 if previous["p50_ms"] else 0.0
+            flag = ""
+            # Tiny medians jitter by large percentages, so the slowdown must also be measurable
+            if change > threshold and stats["p50_ms"] - previous["p50_ms"] > min_delta_ms:
+                flag = "  REGRESSION"
+                regressions.append((scale, operation, change))
+            print(f"{scale:>8} {operation:<18} {previous['p50_ms']:>11.3f}ms {stats['p50_ms']:>8.3f}ms {change:>+7.0%}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every DatabaseManager operation")
+    parser.add_argument("--scales", default="1000,10000,100000", help="inventory sizes to seed")
+    parser.add_argument("--db", help="also benchmark a copy of this database, e.g. one made by GMS_Generate.py")
+    parser.add_argument("--runs", type=int, default=200, help="timed calls per operation")
+    parser.add_argument("--auth-runs", type=int, default=10, help="timed register/login calls (each one is a full password hash)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--baseline", help="JSON from an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown of the median before it counts as a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05, help="ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    results = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "runs": args.runs,
+        },
+        "results": {},
+    }
+    print(f"{'scale':>8} {'operation':<18} {'ops/s':>10} {'p50 ms':>9} {'p99 ms':>9}")
+    scales = [(scale, int(scale), None) for scale in args.scales.split(",") if scale]
+    if args.db:
+        scales.append((os.path.basename(args.db), None, args.db))
+    for scale, items, source_db in scales:
+        results["results"][scale] = run_scale(items, args.runs, args.auth_runs, args.seed, source_db)
+        for operation, stats in results["results"][scale].items():
+            print(f"{scale:>8} {operation:<18} {stats['ops_per_sec']:>10.1f} {stats['p50_ms']:>9.3f} {stats['p99_ms']:>9.3f}")
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"\n{len(regressions)} operation(s) slower than the baseline by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
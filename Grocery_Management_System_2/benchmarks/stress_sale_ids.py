@@ -0,0 +1,101 @@
+# Several terminal processes ring up sales as fast as they can, each numbering its sales
+# from the blocks it reserves (DatabaseManager.next_sale_id), some through GMS_Service.
+# Checks that no sale ID was handed out twice and that every ID a terminal showed is the
+# ID its sale was saved under.
+# Usage: python benchmarks/stress_sale_ids.py [--processes 8] [--sales 2000] [--service-terminals 2]
+import argparse
+import multiprocessing
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+from GMS_Database import DatabaseManager
+from GMS_Service import ServiceClient
+
+ITEMS = [f"Item {i}" for i in range(20)]
+
+def worker(target, worker_id, sales, start_event, results):
+    db = ServiceClient(target) if target.startswith("http") else DatabaseManager(target)
+    rng = random.Random(worker_id)
+    cashier = f"terminal{worker_id}"
+    saved = []  # (sale ID shown, sale ID saved)
+    start_event.wait()
+    for number in range(sales):
+        if number % 10 == 9 and isinstance(db, DatabaseManager):
+            # Now and then a sale through the older save_sale path, which numbers itself
+            db.save_sale("1 line", 1.0, cashier)
+            continue
+        shown = db.next_sale_id()
+        success, result = db.sell_cart([(rng.choice(ITEMS), 1)], cashier, shown)
+        if success:
+            saved.append((shown, result))
+    results.put((cashier, saved))
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent sale ID allocation stress test")
+    parser.add_argument("--processes", type=int, default=8, help="terminals opening the database file")
+    parser.add_argument("--service-terminals", type=int, default=2, help="terminals checking out through GMS_Service")
+    parser.add_argument("--sales", type=int, default=2000, help="sales attempted per terminal")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, "stress.db")
+        db_manager = DatabaseManager(db_file)
+        for name in ITEMS:
+            db_manager.add_item(name, 10 ** 9, 1.0)
+        db_manager.sell_cart([(ITEMS[0], 1)])  # A sale numbered before the terminals start
+
+        targets = [db_file] * args.processes
+        server = None
+        if args.service_terminals:
+            server = subprocess.Popen([sys.executable, os.path.join(ROOT, "GMS_Service.py"), "--db", db_file, "--port", "0"],
+                                      stdout=subprocess.PIPE, text=True)
+            targets += [server.stdout.readline().split()[-1]] * args.service_terminals
+
+        start_event = multiprocessing.Event()
+        results = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=worker, args=(target, i, args.sales, start_event, results))
+                     for i, target in enumerate(targets)]
+        for process in processes:
+            process.start()
+        time.sleep(0.5)  # Let every process open its connection first
+        start = time.perf_counter()
+        start_event.set()
+        outcomes = [results.get() for _ in processes]
+        elapsed = time.perf_counter() - start
+        for process in processes:
+            process.join()
+        if server:
+            server.terminate()
+            server.wait()
+
+        conn = sqlite3.connect(db_file)
+        persisted = dict(conn.execute("SELECT id, cashier FROM sales"))
+        conn.close()
+
+    problems = 0
+    shown_ids = [shown for cashier, saved in outcomes for shown, result in saved]
+    if len(shown_ids) != len(set(shown_ids)):
+        problems += 1
+        print(f"DUPLICATES: {len(shown_ids) - len(set(shown_ids))} sale IDs were shown by more than one sale")
+    for cashier, saved in outcomes:
+        for shown, result in saved:
+            if shown != result or persisted.get(shown) != cashier:
+                problems += 1
+                print(f"MISMATCH {cashier}: showed {shown}, saved as {result}, stored for {persisted.get(shown)}")
+
+    print(f"{len(targets)} terminals, {len(persisted) - 1} sales saved in {elapsed:.2f}s ({(len(persisted) - 1) / elapsed:.0f} sales/s)")
+    print(f"highest sale ID {max(persisted)}, {max(persisted) - len(persisted)} IDs reserved but never used")
+    if problems:
+        print("FAILED")
+        sys.exit(1)
+    print("OK: every sale ID unique and saved as shown")
+
+if __name__ == "__main__":
+    main()
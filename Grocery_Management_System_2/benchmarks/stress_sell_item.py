@@ -0,0 +1,86 @@
+# Several processes sell the same few items at once through GMS_Database.DatabaseManager.
+# Checks that every unit sold is accounted for in the final stock and reports sales per second.
+# Usage: python benchmarks/stress_sell_item.py [--processes 8] [--sales 2000] [--cart-size 3]
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from GMS_Database import DatabaseManager
+
+ITEMS = [f"Item {i}" for i in range(5)]
+
+def worker(db_file, worker_id, sales, cart_size, start_event, results):
+    db_manager = DatabaseManager(db_file)
+    rng = random.Random(worker_id)
+    sold = {name: 0 for name in ITEMS}
+    completed = 0
+    failed = 0
+    start_event.wait()
+    for _ in range(sales):
+        if cart_size == 1:
+            name, quantity = rng.choice(ITEMS), rng.randint(1, 3)
+            success = db_manager.sell_item(name, quantity)[0]
+            cart = [(name, quantity)]
+        else:
+            cart = [(rng.choice(ITEMS), rng.randint(1, 3)) for _ in range(cart_size)]
+            success = db_manager.sell_cart(cart)[0]
+        if success:
+            completed += 1
+            for name, quantity in cart:
+                sold[name] += quantity
+        else:
+            failed += 1
+    results.put((completed, failed, sold))
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent sell_item stress test")
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--sales", type=int, default=2000, help="sales attempted per process")
+    parser.add_argument("--cart-size", type=int, default=1, help="lines per sale; more than 1 uses sell_cart")
+    parser.add_argument("--stock", type=int, default=50000, help="starting quantity of every item")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, "stress.db")
+        db_manager = DatabaseManager(db_file)
+        for name in ITEMS:
+            db_manager.add_item(name, args.stock, 1.0)
+
+        start_event = multiprocessing.Event()
+        results = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=worker, args=(db_file, i, args.sales, args.cart_size, start_event, results))
+                     for i in range(args.processes)]
+        for process in processes:
+            process.start()
+        time.sleep(0.5)  # Let every process open its connection first
+        start = time.perf_counter()
+        start_event.set()
+        outcomes = [results.get() for _ in processes]
+        elapsed = time.perf_counter() - start
+        for process in processes:
+            process.join()
+
+        completed = sum(outcome[0] for outcome in outcomes)
+        failed = sum(outcome[1] for outcome in outcomes)
+        lost = 0
+        for name in ITEMS:
+            sold = sum(outcome[2][name] for outcome in outcomes)
+            remaining = db_manager.get_item_by_name(name)[2]
+            if remaining < 0 or sold + remaining != args.stock:
+                lost += 1
+                print(f"MISMATCH {name}: sold {sold}, remaining {remaining}, started with {args.stock}")
+
+    print(f"{args.processes} processes, {completed} sales completed, {failed} refused, {elapsed:.2f}s")
+    print(f"{completed / elapsed:.0f} sales/s")
+    if lost:
+        print("FAILED: stock was lost")
+        sys.exit(1)
+    print("OK: all stock accounted for")
+
+if __name__ == "__main__":
+    main()